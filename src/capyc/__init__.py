@@ -1,3 +1,9 @@
 # SPDX-FileCopyrightText: 2024-present jefer94 <jdefreitaspinto@gmail.com>
 #
 # SPDX-License-Identifier: MIT
+
+
+def warmup(*args, **kwargs):
+    from capyc.django.warmup import warmup
+
+    return warmup(*args, **kwargs)
@@ -1,21 +1,26 @@
 import asyncio
 import gzip
+import hashlib
 import importlib
-import json
 import os
 import sys
+import time
 import zlib
 from functools import lru_cache
-from typing import Any, Type, TypedDict
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Optional, Type, TypedDict
 
 import brotli
 import zstandard
 from django.conf import settings
 from django.core.cache import cache
 from django.db.models import F, Q
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
 from rest_framework import status
 
+from capyc.django.encoder import dumps
+from capyc.django.routing import pin_serializer
+
 try:
     import celery  # noqa: F401
 
@@ -32,7 +37,37 @@ except ImportError:
 # from django.db.models.fields.json import KT
 
 
-__all__ = ["set_cache", "get_cache", "delete_cache", "reset_cache", "settings", "Filter", "Annotate", "Aggregate"]
+__all__ = [
+    "set_cache",
+    "get_cache",
+    "aset_cache",
+    "aget_cache",
+    "get_many_cache",
+    "aget_many_cache",
+    "set_many_cache",
+    "aset_many_cache",
+    "build_many_response",
+    "get_list_cache",
+    "aget_list_cache",
+    "set_list_cache",
+    "aset_list_cache",
+    "get_entities_cache",
+    "aget_entities_cache",
+    "set_entities_cache",
+    "aset_entities_cache",
+    "set_entity_response",
+    "aset_entity_response",
+    "stream_cache",
+    "astream_cache",
+    "delete_cache",
+    "reset_cache",
+    "get_modified",
+    "aget_modified",
+    "settings",
+    "Filter",
+    "Annotate",
+    "Aggregate",
+]
 
 IS_DJANGO_REDIS = hasattr(cache, "delete_pattern")
 FALSE_VALUES = ["false", "0", "no", "off", "False", "FALSE", "false", "N", "No", "NO", "Off", "OFF"]
@@ -53,14 +88,23 @@ else:
     min_compression_size = int(os.getenv("CAPYC_MIN_COMPRESSION_SIZE", "10"))
 
 
+if "streaming" in CAPYC and isinstance(CAPYC["streaming"], dict):
+    max_stream_cache_size = int(CAPYC["streaming"].get("max_cache_kb", 1024))
+
+else:
+    max_stream_cache_size = int(os.getenv("CAPYC_MAX_STREAM_CACHE_SIZE", "1024"))
+
+
 class Settings(TypedDict):
     min_compression_size: int
+    max_stream_cache_size: int
     is_cache_enabled: bool
     is_compression_enabled: bool
 
 
 settings: Settings = {
     "min_compression_size": min_compression_size,
+    "max_stream_cache_size": max_stream_cache_size,
     "is_cache_enabled": is_cache_enabled,
     "is_compression_enabled": is_compression_enabled,  # not used yet
 }
@@ -101,6 +145,10 @@ def key_builder(serializer: str, params: Params, query: list[str], headers: dict
 
 
 def compress(value: Any, headers: dict[str, str], cache_control: str | None = None):
+    return compress_content(dumps(value), headers, cache_control)
+
+
+def compress_content(value: bytes, headers: dict[str, str], cache_control: str | None = None):
     encoding = headers.get("Accept-Encoding", "")
     # until support other content types
     contentType = "application/json"
@@ -110,8 +158,6 @@ def compress(value: Any, headers: dict[str, str], cache_control: str | None = No
         "content": None,
     }
 
-    value = json.dumps(value).encode("utf-8")
-
     if (
         sys.getsizeof(value) / 1024 <= settings["min_compression_size"]
         or (cache_control and "no-store" in cache_control)
@@ -149,12 +195,87 @@ def compress(value: Any, headers: dict[str, str], cache_control: str | None = No
     return response
 
 
+type Compressor = tuple[Callable[[bytes], bytes], Callable[[], bytes]]
+
+
+def stream_compressor(encoding: str) -> tuple[str, Optional[Compressor]]:
+    # same preference as compress
+    if "zstd" in encoding:
+        compressor = zstandard.ZstdCompressor().compressobj()
+        return "zstd", (compressor.compress, compressor.flush)
+
+    if "br" in encoding:
+        compressor = brotli.Compressor()
+        return "br", (compressor.process, compressor.finish)
+
+    if "gzip" in encoding:
+        compressor = zlib.compressobj(wbits=31)
+        return "gzip", (compressor.compress, compressor.flush)
+
+    if "deflate" in encoding:
+        compressor = zlib.compressobj()
+        return "deflate", (compressor.compress, compressor.flush)
+
+    return "", None
+
+
+def is_cache_bypassed(headers: dict[str, str]) -> bool:
+    return settings["is_cache_enabled"] is False or headers.get("Cache-Control", "") in ["no-store", "no-cache"]
+
+
+def meta_key(key: str) -> str:
+    # it starts with the key of the entry, so it is deleted with it
+    return f"{key}__meta"
+
+
+def get_modified_key(serializer: str) -> str:
+    return f"capyc.modified.{serializer}"
+
+
+def get_etag(content: bytes, encoding: str = "") -> str:
+    return format_etag(hashlib.blake2b(content, digest_size=16).hexdigest(), encoding)
+
+
+def format_etag(digest: str, encoding: str = "") -> str:
+    # every encoding is another representation of the same content
+    return f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+
+def is_conditional(headers: dict[str, str]) -> bool:
+    return "If-None-Match" in headers or "If-Modified-Since" in headers
+
+
+def is_not_modified(res_headers: dict[str, str], headers: dict[str, str]) -> bool:
+    # If-Modified-Since is ignored when If-None-Match is sent
+    if etags := headers.get("If-None-Match"):
+        return etags.strip() == "*" or res_headers.get("ETag") in [x.strip() for x in etags.split(",")]
+
+    since = parse_http_date_safe(headers.get("If-Modified-Since", ""))
+    last_modified = parse_http_date_safe(res_headers.get("Last-Modified", ""))
+
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def build_not_modified(res_headers: dict[str, str]) -> HttpResponseNotModified:
+    res = HttpResponseNotModified()
+
+    for header in ["ETag", "Last-Modified", "Cache-Control"]:
+        if header in res_headers:
+            res.headers[header] = res_headers[header]
+
+    return res
+
+
 def get_cache(serializer: str, params: Params, query: list[str], headers: dict[str, str]):
-    if settings["is_cache_enabled"] is False or headers.get("Cache-Control", "") in ["no-store", "no-cache"]:
+    if is_cache_bypassed(headers):
         return None
 
     key = key_builder(serializer, params, query, headers)
 
+    # the validators are kept apart to not load the body of a response that the client already has
+    if is_conditional(headers) and (meta := cache.get(meta_key(key))) and is_not_modified(meta, headers):
+        return build_not_modified(meta)
+
     res = cache.get(key)
     if res is None:
         return None
@@ -163,6 +284,59 @@ def get_cache(serializer: str, params: Params, query: list[str], headers: dict[s
     return HttpResponse(res["content"], status=status.HTTP_200_OK, headers=res["headers"])
 
 
+async def aget_cache(serializer: str, params: Params, query: list[str], headers: dict[str, str]):
+    if is_cache_bypassed(headers):
+        return None
+
+    key = key_builder(serializer, params, query, headers)
+
+    if is_conditional(headers) and (meta := await cache.aget(meta_key(key))) and is_not_modified(meta, headers):
+        return build_not_modified(meta)
+
+    res = await cache.aget(key)
+    if res is None:
+        return None
+
+    # implement other content types
+    return HttpResponse(res["content"], status=status.HTTP_200_OK, headers=res["headers"])
+
+
+def build_response(value: Any, headers: dict[str, str], cache_control: str | None = None):
+    return build_validated_response(dumps(value), headers, cache_control)
+
+
+def build_validated_response(content: bytes, headers: dict[str, str], cache_control: str | None = None):
+    res = build_content_response(content, headers, cache_control)
+
+    res["headers"]["ETag"] = get_etag(content, res["headers"].get("Content-Encoding", ""))
+    res["headers"]["Last-Modified"] = http_date(time.time())
+
+    return res
+
+
+def get_entries(key: str, res: dict[str, Any]) -> dict[str, Any]:
+    return {key: res, meta_key(key): res["headers"]}
+
+
+def build_content_response(content: bytes, headers: dict[str, str], cache_control: str | None = None):
+    res = compress_content(content, headers)
+
+    if "Authorization" in headers:
+        res["headers"]["Cache-Control"] = "private"
+
+    elif cache_control:
+        res["headers"]["Cache-Control"] = cache_control
+
+    # elif ttl:
+    #     res["headers"]["Cache-Control"] = f"max-age={ttl}"
+    #     res["headers"]["Expires"] = (timezone.now() + timedelta(seconds=ttl)).isoformat()
+
+    else:
+        res["headers"]["Cache-Control"] = "public"
+
+    return res
+
+
 def set_cache(
     serializer: str,
     value: Any,
@@ -174,32 +348,440 @@ def set_cache(
 ):
     if settings["is_cache_enabled"] is False:
         # implement other content types
-        return HttpResponse(json.dumps(value), status=status.HTTP_200_OK, headers={"Content-Type": "application/json"})
+        return HttpResponse(dumps(value), status=status.HTTP_200_OK, headers={"Content-Type": "application/json"})
 
     key = key_builder(serializer, params, query, headers)
+    res = build_response(value, headers, cache_control)
 
-    res = compress(value, headers)
+    if res["headers"]["Cache-Control"] != "no-store":
+        cache.set_many(get_entries(key, res), ttl)
 
-    if "Authorization" in headers:
-        res["headers"]["Cache-Control"] = "private"
+    # implement other content types
+    return HttpResponse(res["content"], status=status.HTTP_200_OK, headers=res["headers"])
 
-    elif cache_control:
-        res["headers"]["Cache-Control"] = cache_control
 
-    # elif ttl:
-    #     res["headers"]["Cache-Control"] = f"max-age={ttl}"
-    #     res["headers"]["Expires"] = (timezone.now() + timedelta(seconds=ttl)).isoformat()
+async def aset_cache(
+    serializer: str,
+    value: Any,
+    ttl: int | None,
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+):
+    if settings["is_cache_enabled"] is False:
+        # implement other content types
+        return HttpResponse(dumps(value), status=status.HTTP_200_OK, headers={"Content-Type": "application/json"})
 
-    else:
-        res["headers"]["Cache-Control"] = "public"
+    key = key_builder(serializer, params, query, headers)
+    res = build_response(value, headers, cache_control)
+
+    if res["headers"]["Cache-Control"] != "no-store":
+        await cache.aset_many(get_entries(key, res), ttl)
+
+    # implement other content types
+    return HttpResponse(res["content"], status=status.HTTP_200_OK, headers=res["headers"])
+
+
+def many_keys(serializer: str, params: list[Params], query: list[str], headers: dict[str, str]) -> list[str]:
+    # every object has its own entry, they keep the serialized json without compression to be joined
+    return [key_builder(f"{serializer}.many", x, query, headers) for x in params]
+
+
+def is_many_cache_skipped(headers: dict[str, str], cache_control: str | None = None) -> bool:
+    return settings["is_cache_enabled"] is False or ("Authorization" not in headers and cache_control == "no-store")
+
+
+def get_many_cache(
+    serializer: str, params: list[Params], query: list[str], headers: dict[str, str]
+) -> list[Optional[bytes]]:
+    if is_cache_bypassed(headers):
+        return [None] * len(params)
+
+    keys = many_keys(serializer, params, query, headers)
+    res = cache.get_many(keys)
+    return [res.get(x) for x in keys]
+
+
+async def aget_many_cache(
+    serializer: str, params: list[Params], query: list[str], headers: dict[str, str]
+) -> list[Optional[bytes]]:
+    if is_cache_bypassed(headers):
+        return [None] * len(params)
+
+    keys = many_keys(serializer, params, query, headers)
+    res = await cache.aget_many(keys)
+    return [res.get(x) for x in keys]
+
+
+def set_many_cache(
+    serializer: str,
+    values: list[tuple[Params, bytes]],
+    ttl: int | None,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+) -> None:
+    if not values or is_many_cache_skipped(headers, cache_control):
+        return
+
+    keys = many_keys(serializer, [x for x, _ in values], query, headers)
+    cache.set_many(dict(zip(keys, [x for _, x in values])), ttl)
+
+
+async def aset_many_cache(
+    serializer: str,
+    values: list[tuple[Params, bytes]],
+    ttl: int | None,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+) -> None:
+    if not values or is_many_cache_skipped(headers, cache_control):
+        return
+
+    keys = many_keys(serializer, [x for x, _ in values], query, headers)
+    await cache.aset_many(dict(zip(keys, [x for _, x in values])), ttl)
+
+
+def build_many_response(
+    items: list[Optional[bytes]], headers: dict[str, str], cache_control: str | None = None
+) -> HttpResponse:
+    content = b"[" + b",".join(b"null" if x is None else x for x in items) + b"]"
+
+    if settings["is_cache_enabled"] is False:
+        # implement other content types
+        return HttpResponse(content, status=status.HTTP_200_OK, headers={"Content-Type": "application/json"})
+
+    res = build_content_response(content, headers, cache_control)
+
+    # implement other content types
+    return HttpResponse(res["content"], status=status.HTTP_200_OK, headers=res["headers"])
+
+
+def list_key(
+    serializer: str, fields: Iterable[str], params: Params, query: list[str], headers: dict[str, str], kind: str
+) -> str:
+    # the fields that decide the rows of the list are written in the key to find it when one of them changes
+    return key_builder(f"{serializer}.list__|{'|'.join(sorted(fields))}|__{kind}", params, query, headers)
+
+
+def entity_key(serializer: str, pk: Any, query: list[str], headers: dict[str, str]) -> str:
+    # an object only changes with the sets and the fields, not with the filters or the pagination
+    query = sorted(x for x in query if x.startswith(("sets=", "fields=")))
+    return "__".join([f"{serializer}.entity.{pk}", headers.get("Accept-Language", ""), "&".join(query)])
+
+
+def get_list_cache(
+    serializer: str,
+    fields: Iterable[str],
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    kind: str = "filter",
+) -> Optional[dict[str, Any]]:
+    if is_cache_bypassed(headers):
+        return None
+
+    return cache.get(list_key(serializer, fields, params, query, headers, kind))
+
+
+async def aget_list_cache(
+    serializer: str,
+    fields: Iterable[str],
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    kind: str = "filter",
+) -> Optional[dict[str, Any]]:
+    if is_cache_bypassed(headers):
+        return None
+
+    return await cache.aget(list_key(serializer, fields, params, query, headers, kind))
+
+
+def set_list_cache(
+    serializer: str,
+    fields: Iterable[str],
+    value: dict[str, Any],
+    ttl: int | None,
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+    kind: str = "filter",
+) -> None:
+    if is_many_cache_skipped(headers, cache_control):
+        return
+
+    cache.set(list_key(serializer, fields, params, query, headers, kind), value, ttl)
 
+
+async def aset_list_cache(
+    serializer: str,
+    fields: Iterable[str],
+    value: dict[str, Any],
+    ttl: int | None,
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+    kind: str = "filter",
+) -> None:
+    if is_many_cache_skipped(headers, cache_control):
+        return
+
+    await cache.aset(list_key(serializer, fields, params, query, headers, kind), value, ttl)
+
+
+def get_entities_cache(
+    serializer: str, pks: list[Any], query: list[str], headers: dict[str, str]
+) -> list[Optional[bytes]]:
+    if is_cache_bypassed(headers):
+        return [None] * len(pks)
+
+    keys = [entity_key(serializer, x, query, headers) for x in pks]
+    res = cache.get_many(keys)
+    return [res.get(x) for x in keys]
+
+
+async def aget_entities_cache(
+    serializer: str, pks: list[Any], query: list[str], headers: dict[str, str]
+) -> list[Optional[bytes]]:
+    if is_cache_bypassed(headers):
+        return [None] * len(pks)
+
+    keys = [entity_key(serializer, x, query, headers) for x in pks]
+    res = await cache.aget_many(keys)
+    return [res.get(x) for x in keys]
+
+
+def set_entities_cache(
+    serializer: str,
+    values: dict[Any, bytes],
+    ttl: int | None,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+) -> None:
+    if not values or is_many_cache_skipped(headers, cache_control):
+        return
+
+    cache.set_many({entity_key(serializer, x, query, headers): y for x, y in values.items()}, ttl)
+
+
+async def aset_entities_cache(
+    serializer: str,
+    values: dict[Any, bytes],
+    ttl: int | None,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+) -> None:
+    if not values or is_many_cache_skipped(headers, cache_control):
+        return
+
+    await cache.aset_many({entity_key(serializer, x, query, headers): y for x, y in values.items()}, ttl)
+
+
+def build_entity_content(envelope: Optional[dict[str, Any]], items: list[bytes]) -> bytes:
+    if envelope is None:
+        return items[0]
+
+    # results is the last key of the envelope, the objects are joined without decoding them
+    return dumps(envelope)[:-1] + b',"results":[' + b",".join(items) + b"]}"
+
+
+def set_entity_response(
+    serializer: str,
+    envelope: Optional[dict[str, Any]],
+    items: list[bytes],
+    ttl: int | None,
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+) -> HttpResponse:
+    content = build_entity_content(envelope, items)
+
+    if settings["is_cache_enabled"] is False:
+        # implement other content types
+        return HttpResponse(content, status=status.HTTP_200_OK, headers={"Content-Type": "application/json"})
+
+    res = build_validated_response(content, headers, cache_control)
+
+    # only the validators are kept, the body is assembled again from the objects
     if res["headers"]["Cache-Control"] != "no-store":
-        cache.set(key, res, ttl)
+        cache.set(meta_key(key_builder(serializer, params, query, headers)), res["headers"], ttl)
 
     # implement other content types
     return HttpResponse(res["content"], status=status.HTTP_200_OK, headers=res["headers"])
 
 
+async def aset_entity_response(
+    serializer: str,
+    envelope: Optional[dict[str, Any]],
+    items: list[bytes],
+    ttl: int | None,
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+) -> HttpResponse:
+    content = build_entity_content(envelope, items)
+
+    if settings["is_cache_enabled"] is False:
+        # implement other content types
+        return HttpResponse(content, status=status.HTTP_200_OK, headers={"Content-Type": "application/json"})
+
+    res = build_validated_response(content, headers, cache_control)
+
+    if res["headers"]["Cache-Control"] != "no-store":
+        await cache.aset(meta_key(key_builder(serializer, params, query, headers)), res["headers"], ttl)
+
+    # implement other content types
+    return HttpResponse(res["content"], status=status.HTTP_200_OK, headers=res["headers"])
+
+
+def get_stream_headers(
+    headers: dict[str, str], cache_control: str | None
+) -> tuple[dict[str, str], Optional[Compressor]]:
+    res_headers = {"Content-Type": "application/json"}
+    compressor = None
+
+    # the size is unknown until the end, so the compression does not wait for min_compression_size
+    if not (cache_control and "no-store" in cache_control) and "no-store" not in headers.get("Cache-Control", ""):
+        encoding, compressor = stream_compressor(headers.get("Accept-Encoding", ""))
+        if encoding:
+            res_headers["Content-Encoding"] = encoding
+
+    if "Authorization" in headers:
+        res_headers["Cache-Control"] = "private"
+
+    elif cache_control:
+        res_headers["Cache-Control"] = cache_control
+
+    else:
+        res_headers["Cache-Control"] = "public"
+
+    return res_headers, compressor
+
+
+def copy_stream_chunk(content: Optional[list[bytes]], chunk: bytes, size: int) -> Optional[list[bytes]]:
+    # a copy of the response is kept while it fits in the cache
+    if content is None or size / 1024 > settings["max_stream_cache_size"]:
+        return None
+
+    content.append(chunk)
+    return content
+
+
+def get_stream_entries(key: str, content: list[bytes], res_headers: dict[str, str], digest: str) -> dict[str, Any]:
+    # the validators are known once the last chunk was read, the first response is sent without them
+    res = {
+        "content": b"".join(content),
+        "headers": {
+            **res_headers,
+            "ETag": format_etag(digest, res_headers.get("Content-Encoding", "")),
+            "Last-Modified": http_date(time.time()),
+        },
+    }
+
+    return get_entries(key, res)
+
+
+def stream_cache(
+    serializer: str,
+    chunks: Iterable[bytes],
+    ttl: int | None,
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+):
+    if settings["is_cache_enabled"] is False:
+        # implement other content types
+        return StreamingHttpResponse(chunks, status=status.HTTP_200_OK, headers={"Content-Type": "application/json"})
+
+    key = key_builder(serializer, params, query, headers)
+    res_headers, compressor = get_stream_headers(headers, cache_control)
+
+    digest = hashlib.blake2b(digest_size=16)
+
+    def encode() -> Iterator[bytes]:
+        for chunk in chunks:
+            digest.update(chunk)
+            yield chunk if compressor is None else compressor[0](chunk)
+
+        if compressor is not None:
+            yield compressor[1]()
+
+    def stream() -> Iterator[bytes]:
+        content = [] if res_headers["Cache-Control"] != "no-store" else None
+        size = 0
+
+        for chunk in encode():
+            if not chunk:
+                continue
+
+            size += len(chunk)
+            content = copy_stream_chunk(content, chunk, size)
+
+            yield chunk
+
+        if content is not None:
+            cache.set_many(get_stream_entries(key, content, res_headers, digest.hexdigest()), ttl)
+
+    # implement other content types
+    return StreamingHttpResponse(stream(), status=status.HTTP_200_OK, headers=res_headers)
+
+
+def astream_cache(
+    serializer: str,
+    chunks: AsyncIterable[bytes],
+    ttl: int | None,
+    params: Params,
+    query: list[str],
+    headers: dict[str, str],
+    cache_control: str | None = None,
+):
+    if settings["is_cache_enabled"] is False:
+        # implement other content types
+        return StreamingHttpResponse(chunks, status=status.HTTP_200_OK, headers={"Content-Type": "application/json"})
+
+    key = key_builder(serializer, params, query, headers)
+    res_headers, compressor = get_stream_headers(headers, cache_control)
+
+    digest = hashlib.blake2b(digest_size=16)
+
+    async def encode() -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            digest.update(chunk)
+            yield chunk if compressor is None else compressor[0](chunk)
+
+        if compressor is not None:
+            yield compressor[1]()
+
+    async def stream() -> AsyncIterator[bytes]:
+        content = [] if res_headers["Cache-Control"] != "no-store" else None
+        size = 0
+
+        async for chunk in encode():
+            if not chunk:
+                continue
+
+            size += len(chunk)
+            content = copy_stream_chunk(content, chunk, size)
+
+            yield chunk
+
+        if content is not None:
+            await cache.aset_many(get_stream_entries(key, content, res_headers, digest.hexdigest()), ttl)
+
+    # implement other content types
+    return StreamingHttpResponse(stream(), status=status.HTTP_200_OK, headers=res_headers)
+
+
 @lru_cache(maxsize=1000)
 def has_static_handler(key: str) -> bool:
     from .serializer import Serializer
@@ -214,14 +796,48 @@ def has_static_handler(key: str) -> bool:
     return serializer_cls.revalidate is not None
 
 
-async def delete_cache(key: str):
-    from .serializer import SERIALIZER_DEPTHS, SERIALIZER_PARENTS, SERIALIZER_REGISTRY
+def is_stale(key: str, serializer: str, pk: Any, fields: Optional[set[str]]) -> bool:
+    entity = f"{serializer}.entity."
+    if key.startswith(entity):
+        return key.startswith(f"{entity}{pk}__")
+
+    prefix = f"{serializer}.list__"
+    if key.startswith(prefix) and fields is not None:
+        # a list keeps its rows while the fields that filter and sort it do not change
+        used = set(key[len(prefix) :].split("__")[0].split("|"))
+        return "__all__" in used or bool(used & fields)
+
+    # the responses, their validators and the entries of get_many
+    return True
+
+
+def delete_entity(serializer: str, pk: Any, fields: Optional[set[str]]) -> None:
+    keys = [x for x in cache.iter_keys(f"{serializer}*") if is_stale(x, serializer, pk, fields)]
+    if keys:
+        cache.delete_many(keys)
+
+
+async def delete_cache(key: str, pk: Any = None, fields: Optional[set[str]] = None):
+    # with the pk of the object that changed, the serializers of its model keep the entities of the other
+    # objects, and with the fields that changed they also keep the lists that are not filtered or sorted by them
+    from .serializer import SERIALIZER_DEPTHS, SERIALIZER_PARENTS, SERIALIZER_REGISTRY, prepare_serializers
+
+    # the parents of a model are only known once every serializer was prepared
+    prepare_serializers()
 
     async def clean_node(key: str, depth: int = 0):
         depth += 1
 
         if depth <= SERIALIZER_DEPTHS.get(key, 0):
-            cache.delete_pattern(f"{key}*")
+            # the parents embed the object in entities that are not known by its pk
+            if pk is not None and depth == 1:
+                delete_entity(key, pk, fields)
+
+            else:
+                cache.delete_pattern(f"{key}*")
+
+            cache.set(get_modified_key(key), time.time(), None)
+            pin_serializer(key)
             if CELERY_INSTALLED:
                 from .tasks import revalidate_cache
 
@@ -245,5 +861,14 @@ async def delete_cache(key: str):
     await clean_node(key)
 
 
+def get_modified(serializer: str) -> float:
+    # when it was lost, nothing is known about the changes made before now
+    return cache.get_or_set(get_modified_key(serializer), time.time, None)
+
+
+async def aget_modified(serializer: str) -> float:
+    return await cache.aget_or_set(get_modified_key(serializer), time.time, None)
+
+
 async def reset_cache():
     cache.delete_pattern("*")
@@ -0,0 +1,88 @@
+import json
+import os
+from typing import Any, Callable, Literal, TypedDict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+
+    ORJSON_INSTALLED = True
+
+except ImportError:
+    ORJSON_INSTALLED = False
+
+try:
+    import msgspec
+
+    MSGSPEC_INSTALLED = True
+
+except ImportError:
+    MSGSPEC_INSTALLED = False
+
+
+__all__ = ["dumps", "get_encoder", "get_encoders", "settings"]
+
+type Encoder = Callable[[Any], bytes]
+
+CAPYC = getattr(settings, "CAPYC", {})
+if "json" in CAPYC and isinstance(CAPYC["json"], dict):
+    encoder = CAPYC["json"].get("encoder", "auto")
+
+else:
+    encoder = os.getenv("CAPYC_JSON_ENCODER", "auto")
+
+
+class Settings(TypedDict):
+    encoder: Literal["auto", "orjson", "msgspec", "json"]
+
+
+settings: Settings = {
+    "encoder": encoder,
+}
+
+
+# the types that are not native of every encoder are written like django does
+default = DjangoJSONEncoder().default
+
+
+def json_dumps(value: Any) -> bytes:
+    return json.dumps(value, cls=DjangoJSONEncoder).encode("utf-8")
+
+
+def orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+if MSGSPEC_INSTALLED:
+    msgspec_dumps = msgspec.json.Encoder(enc_hook=default).encode
+
+
+def get_encoders() -> dict[str, Encoder]:
+    encoders = {}
+
+    if ORJSON_INSTALLED:
+        encoders["orjson"] = orjson_dumps
+
+    if MSGSPEC_INSTALLED:
+        encoders["msgspec"] = msgspec_dumps
+
+    encoders["json"] = json_dumps
+    return encoders
+
+
+def get_encoder() -> Encoder:
+    name = settings["encoder"]
+
+    if name in ["auto", "orjson"] and ORJSON_INSTALLED:
+        return orjson_dumps
+
+    if name in ["auto", "msgspec"] and MSGSPEC_INSTALLED:
+        return msgspec_dumps
+
+    return json_dumps
+
+
+def dumps(value: Any) -> bytes:
+    return get_encoder()(value)
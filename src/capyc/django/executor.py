@@ -0,0 +1,139 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import QuerySet
+
+__all__ = ["settings", "run_sync", "fetch", "count", "get_metrics", "shutdown_executor"]
+
+CAPYC = getattr(settings, "CAPYC", {})
+if "executor" in CAPYC and isinstance(CAPYC["executor"], dict):
+    executor_size = int(CAPYC["executor"].get("size", 0))
+
+else:
+    executor_size = int(os.getenv("CAPYC_EXECUTOR_SIZE", "0"))
+
+
+class Settings(TypedDict):
+    size: int
+
+
+class Metrics(TypedDict):
+    size: int
+    queued: int
+    running: int
+    completed: int
+    total_wait: float
+    max_wait: float
+    avg_wait: float
+
+
+settings: Settings = {
+    "size": executor_size,
+}
+
+lock = threading.Lock()
+executor: Optional[ThreadPoolExecutor] = None
+metrics = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "total_wait": 0.0,
+    "max_wait": 0.0,
+}
+
+
+def get_executor() -> Optional[ThreadPoolExecutor]:
+    global executor
+
+    if settings["size"] <= 0:
+        return None
+
+    # created on the first use, a pool created before a fork would not have threads in the child
+    with lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=settings["size"], thread_name_prefix="capyc-db")
+
+    return executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    global executor
+
+    with lock:
+        pool, executor = executor, None
+
+        for key in metrics:
+            metrics[key] = 0
+
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+def get_metrics() -> Metrics:
+    with lock:
+        completed = metrics["completed"]
+        started = completed + metrics["running"]
+
+        return {
+            "size": settings["size"],
+            **metrics,
+            "avg_wait": metrics["total_wait"] / started if started else 0.0,
+        }
+
+
+async def run_sync(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    pool = get_executor()
+    if pool is None:
+        return await sync_to_async(fn)(*args, **kwargs)
+
+    submitted = time.monotonic()
+
+    with lock:
+        metrics["queued"] += 1
+
+    def job():
+        wait = time.monotonic() - submitted
+
+        with lock:
+            metrics["queued"] -= 1
+            metrics["running"] += 1
+            metrics["total_wait"] += wait
+            metrics["max_wait"] = max(metrics["max_wait"], wait)
+
+        # every thread of the pool owns its connection, it is recycled like at the end of a request
+        close_old_connections()
+
+        try:
+            return fn(*args, **kwargs)
+
+        finally:
+            close_old_connections()
+
+            with lock:
+                metrics["running"] -= 1
+                metrics["completed"] += 1
+
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(pool, context.run, job)
+
+
+async def fetch(qs: QuerySet) -> list[Any]:
+    if get_executor() is None:
+        return [x async for x in qs]
+
+    return await run_sync(list, qs)
+
+
+async def count(qs: QuerySet) -> int:
+    if get_executor() is None:
+        return await qs.acount()
+
+    return await run_sync(qs.count)
@@ -0,0 +1,159 @@
+import functools
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Callable, Iterable, Iterator, Literal, Optional, TypedDict
+
+from django.conf import settings
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+__all__ = ["settings", "QueryBudgetExceeded", "QueryRecorder", "track_queries"]
+
+logger = logging.getLogger(__name__)
+
+CAPYC = getattr(settings, "CAPYC", {})
+if "queries" in CAPYC and isinstance(CAPYC["queries"], dict):
+    enabled = bool(CAPYC["queries"].get("enabled", False))
+    budget = CAPYC["queries"].get("budget", None)
+    repeated = int(CAPYC["queries"].get("repeated", 5))
+    action = CAPYC["queries"].get("action", "log")
+
+else:
+    enabled = os.getenv("CAPYC_QUERIES", "False") in ["true", "1", "yes", "on", "True", "TRUE"]
+    budget = int(os.getenv("CAPYC_QUERY_BUDGET")) if os.getenv("CAPYC_QUERY_BUDGET") else None
+    repeated = int(os.getenv("CAPYC_QUERY_REPEATED", "5"))
+    action = os.getenv("CAPYC_QUERY_ACTION", "log")
+
+
+class Settings(TypedDict):
+    enabled: bool
+    budget: Optional[int]
+    repeated: int
+    action: Literal["log", "raise"]
+
+
+class Report(TypedDict):
+    count: int
+    duration: float
+    repeated: list[tuple[str, int]]
+
+
+settings: Settings = {
+    "enabled": enabled,
+    "budget": budget,
+    "repeated": repeated,
+    "action": action,
+}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries: list[tuple[str, float]] = []
+        self._stack: Optional[ExitStack] = None
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def __enter__(self) -> "QueryRecorder":
+        self._stack = ExitStack()
+
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._stack.close()
+        self._stack = None
+
+    def report(self, max_repeated: Optional[int] = None) -> Report:
+        if max_repeated is None:
+            max_repeated = settings["repeated"]
+
+        # the sql keeps the placeholders, so the same shape means the same query with other params
+        shapes = Counter(sql for sql, _ in self.queries)
+
+        return {
+            "count": len(self.queries),
+            "duration": sum(x for _, x in self.queries),
+            "repeated": [(sql, count) for sql, count in shapes.most_common() if count > max_repeated],
+        }
+
+
+def get_errors(report: Report, budget: Optional[int]) -> list[str]:
+    errors = []
+
+    if budget is not None and report["count"] > budget:
+        errors.append(f"{report['count']} queries exceed the budget of {budget}")
+
+    for sql, count in report["repeated"]:
+        errors.append(f"{count} queries with the same shape, a N+1 in: {sql}")
+
+    return errors
+
+
+def check_queries(name: str, recorder: QueryRecorder, budget: Optional[int]) -> None:
+    report = recorder.report()
+    logger.debug("%s ran %d queries in %.2fms", name, report["count"], report["duration"] * 1000)
+
+    if errors := get_errors(report, budget):
+        message = f"{name} ran {report['count']} queries in {report['duration'] * 1000:.2f}ms: " + "; ".join(errors)
+
+        if settings["action"] == "raise":
+            raise QueryBudgetExceeded(message)
+
+        logger.warning(message)
+
+
+def record_stream(
+    name: str, recorder: QueryRecorder, budget: Optional[int], chunks: Iterable[bytes]
+) -> Iterator[bytes]:
+    iterator = iter(chunks)
+
+    # only the queries of each chunk are recorded, not the ones the server runs while it sends them
+    while True:
+        with recorder:
+            chunk = next(iterator, None)
+
+        if chunk is None:
+            break
+
+        yield chunk
+
+    check_queries(name, recorder, budget)
+
+
+def track_queries(fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        budget = self.query_budget if self.query_budget is not None else settings["budget"]
+        if budget is None and settings["enabled"] is False:
+            return fn(self, *args, **kwargs)
+
+        with QueryRecorder() as recorder:
+            result = fn(self, *args, **kwargs)
+
+        name = f"{self.get_serializer_path()}.{fn.__name__}"
+
+        # the rows of a streamed response are read while it is sent, the report waits for the last chunk
+        if isinstance(result, StreamingHttpResponse) and not result.is_async:
+            result.streaming_content = record_stream(name, recorder, budget, result.streaming_content)
+            return result
+
+        check_queries(name, recorder, budget)
+        return result
+
+    return wrapper
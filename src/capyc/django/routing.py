@@ -0,0 +1,133 @@
+import math
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Optional, TypedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+__all__ = [
+    "settings",
+    "pin",
+    "is_pinned",
+    "pin_serializer",
+    "get_read_database",
+    "aget_read_database",
+    "ReplicaMiddleware",
+]
+
+CAPYC = getattr(settings, "CAPYC", {})
+if "replicas" in CAPYC and isinstance(CAPYC["replicas"], dict):
+    replicas = list(CAPYC["replicas"].get("aliases", []))
+    primary = CAPYC["replicas"].get("primary", "default")
+    using = CAPYC["replicas"].get("using", "primary")
+    sticky = float(CAPYC["replicas"].get("sticky", 5))
+
+else:
+    replicas = [x for x in os.getenv("CAPYC_REPLICAS", "").split(",") if x]
+    primary = os.getenv("CAPYC_PRIMARY", "default")
+    using = os.getenv("CAPYC_USING", "primary")
+    sticky = float(os.getenv("CAPYC_STICKY_SECONDS", "5"))
+
+
+class Settings(TypedDict):
+    replicas: list[str]
+    primary: str
+    using: str
+    sticky: float
+
+
+settings: Settings = {
+    "replicas": replicas,
+    "primary": primary,
+    "using": using,
+    "sticky": sticky,
+}
+
+COOKIE = "capyc_pinned"
+
+pinned_until: ContextVar[float] = ContextVar("capyc_pinned_until", default=0.0)
+
+
+def pin(seconds: Optional[float] = None) -> None:
+    if seconds is None:
+        seconds = settings["sticky"]
+
+    pinned_until.set(max(pinned_until.get(), time.time() + seconds))
+
+
+def is_pinned() -> bool:
+    return pinned_until.get() > time.time()
+
+
+def get_pin_key(serializer: str) -> str:
+    return f"capyc.pinned.{serializer}"
+
+
+def pin_serializer(serializer: str) -> None:
+    if not settings["replicas"]:
+        return
+
+    # the response cached right after an invalidation must not come from a replica that is behind
+    cache.set(get_pin_key(serializer), 1, math.ceil(settings["sticky"]))
+
+
+def resolve_database(policy: Optional[str]) -> Optional[str]:
+    if policy is None:
+        policy = settings["using"]
+
+    if policy == "primary":
+        return None
+
+    if policy == "replica":
+        return random.choice(settings["replicas"]) if settings["replicas"] else None
+
+    return policy
+
+
+def get_read_database(policy: Optional[str], serializer: str) -> Optional[str]:
+    database = resolve_database(policy)
+    if database is None or database == settings["primary"]:
+        return database
+
+    if is_pinned() or cache.get(get_pin_key(serializer)):
+        return settings["primary"]
+
+    return database
+
+
+async def aget_read_database(policy: Optional[str], serializer: str) -> Optional[str]:
+    database = resolve_database(policy)
+    if database is None or database == settings["primary"]:
+        return database
+
+    if is_pinned() or await cache.aget(get_pin_key(serializer)):
+        return settings["primary"]
+
+    return database
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+    def process_request(self, request: HttpRequest) -> None:
+        try:
+            until = float(request.COOKIES.get(COOKIE, 0))
+
+        except ValueError:
+            until = 0.0
+
+        # a thread or a task serves many requests, the pin of the previous one is discarded
+        pinned_until.set(until)
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        until = pinned_until.get()
+        remaining = until - time.time()
+
+        # the next requests of this client read their own writes too
+        if remaining > 0 and request.COOKIES.get(COOKIE) != str(until):
+            response.set_cookie(COOKIE, str(until), max_age=math.ceil(remaining), httponly=True, samesite="Lax")
+
+        return response
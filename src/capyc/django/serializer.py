@@ -1,18 +1,38 @@
+import asyncio
 import base64
+import copy
 import json
 import math
 import re
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, time, timedelta
 from decimal import Decimal
-from typing import Any, Callable, Collection, Iterable, List, Optional, Type, TypedDict
+from functools import lru_cache
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Type,
+    TypedDict,
+)
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from adrf.requests import AsyncRequest
-from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections, models
 from django.db.models import (
     AutoField,
+    Avg,
     BigAutoField,
     BigIntegerField,
     BinaryField,
@@ -25,6 +45,7 @@ from django.db.models import (
     DecimalField,
     DurationField,
     EmailField,
+    F,
     FileField,
     FilePathField,
     FloatField,
@@ -32,6 +53,10 @@ from django.db.models import (
     ImageField,
     IntegerField,
     IPAddressField,
+    Max,
+    Min,
+    OrderBy,
+    OuterRef,
     PositiveBigIntegerField,
     PositiveIntegerField,
     PositiveSmallIntegerField,
@@ -40,12 +65,16 @@ from django.db.models import (
     SlugField,
     SmallAutoField,
     SmallIntegerField,
+    Subquery,
+    Sum,
     TextField,
     TimeField,
     URLField,
     UUIDField,
+    Window,
 )
 from django.db.models import fields as django_fields
+from django.db.models.functions import Coalesce, RowNumber
 from django.db.models.fields.related_descriptors import (
     ForeignKeyDeferredAttribute,
     ForwardManyToOneDescriptor,
@@ -56,8 +85,41 @@ from django.db.models.fields.related_descriptors import (
 )
 from django.db.models.query_utils import DeferredAttribute
 from django.http import HttpRequest, HttpResponse
-
-from capyc.django.cache import get_cache, set_cache
+from django.utils.http import http_date, parse_http_date_safe
+
+from capyc.core.shorteners import Aggregate, Annotate
+from capyc.django import executor
+from capyc.django.cache import (
+    Params,
+    aget_cache,
+    aget_entities_cache,
+    aget_list_cache,
+    aget_many_cache,
+    aget_modified,
+    aset_cache,
+    aset_entities_cache,
+    aset_entity_response,
+    aset_list_cache,
+    aset_many_cache,
+    astream_cache,
+    build_many_response,
+    build_not_modified,
+    get_cache,
+    get_entities_cache,
+    get_list_cache,
+    get_many_cache,
+    get_modified,
+    is_cache_bypassed,
+    set_cache,
+    set_entities_cache,
+    set_entity_response,
+    set_list_cache,
+    set_many_cache,
+    stream_cache,
+)
+from capyc.django.encoder import dumps
+from capyc.django.queries import track_queries
+from capyc.django.routing import aget_read_database, get_read_database
 from capyc.django.utils import (
     Choice,
     FieldDescriptor,
@@ -67,7 +129,47 @@ from capyc.django.utils import (
 )
 from capyc.rest_framework.exceptions import ValidationException
 
-__all__ = ["Serializer"]
+__all__ = ["Serializer", "get_plan_metrics", "get_serializers", "prepare_serializers"]
+
+
+def get_serializers(serializer: Optional[Type["Serializer"]] = None) -> list[Type["Serializer"]]:
+    if serializer is None:
+        serializer = Serializer
+
+    result = []
+
+    for subclass in serializer.__subclasses__():
+        result.append(subclass)
+        result += get_serializers(subclass)
+
+    return result
+
+
+def prepare_serializers() -> list[Type["Serializer"]]:
+    with PREPARATION_LOCK:
+        pending = list(PENDING_SERIALIZERS)
+
+        for serializer in pending:
+            serializer._prepare()
+
+    return pending
+
+
+def get_plan_metrics() -> dict[str, dict[str, int]]:
+    caches = {
+        "fields": Serializer._compile_fields,
+        "queries": Serializer._compile_query,
+        "plans": Serializer._compile_plan,
+        "filters": Serializer._compile_filters,
+        "aggregations": Serializer._compile_aggregation,
+    }
+
+    result = {}
+    for name, compiler in caches.items():
+        info = compiler.cache_info()
+        result[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+
+    return result
 
 
 def update_querystring(url, params):
@@ -78,6 +180,25 @@ def update_querystring(url, params):
     return urlunparse(url_parts)
 
 
+def get_default_ordering(model: Type[models.Model]) -> list[OrderBy]:
+    result = []
+
+    for field in model._meta.ordering:
+        if isinstance(field, OrderBy):
+            result.append(field)
+
+        elif not isinstance(field, str):
+            result.append(field.asc())
+
+        elif field.startswith("-"):
+            result.append(F(field[1:]).desc())
+
+        elif field != "?":
+            result.append(F(field).asc())
+
+    return result
+
+
 CAPYC = getattr(settings, "CAPYC", {})
 if "pagination" in CAPYC and isinstance(CAPYC["pagination"], dict):
     pks_limit = CAPYC["pagination"].get("pks", 200)
@@ -90,6 +211,48 @@ else:
     PKS_LIMIT = 200
     PAGE_LIMIT = 20
 
+if "streaming" in CAPYC and isinstance(CAPYC["streaming"], dict):
+    STREAM_CHUNK_SIZE = int(CAPYC["streaming"].get("chunk_size", 500))
+
+else:
+    STREAM_CHUNK_SIZE = 500
+
+if "plans" in CAPYC and isinstance(CAPYC["plans"], dict):
+    PLANS_SIZE = int(CAPYC["plans"].get("size", 1000))
+
+else:
+    PLANS_SIZE = 1000
+
+if "filters" in CAPYC and isinstance(CAPYC["filters"], dict):
+    FILTERS_SIZE = int(CAPYC["filters"].get("size", 1000))
+
+else:
+    FILTERS_SIZE = 1000
+
+if "serializers" in CAPYC and isinstance(CAPYC["serializers"], dict):
+    LAZY_PREPARATION = bool(CAPYC["serializers"].get("lazy", False))
+
+else:
+    LAZY_PREPARATION = False
+
+
+# from the most expensive to the cheapest
+COUNT_POLICIES = ("exact", "estimate", "none")
+
+# query params that are not filters
+RESERVED_PARAMS = ("sets=", "fields=", "sort=", "limit=", "offset=", "cursor=", "count=", "group_by=", "agg=")
+
+AGGREGATES = {
+    "count": Count,
+    "sum": Sum,
+    "avg": Avg,
+    "min": Min,
+    "max": Max,
+}
+
+OPERATION_PATTERN = re.compile(r"^(.+)\[(.+)\]=(.+)$")
+EXCLUDE_OPERATION_PATTERN = re.compile(r"^(.+)\!\[(.+)\]=(.+)$")
+
 
 def pk_serializer(field: Any) -> Any:
     return field.pk if field else None
@@ -260,6 +423,44 @@ SERIALIZER_PARENTS: dict[str, set[str]] = {}
 SERIALIZER_DEPTHS: dict[str, int] = {}
 SERIALIZER_REGISTRY: dict[str, set[str]] = {}
 
+# lazy serializers that were declared but not prepared yet
+PENDING_SERIALIZERS: list[Type["Serializer"]] = []
+PREPARATION_LOCK = threading.RLock()
+
+
+PLAN_VALUE = 0
+PLAN_CONVERT = 1
+PLAN_RELATION = 2
+# primary key of a foreign key that points to another column
+PLAN_TARGET = 3
+
+# field, query param that links the children with the parent, path of the children
+type RelationPlan = tuple[str, Optional[str], Optional[str]]
+
+
+class SerializationPlan:
+    """Flat list of steps to serialize a row, built once per serializer, sets and depth."""
+
+    def __init__(self):
+        self.entries: list[tuple[str | RelationPlan, str, Optional[Callable], int]] = []
+        self.pk_lists: list[str] = []
+        self.expansions: list[tuple[str, str, bool]] = []
+
+        # same steps over the tuples of values_list(*columns), None when a row needs its instance
+        self.columns: Optional[list[str]] = None
+        self.rows: list[tuple[int, str, Optional[Callable] | RelationPlan, int]] = []
+
+
+class QueryPlan:
+    """Annotations, only/select_related lists and children sets of a serializer, built once per query shape."""
+
+    def __init__(self):
+        self.annotations: dict[str, Coalesce] = {}
+        self.only: list[str] = []
+        self.selected: list[str] = []
+        self.children: dict[str, frozenset[str]] = {}
+        self.fields: dict[str, Optional[frozenset[str]]] = {}
+
 
 class ExpandSets(TypedDict):
     sets: set[str]
@@ -273,6 +474,7 @@ class SerializerMetaBuilder:
     path: Optional[str] = None
     model: Optional[models.Model] = None
     lock = False
+    lazy = LAZY_PREPARATION
     fields = {"default": tuple()}
     rewrites = {}
     _children_sets: dict[str, ExpandSets] = {}
@@ -304,7 +506,7 @@ class SerializerMetaBuilder:
         if serializer is None:
             serializer = cls
 
-        if hasattr(serializer, "__class__"):
+        if not isinstance(serializer, type):
             serializer = serializer.__class__
 
         return f"{serializer.__module__}.{serializer.__name__}"
@@ -414,8 +616,31 @@ class SerializerMetaBuilder:
                     path = x.rel.related_model._meta.app_label + "." + x.rel.related_model.__name__
                     related_model = x.rel.related_model
 
+            # the foreign key of a reverse relation points to the parent, the children are its model
+            elif type(x) is ReverseManyToOneDescriptor:
+                path = x.field.model._meta.app_label + "." + x.field.model.__name__
+                related_model = x.field.model
+
             cls.cache.query_params[name] = queryattr
 
+            # table that links the parent with its children, (column of the parent, column of the child)
+            through = None
+            through_fields = None
+            related_query_name = None
+            if type(x) is ManyToManyDescriptor:
+                through = x.rel.through
+                if x.reverse:
+                    through_fields = (x.field.m2m_reverse_field_name(), x.field.m2m_field_name())
+                    related_query_name = x.field.name
+                else:
+                    through_fields = (x.field.m2m_field_name(), x.field.m2m_reverse_field_name())
+                    related_query_name = x.field.related_query_name()
+
+            elif type(x) is ReverseManyToOneDescriptor:
+                through = x.field.model
+                through_fields = (x.field.name, "pk")
+                related_query_name = x.field.name
+
             obj = FieldRelatedDescriptor(
                 path=path,
                 field_name=name,
@@ -431,6 +656,9 @@ class SerializerMetaBuilder:
                 primary_key=primary_key,
                 unique=unique,
                 query_param=queryattr,
+                through=through,
+                through_fields=through_fields,
+                related_query_name=related_query_name,
             )
 
             return obj
@@ -537,6 +765,11 @@ class SerializerMetaBuilder:
         cls._id_list = id_list
         cls._m2m_list = m2m_list
         cls._o2_list = o2_list
+        cls._to_field_list = [
+            x.name
+            for x in cls.model._meta.concrete_fields
+            if x.is_relation and (x.many_to_one or x.one_to_one) and not x.target_field.primary_key
+        ]
 
         for key, fields in cls.fields.items():
             assert isinstance(fields, tuple), f"Set {key} must be a tuple[...str], got {type(fields).__name__}"
@@ -587,6 +820,33 @@ class SerializerMetaBuilder:
 
             assert 0, f"Preselected field '{field}' not found in model '{cls.model.__name__}'"
 
+        if field := getattr(cls, "last_modified_field", None):
+            assert any(
+                x.field_name == field and issubclass(x.type, DateTimeField) for x in cls.cache.field_list
+            ), f"Last modified field '{field}' must be a DateTimeField of model '{cls.model.__name__}'"
+
+        for field in getattr(cls, "group_by", ()):
+            field = cls._rewrites.get(field, field)
+            assert (
+                field in field_list or field + "_id" in id_list
+            ), f"Group by field '{field}' not found in model '{cls.model.__name__}'"
+
+        for aggregation in getattr(cls, "aggregations", ()):
+            name, _, field = aggregation.partition(":")
+            assert name in AGGREGATES, f"Aggregation '{aggregation}' must be one of {', '.join(AGGREGATES)}"
+            assert field or name == "count", f"Aggregation '{aggregation}' requires a field"
+
+            field = cls._rewrites.get(field, field)
+            assert (
+                not field or field in field_list or field + "_id" in id_list
+            ), f"Aggregation field '{field}' not found in model '{cls.model.__name__}'"
+
+            # django rejects an annotation with the name of a field
+            alias = f"{name}_{field}" if field else name
+            assert not any(
+                alias in (x.name, getattr(x, "attname", None)) for x in cls.model._meta.get_fields()
+            ), f"Aggregation '{aggregation}' conflicts with the field '{alias}' of model '{cls.model.__name__}'"
+
         for filter in cls.filters:
             original_filter = filter
             filter = cls._rewrites.get(filter, filter)
@@ -689,6 +949,29 @@ class SerializerMetaBuilder:
     #     #     cls._lookups[name] = field.m2m_field_name()
     #     return cls._lookups
 
+    @classmethod
+    def _prepare(cls):
+        if cls.__dict__.get("_prepared"):
+            return
+
+        with PREPARATION_LOCK:
+            # a serializer that is being prepared by this thread is reached again through a cycle
+            if "_prepared" in cls.__dict__:
+                return
+
+            cls._prepared = False
+            try:
+                cls._prepare_fields()
+
+            except BaseException:
+                del cls._prepared
+                raise
+
+            cls._prepared = True
+
+            if cls in PENDING_SERIALIZERS:
+                PENDING_SERIALIZERS.remove(cls)
+
     @classmethod
     def _prepare_fields(cls):
         if hasattr(cls, "preselected") is False:
@@ -699,325 +982,1266 @@ class SerializerMetaBuilder:
             cls.filters: list[str] = []
 
         cls._filter_map: dict[str, QueryHandler | None] = {}
+        cls._children_sets = {}
+        cls._related_serializers = {}
 
         cls._rewrites = {v: k for k, v in cls.rewrites.items()}
         cls._get_related_fields()
         cls._check_settings()
         cls._get_related_serializers()
         cls._lookups = cls.cache.lookup_rewrites
+        cls._build_filter_index()
+
+    @classmethod
+    def _build_filter_index(cls):
+        # dotted path of every nested serializer, with the lookups that lead to it
+        cls._filter_index: dict[str, tuple[Type["Serializer"], list[str]]] = {}
+        pending = [("", cls, [], {cls})]
+
+        while pending:
+            prefix, serializer, parents, visited = pending.pop()
+
+            for name, child in serializer._related_serializers.items():
+                child._prepare()
+                if child in visited:
+                    continue
+
+                field = serializer._rewrites.get(name, name)
+                forward = serializer._lookups.get(field, field) if field.endswith("_set") else field
+                path = f"{prefix}.{name}" if prefix else name
+
+                cls._filter_index[path] = (child, parents + [forward])
+                pending.append((path, child, parents + [forward], visited | {child}))
 
 
 class Serializer(SerializerMetaBuilder):
     _serializer_instances: dict[str, Type["Serializer"]]
     sort_by: str = "pk"
+    pagination: Literal["offset", "cursor"] = "offset"
+    count_policy: Literal["exact", "estimate", "none"] = "exact"
+    batch: bool = False
+    stream: bool = False
     ttl: int | None = None
     cache_control: str | None = None
     revalidate: Callable[[], None] | None = None
+    query_budget: int | None = None
+    using: str | None = None
+    aggregations: tuple[str, ...] = ()
+    group_by: tuple[str, ...] = ()
+    last_modified_field: str | None = None
+    entity_cache: bool = False
+    _db: str | None = None
+
+    def _get_query_plan(self, cursor_field: Optional[str] = None) -> QueryPlan:
+        return self._compile_query(
+            frozenset(self._parsed_fields),
+            frozenset(self._serializer_instances),
+            frozenset(self._expand_sets),
+            self.depth,
+            cursor_field,
+            self._sparse_fields,
+        )
 
-    def _prefetch(self, qs: QuerySet):
-        annotated = {}
-        only = set()
-        selected = set()
-        for parsed_field in self._parsed_fields:
-            if parsed_field in self._m2m_list or parsed_field in self._o2_list:
-                field = self._rewrites.get(parsed_field, parsed_field)
-                x = self.rel[field]
-                field_name = x.field_name.replace("_set", "")
-                annotated[f"__count_{x.field_name}"] = Count(field_name)
-
-            if parsed_field not in self._o2_list and parsed_field not in self._m2m_list:
-                only.add(parsed_field)
-
-        if annotated:
-            qs = qs.annotate(**annotated)
-
+    def _init_children(self, plan: QueryPlan) -> None:
         for key, serializer in self._serializer_instances.items():
-            children_sets = self._children_sets.get(key)
-
-            if any(x in children_sets["parents"] for x in self._expand_sets):
-                serializer.init(sets=children_sets["sets"] | children_sets["forward"], depth=self.depth - 1)
+            serializer.init(sets=plan.children[key], depth=self.depth - 1, fields=plan.fields[key])
 
-            else:
-                serializer.init(sets=set(), depth=self.depth - 1)
+            if self.batch:
+                serializer.batch = True
 
+            # the objects joined by select_related are serialized without a query of their own
             if key in self._o2_list:
-                child_fields, child_expands, child_cache = serializer.manage()
-                only |= set([f"{key}__{x}" for x in child_fields])
+                serializer.manage()
+                serializer._init_children(serializer._get_query_plan())
 
-                if child_fields:
-                    selected.add(key)
+    def _prefetch(self, qs: QuerySet):
+        cursor_field = None
+        if self.pagination == "cursor":
+            field, _ = self._get_cursor_field()
+            cursor_field = field.name
 
-        for field in self.preselected:
-            only.add(field)
+        plan = self._get_query_plan(cursor_field)
 
-        # this doesn't work, the only must include
-        qs = qs.select_related(*selected).only(*only)
-        return qs
+        if plan.annotations:
+            qs = qs.annotate(**plan.annotations)
 
-    def _serialize(self, instance: models.Model) -> dict:
-        data = {}
+        self._init_children(plan)
 
-        for field in self._parsed_fields:
-            key = self.rewrites.get(field, field)
-            data[key] = getattr(instance, field, None)
+        # select_related without arguments joins every foreign key that is not nullable
+        if plan.selected:
+            qs = qs.select_related(*plan.selected)
 
-            if field in self._field_list:
-                serializer = self._serializers.get(field, None)
-                if serializer:
-                    data[key] = serializer(data[field])
+        return qs.only(*plan.only)
 
-            elif field + "_id" in self._id_list:
-                forward = field in self._children_sets
+    @classmethod
+    @lru_cache(maxsize=PLANS_SIZE)
+    def _compile_fields(cls, sets: frozenset[str], depth: int) -> tuple[frozenset[str], frozenset[str]]:
+        parsed_fields = set()
+        expands = set()
 
-                if forward and field in self._expands and hasattr(self, field):
-                    ser = self._serializer_instances[field]
-                    qs = data[field]
+        for key in sets:
+            key = cls.rewrites.get(key, key)
+            if key in cls.fields:
+                for field in cls.fields[key]:
+                    if "[" in field and depth >= 0:
+                        field = field.split("[")[0]
+                        expands.add(field)
 
-                    data[key] = ser._instance(qs)
-                else:
-                    data[key] = pk_serializer(data[field])
+                    if "." in field:
+                        continue
 
-            elif field in self._m2m_list:
-                parsed = self.rewrites.get(field, field)
+                    parsed_fields.add(cls._rewrites.get(field, field))
 
-                if parsed in self._children_sets and parsed in self._expands and hasattr(self, parsed):
-                    ser = self._serializer_instances[parsed]
+        return frozenset(parsed_fields), frozenset(expands)
 
-                    qs = data[parsed]
-                    count = getattr(instance, f"__count_{field}", None)
-                    query_param = self.cache.query_params.get(field)
-                    data[key] = ser._instances(
-                        qs.all(),
-                        count,
-                        extra={query_param + ".pk": getattr(instance, "pk", None)},
-                    )
+    @classmethod
+    @lru_cache(maxsize=PLANS_SIZE)
+    def _compile_sparse_fields(cls, fields: frozenset[str], depth: int) -> tuple[frozenset[str], frozenset[str]]:
+        declared = set()
+        expandables = set()
 
-                else:
-                    path = None
-                    ser = self._serializer_instances.get(parsed)
+        for field in [x for value in cls.fields.values() for x in value]:
+            if "[" in field:
+                expandables.add(field.split("[")[0])
 
-                    if ser is None and hasattr(self, parsed):
-                        ser = getattr(self, parsed)
+            elif "." not in field:
+                declared.add(field)
 
-                    if ser:
-                        path = ser.path
+        parsed_fields = set()
+        expands = set()
+        children: dict[str, set[str]] = {}
 
-                    m2m = getattr(instance, field)
-                    count = getattr(instance, f"__count_{field}", None)
-                    query_param = self.cache.query_params.get(field)
+        for path in fields:
+            field, _, rest = path.partition(".")
 
-                    data[key] = self._wraps_pagination(
-                        m2m.all().only("pk"),
-                        count,
-                        pks=True,
-                        path=path,
-                        extra={query_param + ".pk": getattr(instance, "pk", None)},
-                    )
+            # every level of the path is an expansion, like the sets it cannot go past the depth
+            if rest and depth <= 1:
+                raise ValidationException(
+                    f"Invalid value for `fields`, {path} is deeper than the depth {depth} of {cls.model.__name__}"
+                )
 
-        return data
+            if rest and field in expandables:
+                children.setdefault(field, set()).add(rest)
 
-    def _set_fields(self) -> list[str]:
-        self._expands = set()
-        sets = set(["default"])
+            elif not rest and field in declared:
+                pass
 
-        if self._parent_sets is not None:
-            sets = self._parent_sets | sets
+            elif not rest and field in expandables:
+                expands.add(field)
 
-        elif self.request is not None:
-            sets_param = self.request.GET.get("sets")
-            if sets_param:
-                for set_name in sets_param.split(","):
-                    if set_name:
-                        sets.add(set_name)
+            else:
+                raise ValidationException(
+                    f"Invalid value for `fields`, {path} is not a field of {cls.model.__name__}, "
+                    f"expected any of {', '.join(sorted(declared | expandables))}"
+                )
 
-        for key in sets:
-            key = self.rewrites.get(key, key)
-            if key in self.fields:
-                fields = []
-                for field in self.fields[key]:
-                    if "[" in field and self.depth >= 0:
-                        field = field.split("[")[0]
-                        self._expands.add(field)
+            parsed_fields.add(cls._rewrites.get(field, field))
 
-                    if "." in field:
-                        continue
+        for field, paths in children.items():
+            expands.add(field)
 
-                    field = self._rewrites.get(field, field)
-                    fields.append(field)
+            # the nested paths are validated before any query is sent
+            if serializer := cls._related_serializers.get(field):
+                serializer._prepare()
+                serializer._compile_sparse_fields(frozenset(paths), depth - 1)
 
-                for field in fields:
-                    self._parsed_fields.add(field)
+        return frozenset(parsed_fields), frozenset(expands)
 
-        for expand in self._expands:
-            serializer = self._related_serializers.get(expand)
-            if serializer is None:
-                continue
+    @classmethod
+    def _get_children_fields(cls, fields: Optional[frozenset[str]], key: str) -> Optional[frozenset[str]]:
+        if fields is None:
+            return None
 
-            instance = serializer()
-            self._serializer_instances[expand] = instance
+        paths = [x.split(".", 1)[1] for x in fields if x.startswith(f"{key}.")]
+        return frozenset(paths) if paths else None
 
-    def manage(self):
-        self._set_fields()
-        self.lock = True
-        return self._parsed_fields, self._expands, self.cache
+    @classmethod
+    @lru_cache(maxsize=PLANS_SIZE)
+    def _compile_query(
+        cls,
+        parsed_fields: frozenset[str],
+        children: frozenset[str],
+        expand_sets: frozenset[str],
+        depth: int,
+        cursor_field: Optional[str],
+        fields: Optional[frozenset[str]] = None,
+    ) -> QueryPlan:
+        plan = QueryPlan()
+        only = set()
+        selected = set()
 
-    def _wraps_pagination(
-        self,
-        qs: QuerySet,
-        count: Optional[int] = None,
-        pks: bool = False,
-        path: Optional[str] = "-",
-        extra: Optional[dict[str, Any]] = None,
-    ):
-        if count is None:
-            count = qs.count()
+        for parsed_field in parsed_fields:
+            if parsed_field in cls._m2m_list:
+                field = cls._rewrites.get(parsed_field, parsed_field)
+                x = cls.rel[field]
+                parent, _ = x.through_fields
+
+                # a correlated subquery per relation, a JOIN would multiply the rows of each relation
+                counts = (
+                    x.through._default_manager.filter(**{parent: OuterRef("pk")})
+                    .order_by()
+                    .values(parent)
+                    .annotate(count=Count("*"))
+                    .values("count")
+                )
+                plan.annotations[f"__count_{x.field_name}"] = Coalesce(Subquery(counts, output_field=IntegerField()), 0)
 
-        if path == "-":
-            path = self.path
+            else:
+                only.add(parsed_field)
 
-        if extra is None:
-            extra = {}
+            # the column of the foreign key is not the primary key of the object, it is joined
+            if parsed_field in cls._to_field_list:
+                only.add(f"{parsed_field}__{cls.model._meta.get_field(parsed_field).related_model._meta.pk.name}")
+                selected.add(parsed_field)
 
-        base = {
-            "count": count,
-        }
+        for key in children:
+            children_sets = cls._children_sets.get(key)
 
-        if pks:
-            base["results"] = [pk_serializer(x) for x in qs[:PKS_LIMIT]]
-        else:
-            base["results"] = [self._serialize(x) for x in qs[:PKS_LIMIT]]
+            if any(x in children_sets["parents"] for x in expand_sets):
+                plan.children[key] = frozenset(children_sets["sets"] | children_sets["forward"])
 
-        if not path:
-            return base
+            else:
+                plan.children[key] = frozenset()
 
-        offset = (math.ceil(count / PAGE_LIMIT) * PAGE_LIMIT) - PAGE_LIMIT
-        obj = {
-            **base,
-            "next": None,
-            "previous": None,
-            "first": update_querystring(
-                path,
-                {
-                    "limit": PAGE_LIMIT,
-                    "offset": 0,
-                    **extra,
-                },
-            ),
-            "last": update_querystring(
-                path,
-                {
-                    "limit": PAGE_LIMIT,
-                    "offset": offset if offset >= 0 else 0,
-                    **extra,
-                },
-            ),
-        }
-        if count > PAGE_LIMIT:
-            obj["next"] = update_querystring(
-                path,
-                {
-                    "limit": PAGE_LIMIT,
-                    "offset": PAGE_LIMIT,
-                    **extra,
-                },
-            )
+            plan.fields[key] = cls._get_children_fields(fields, key)
 
-        obj["results"] = obj.pop("results")
+            if key in cls._o2_list:
+                serializer = cls._related_serializers[key]()
+                serializer.init(sets=plan.children[key], depth=depth - 1, fields=plan.fields[key])
+                serializer.manage()
+                child = serializer._get_query_plan()
 
-        return obj
+                # the whole expansion tree is joined, its foreign keys are needed to follow the joins
+                if f"{key}_id" in cls._id_list:
+                    only.add(key)
 
-    @classmethod
-    def _get_query_value(
-        cls, handler: QueryHandler, error_handler: Optional[QueryHandler], parents: list[str], key: str, value: str
-    ):
-        def get_key():
-            if parents:
-                return ".".join(parents) + "." + key
+                # a child that only has lists still reads its primary key from the join, not a query per row
+                pk = cls.model._meta.get_field(key).related_model._meta.pk.name
+                only |= set([f"{key}__{x}" for x in [pk, *child.only]])
+                selected.add(key)
+                selected |= set([f"{key}__{x}" for x in child.selected])
 
-            return key
+        for field in cls.preselected:
+            only.add(field)
 
-        if error_handler:
-            try:
-                return handler(value)
-            except Exception:
-                raise ValidationException(f"Invalid value for field {get_key()}")
+        if cursor_field:
+            only.add(cursor_field)
 
-        return handler(value)
+        plan.only = sorted(only)
+        plan.selected = sorted(selected)
+        return plan
 
     @classmethod
-    def _validate_filter(cls, x: str, parents: Optional[list[str]] = None) -> FilterOperation | None:
-        if parents is None:
-            parents = []
+    @lru_cache(maxsize=PLANS_SIZE)
+    def _compile_plan(
+        cls, parsed_fields: frozenset[str], expands: frozenset[str], depth: int, batch: bool, asynchronous: bool
+    ) -> SerializationPlan:
+        plan = SerializationPlan()
+
+        for field in sorted(parsed_fields):
+            key = cls.rewrites.get(field, field)
+            parsed = cls.rewrites.get(field, field)
+
+            if field in cls._field_list:
+                if serializer := cls._serializers.get(field):
+                    plan.entries.append((field, key, serializer, PLAN_CONVERT))
+                else:
+                    plan.entries.append((field, key, None, PLAN_VALUE))
 
-        pattern = re.compile(r"^(\w+)\[(.*)\]$")
+            elif field + "_id" in cls._id_list:
+                if field in cls._children_sets and field in expands and hasattr(cls, field):
+                    plan.expansions.append((field, field, False))
+                    # the async path always loads the expanded objects of the page beforehand
+                    handler = cls._serialize_batched_forward if batch or asynchronous else cls._serialize_forward
+                    plan.entries.append(((field, None, None), key, handler, PLAN_RELATION))
 
-        if "=" in x:
-            if "![" in x.split("=")[0] and "]=" in x:
-                pattern = re.compile(r"^(.+)\!\[(.+)\]=(.+)$")
-                match = pattern.search(x)
-                if not match:
-                    raise ValidationException(
-                        f"Invalid filter {x}, format should be `field[operation]=value` or `field![operation]=value`"
-                    )
+                elif field in cls._to_field_list:
+                    plan.entries.append((field, key, None, PLAN_TARGET))
 
-                key, operation, value = match.groups()
+                else:
+                    plan.entries.append((field + "_id", key, None, PLAN_VALUE))
 
-                handler, error_handler, supported_operations = cls._filter_map[key]
+            elif field in cls._m2m_list:
+                relation = (field, cls.cache.query_params.get(field) + ".pk", None)
 
-                operations = operation.split(",")
-                for operation in operations:
-                    if operation not in supported_operations:
-                        raise ValidationException(f"Operation `{operation}` not supported for field {key}")
+                if parsed in cls._children_sets and parsed in expands and hasattr(cls, parsed):
+                    plan.expansions.append((field, parsed, True))
+                    if batch:
+                        handler = cls._serialize_batched_list
+                    elif asynchronous:
+                        handler = cls._serialize_awaited_list
+                    else:
+                        handler = cls._serialize_list
 
-                key = cls._rewrites.get(key, key)
+                    plan.entries.append((relation, key, handler, PLAN_RELATION))
 
-                return None, {
-                    "field": key,
-                    "operation": operation.replace(",", "__"),
-                    "value": value,
-                    "parents": parents,
-                }
+                else:
+                    plan.pk_lists.append(field)
+                    path = getattr(getattr(cls, parsed, None), "path", None)
+                    relation = (field, relation[1], path)
+                    plan.entries.append((relation, key, cls._serialize_pks, PLAN_RELATION))
 
-            elif "[" in x.split("=")[0] and "]=" in x:
-                pattern = re.compile(r"^(.+)\[(.+)\]=(.+)$")
-                match = pattern.search(x)
-                if not match:
-                    raise ValidationException(
-                        f"Invalid filter {x}, format should be `field[operation]=value` or `field![operation]=value`"
-                    )
-                key, operation, value = match.groups()
+            else:
+                plan.entries.append((field, key, None, PLAN_VALUE))
 
-                handler, error_handler, supported_operations = cls._filter_map[key]
+        if not plan.expansions:
+            cls._compile_rows(plan)
 
-                operations = operation.split(",")
-                for operation in operations:
-                    if operation not in supported_operations:
-                        raise ValidationException(f"Operation `{operation}` not supported for field {key}")
+        return plan
 
-                key = cls._rewrites.get(key, key)
+    @classmethod
+    def _compile_rows(cls, plan: SerializationPlan) -> None:
+        columns = ["pk"]
+        rows = []
 
-                return {
-                    "field": key,
-                    "operation": operation.replace(",", "__"),
-                    "value": value,
-                    "parents": parents,
-                }, None
+        for attr, key, handler, kind in plan.entries:
+            if kind == PLAN_RELATION:
+                columns.append(f"__count_{attr[0]}")
+                rows.append((len(columns) - 1, key, attr, kind))
 
-            elif "!<=" in x:
-                field, value = x.split("!<=")
-                handler, error_handler, supported_operations = cls._filter_map[field]
+            elif kind == PLAN_TARGET:
+                columns.append(f"{attr}__pk")
+                rows.append((len(columns) - 1, key, None, PLAN_VALUE))
 
-                operation = "lte"
-                if operation not in supported_operations:
-                    raise ValidationException(f"Operation `!<=` not supported for field {field}")
+            elif attr in cls._field_list or attr in cls._id_list:
+                columns.append(attr)
+                rows.append((len(columns) - 1, key, handler, kind))
 
-                value = cls._get_query_value(handler, error_handler, parents, field, value)
-                field = cls._rewrites.get(field, field)
+            # properties and other attributes only exist in the instance
+            else:
+                return
 
-                return None, {"field": field, "operation": operation, "value": value, "parents": parents}
+        plan.columns = columns
+        plan.rows = rows
 
-            elif "!>=" in x:
-                field, value = x.split("!>=")
+    def _serialize(self, instance: models.Model) -> dict:
+        data = {}
+
+        for attr, key, handler, kind in self._plan.entries:
+            if kind == PLAN_VALUE:
+                data[key] = getattr(instance, attr, None)
+
+            elif kind == PLAN_CONVERT:
+                value = getattr(instance, attr, None)
+                data[key] = None if value is None else handler(value)
+
+            elif kind == PLAN_TARGET:
+                value = getattr(instance, attr)
+                data[key] = None if value is None else value.pk
+
+            else:
+                data[key] = handler(self, instance, attr)
+
+        return data
+
+    def _serialize_values(self, row: tuple) -> dict:
+        data = {}
+
+        for index, key, handler, kind in self._plan.rows:
+            if kind == PLAN_VALUE:
+                data[key] = row[index]
+
+            elif kind == PLAN_CONVERT:
+                value = row[index]
+                data[key] = None if value is None else handler(value)
+
+            else:
+                data[key] = self._pk_list_page(handler, row[0], row[index])
+
+        return data
+
+    def _serialize_forward(self, instance: models.Model, relation: RelationPlan) -> dict | None:
+        field, _, _ = relation
+        child = getattr(instance, field)
+        if child is None:
+            return None
+
+        return self._serializer_instances[field]._instance(child)
+
+    def _serialize_batched_forward(self, instance: models.Model, relation: RelationPlan) -> dict | None:
+        field, _, _ = relation
+        return self._expanded[field].get(getattr(instance, field + "_id"))
+
+    def _get_target_attname(self, field: str) -> str:
+        # the column that a foreign key stores, the primary key unless it declares a to_field
+        return self.model._meta.get_field(field).target_field.attname
+
+    def _serialize_list(self, instance: models.Model, relation: RelationPlan) -> dict:
+        field, extra, _ = relation
+        ser = self._serializer_instances[self.rewrites.get(field, field)]
+
+        return ser._instances(
+            getattr(instance, field).all(),
+            getattr(instance, f"__count_{field}", None),
+            extra={extra: instance.pk},
+        )
+
+    def _serialize_batched_list(self, instance: models.Model, relation: RelationPlan) -> dict:
+        field, extra, _ = relation
+        ser = self._serializer_instances[self.rewrites.get(field, field)]
+        results, cursors = self._expanded[field]
+
+        results = results.get(instance.pk, [])
+        count = getattr(instance, f"__count_{field}", None)
+        count = count if count is not None else len(results)
+
+        return ser._paginate(
+            results,
+            count,
+            extra={extra: instance.pk},
+            cursor=cursors.get(instance.pk) if count > len(results) else None,
+        )
+
+    def _serialize_awaited_list(self, instance: models.Model, relation: RelationPlan) -> dict:
+        field, _, _ = relation
+        return self._expanded[field][instance.pk]
+
+    def _serialize_pks(self, instance: models.Model, relation: RelationPlan) -> dict:
+        return self._pk_list_page(relation, instance.pk, getattr(instance, f"__count_{relation[0]}", None))
+
+    def _pk_list_page(self, relation: RelationPlan, pk: Any, count: Optional[int]) -> dict:
+        field, extra, path = relation
+        pks = self._pk_lists[field].get(pk, [])
+
+        return self._wraps_pagination(
+            pks,
+            count if count is not None else len(pks),
+            pks=True,
+            path=path,
+            extra={extra: pk},
+        )
+
+    def _pk_list_queryset(self, field: str, parent_pks: list[Any]) -> QuerySet:
+        descriptor = self.rel[field]
+        lookup = descriptor.related_query_name
+        model = descriptor.related_model
+
+        # the order of the related manager, the primary key breaks the ties
+        order_by = [*get_default_ordering(model), F("pk").asc()]
+
+        return (
+            model._default_manager.using(self._db)
+            .filter(**{f"{lookup}__in": parent_pks})
+            .annotate(
+                _parent=F(lookup),
+                _row_number=Window(RowNumber(), partition_by=F(lookup), order_by=order_by),
+            )
+            .filter(_row_number__lte=PKS_LIMIT)
+            .order_by("_parent", "_row_number")
+            .values_list("_parent", "pk")
+        )
+
+    def _load_pk_lists(self, parent_pks: list[Any]) -> None:
+        self._pk_lists = {field: {} for field in self._plan.pk_lists}
+
+        if not self._pk_lists or not parent_pks:
+            return
+
+        for field, pk_lists in self._pk_lists.items():
+            for parent_pk, child_pk in self._pk_list_queryset(field, parent_pks):
+                pk_lists.setdefault(parent_pk, []).append(child_pk)
+
+    async def _aload_pk_lists(self, parent_pks: list[Any]) -> None:
+        self._pk_lists = {field: {} for field in self._plan.pk_lists}
+
+        if not self._pk_lists or not parent_pks:
+            return
+
+        async def load(field: str, pk_lists: dict[Any, list[Any]]) -> None:
+            for parent_pk, child_pk in await executor.fetch(self._pk_list_queryset(field, parent_pks)):
+                pk_lists.setdefault(parent_pk, []).append(child_pk)
+
+        await asyncio.gather(*[load(field, pk_lists) for field, pk_lists in self._pk_lists.items()])
+
+    def _children_queryset(self, field: str, ser: "Serializer", instances: list[models.Model]) -> QuerySet:
+        lookup = self.rel[field].related_query_name
+        descending = ser.sort_by.startswith("-")
+        sort_by = ser.sort_by.lstrip("-")
+
+        if descending:
+            order_by = [F(sort_by).desc(), F("pk").desc()]
+        else:
+            order_by = [F(sort_by).asc(), F("pk").asc()]
+
+        ser._set_fields()
+
+        qs = ser.model._default_manager.using(self._db).filter(**{f"{lookup}__in": [x.pk for x in instances]})
+        qs = ser._prefetch(qs)
+        return (
+            qs.annotate(
+                _parent=F(lookup),
+                _row_number=Window(RowNumber(), partition_by=F(lookup), order_by=order_by),
+            )
+            .filter(_row_number__lte=PAGE_LIMIT)
+            .order_by("_parent", "_row_number")
+        )
+
+    def _load_children(
+        self, field: str, ser: "Serializer", instances: list[models.Model]
+    ) -> tuple[dict[Any, list[dict]], dict[Any, str]]:
+        children: dict[Any, models.Model] = {}
+        relations: dict[Any, list[Any]] = {}
+        for child in self._children_queryset(field, ser, instances):
+            children.setdefault(child.pk, child)
+            relations.setdefault(child._parent, []).append(child.pk)
+
+        serialized = dict(zip(children.keys(), ser._serialize_page(children.values())))
+        return self._group_children(ser, children, relations, serialized)
+
+    async def _aload_children(
+        self, field: str, ser: "Serializer", instances: list[models.Model]
+    ) -> tuple[dict[Any, list[dict]], dict[Any, str]]:
+        children: dict[Any, models.Model] = {}
+        relations: dict[Any, list[Any]] = {}
+        for child in await executor.fetch(self._children_queryset(field, ser, instances)):
+            children.setdefault(child.pk, child)
+            relations.setdefault(child._parent, []).append(child.pk)
+
+        serialized = dict(zip(children.keys(), await ser._aserialize_page(children.values())))
+        return self._group_children(ser, children, relations, serialized)
+
+    def _group_children(
+        self,
+        ser: "Serializer",
+        children: dict[Any, models.Model],
+        relations: dict[Any, list[Any]],
+        serialized: dict[Any, dict],
+    ) -> tuple[dict[Any, list[dict]], dict[Any, str]]:
+        results = {}
+        cursors = {}
+        for parent, pks in relations.items():
+            results[parent] = [serialized[pk] for pk in pks]
+
+            if ser.pagination == "cursor":
+                cursors[parent] = ser._encode_cursor(children[pks[-1]])
+
+        return results, cursors
+
+    def _load_expansions(self, instances: list[models.Model]) -> None:
+        self._expanded = {}
+
+        if not self.batch or not instances:
+            return
+
+        for field, parsed, many in self._plan.expansions:
+            ser = self._serializer_instances[parsed]
+
+            if many:
+                self._expanded[field] = self._load_children(field, ser, instances)
+                continue
+
+            attname = self._get_target_attname(field)
+            children = {}
+            for instance in instances:
+                child = getattr(instance, field)
+                if child is not None:
+                    children.setdefault(getattr(child, attname), child)
+
+            self._expanded[field] = dict(zip(children.keys(), ser._serialize_page(children.values())))
+
+    async def _aload_forward(self, field: str, ser: "Serializer", instances: list[models.Model]) -> dict[Any, dict]:
+        descriptor = self.model._meta.get_field(field)
+        attname = self._get_target_attname(field)
+        children = {}
+        missing = set()
+
+        for instance in instances:
+            # the objects not joined by select_related cannot be loaded lazily in an async context
+            if descriptor.is_cached(instance):
+                child = getattr(instance, field)
+                if child is not None:
+                    children.setdefault(getattr(child, attname), child)
+
+            elif (value := getattr(instance, field + "_id")) is not None:
+                missing.add(value)
+
+        missing -= children.keys()
+        if missing:
+            qs = ser.model._default_manager.using(self._db).filter(**{f"{attname}__in": missing})
+            for child in await executor.fetch(qs):
+                children[getattr(child, attname)] = child
+
+        return dict(zip(children.keys(), await ser._aserialize_page(children.values())))
+
+    async def _aload_lists(self, field: str, ser: "Serializer", instances: list[models.Model]) -> dict[Any, dict]:
+        extra = self.cache.query_params.get(field) + ".pk"
+
+        # every list is fetched by its own copy of the serializer, they are awaited together
+        results = await asyncio.gather(
+            *[
+                ser._fork()._ainstances(
+                    getattr(instance, field).all(),
+                    getattr(instance, f"__count_{field}", None),
+                    extra={extra: instance.pk},
+                )
+                for instance in instances
+            ]
+        )
+
+        return dict(zip([x.pk for x in instances], results))
+
+    async def _aload_expansions(self, instances: list[models.Model]) -> None:
+        self._expanded = {}
+
+        if not instances:
+            return
+
+        async def load(field: str, parsed: str, many: bool) -> None:
+            ser = self._serializer_instances[parsed]
+
+            if many and self.batch:
+                self._expanded[field] = await self._aload_children(field, ser, instances)
+
+            elif many:
+                self._expanded[field] = await self._aload_lists(field, ser, instances)
+
+            else:
+                self._expanded[field] = await self._aload_forward(field, ser, instances)
+
+        await asyncio.gather(*[load(*x) for x in self._plan.expansions])
+
+    def _get_plan(self, asynchronous: bool = False) -> SerializationPlan:
+        self._plan = self._compile_plan(
+            frozenset(self._parsed_fields), frozenset(self._expands), self.depth, self.batch, asynchronous
+        )
+        return self._plan
+
+    def _serialize_rows(self, rows: list[models.Model] | list[tuple], values: bool = False) -> list[dict]:
+        if values:
+            self._load_pk_lists([x[0] for x in rows])
+            return [self._serialize_values(x) for x in rows]
+
+        self._load_pk_lists([x.pk for x in rows])
+        self._load_expansions(rows)
+        return [self._serialize(x) for x in rows]
+
+    def _serialize_page(self, instances: Iterable[models.Model] | QuerySet) -> list[dict]:
+        # nothing to expand, skip building the model instances
+        values = self._get_plan().columns is not None and isinstance(instances, QuerySet)
+        if values:
+            instances = instances.values_list(*self._plan.columns)
+
+        return self._serialize_rows(list(instances), values)
+
+    async def _aserialize_rows(self, rows: list[models.Model] | list[tuple], values: bool = False) -> list[dict]:
+        if values:
+            await self._aload_pk_lists([x[0] for x in rows])
+            return [self._serialize_values(x) for x in rows]
+
+        await asyncio.gather(self._aload_pk_lists([x.pk for x in rows]), self._aload_expansions(rows))
+        return [self._serialize(x) for x in rows]
+
+    async def _aserialize_page(self, instances: Iterable[models.Model] | QuerySet) -> list[dict]:
+        # nothing to expand, skip building the model instances
+        if self._get_plan(asynchronous=True).columns is not None and isinstance(instances, QuerySet):
+            rows = await executor.fetch(instances.values_list(*self._plan.columns))
+            return await self._aserialize_rows(rows, values=True)
+
+        if isinstance(instances, QuerySet):
+            rows = await executor.fetch(instances)
+        else:
+            rows = list(instances)
+
+        return await self._aserialize_rows(rows)
+
+    def _serialize_by_pk(self, qs: QuerySet) -> dict[Any, dict]:
+        values = self._get_plan().columns is not None
+        rows = list(qs.values_list(*self._plan.columns) if values else qs)
+        results = self._serialize_rows(rows, values)
+        return {(x[0] if values else x.pk): y for x, y in zip(rows, results)}
+
+    async def _aserialize_by_pk(self, qs: QuerySet) -> dict[Any, dict]:
+        values = self._get_plan(asynchronous=True).columns is not None
+        rows = await executor.fetch(qs.values_list(*self._plan.columns) if values else qs)
+        results = await self._aserialize_rows(rows, values)
+        return {(x[0] if values else x.pk): y for x, y in zip(rows, results)}
+
+    def _serialize_chunks(self, qs: QuerySet, instances: bool = False) -> Iterator[tuple[list, list[dict]]]:
+        values = self._get_plan().columns is not None and not instances
+        if values:
+            qs = qs.values_list(*self._plan.columns)
+
+        rows = qs.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        while chunk := list(islice(rows, STREAM_CHUNK_SIZE)):
+            yield chunk, self._serialize_rows(chunk, values)
+
+    async def _aserialize_chunks(self, qs: QuerySet, instances: bool = False) -> AsyncIterator[tuple[list, list[dict]]]:
+        values = self._get_plan(asynchronous=True).columns is not None and not instances
+        if values:
+            qs = qs.values_list(*self._plan.columns)
+
+        # a server side cursor cannot outlive a call to the executor, every chunk is a query of its own
+        start = 0
+        while chunk := await executor.fetch(qs[start : start + STREAM_CHUNK_SIZE]):
+            yield chunk, await self._aserialize_rows(chunk, values)
+
+            if len(chunk) < STREAM_CHUNK_SIZE:
+                break
+
+            start += len(chunk)
+
+    def _set_fields(self) -> list[str]:
+        sets = set(["default"])
+
+        if self._parent_sets is not None:
+            sets = self._parent_sets | sets
+
+        elif self.request is not None:
+            sets_param = self.request.GET.get("sets")
+            if sets_param:
+                for set_name in sets_param.split(","):
+                    if set_name:
+                        sets.add(set_name)
+
+        if self._parent_fields is not None:
+            self._sparse_fields = self._parent_fields
+
+        elif self._parent_sets is None and self.request is not None and (fields := self.request.GET.get("fields")):
+            self._sparse_fields = frozenset(x for x in fields.split(",") if x)
+
+        # the requested fields replace the ones of the sets
+        if self._sparse_fields:
+            parsed_fields, expands = self._compile_sparse_fields(self._sparse_fields, self.depth)
+
+        else:
+            parsed_fields, expands = self._compile_fields(frozenset(sets), self.depth)
+
+        self._parsed_fields |= parsed_fields
+        self._expands = set(expands)
+
+        for expand in self._expands:
+            serializer = self._related_serializers.get(expand)
+            if serializer is None:
+                continue
+
+            instance = serializer()
+            instance._db = self._db
+            self._serializer_instances[expand] = instance
+
+    def manage(self):
+        self._set_fields()
+        self.lock = True
+        return self._parsed_fields, self._expands, self.cache
+
+    def _get_pagination(self) -> tuple[int, int]:
+        limit = PAGE_LIMIT
+        offset = 0
+
+        if self.request is None:
+            return limit, offset
+
+        for key in ["limit", "offset"]:
+            value = self.request.GET.get(key)
+            if value is None:
+                continue
+
+            try:
+                value = int(value)
+            except ValueError:
+                raise ValidationException(int_error_handler(key))
+
+            if value < 0 or (key == "limit" and value == 0):
+                raise ValidationException(f"Invalid value for `{key}`, expected a positive integer")
+
+            if key == "limit":
+                limit = value if value <= PKS_LIMIT else PKS_LIMIT
+
+            else:
+                offset = value
+
+        return limit, offset
+
+    def _get_count_policy(self) -> Literal["exact", "estimate", "none"]:
+        policy = self.count_policy
+
+        if self.request is not None and (value := self.request.GET.get("count")):
+            if value not in COUNT_POLICIES:
+                raise ValidationException(f"Invalid value for `count`, expected one of {', '.join(COUNT_POLICIES)}")
+
+            # a request can ask for a cheaper count than the one declared by the serializer
+            if COUNT_POLICIES.index(value) > COUNT_POLICIES.index(policy):
+                policy = value
+
+        return policy
+
+    def _estimate_count(self, qs: QuerySet) -> Optional[int]:
+        connection = connections[qs.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        try:
+            if not qs.query.where:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                        [connection.ops.quote_name(qs.model._meta.db_table)],
+                    )
+                    row = cursor.fetchone()
+
+                # -1 means that the table has not been analyzed yet
+                if row is None or row[0] < 0:
+                    return None
+
+                return row[0]
+
+            plan = json.loads(qs.order_by().explain(format="json"))
+            return int(plan[0]["Plan"]["Plan Rows"])
+
+        except DatabaseError:
+            return None
+
+    def _count(self, qs: QuerySet) -> tuple[Optional[int], bool]:
+        policy = self._get_count_policy()
+
+        if policy == "none":
+            return None, False
+
+        if policy == "estimate" and (count := self._estimate_count(qs)) is not None:
+            return count, False
+
+        return qs.count(), True
+
+    async def _acount(self, qs: QuerySet) -> tuple[Optional[int], bool]:
+        policy = self._get_count_policy()
+
+        if policy == "none":
+            return None, False
+
+        # the estimate runs raw sql, it has no async api
+        if policy == "estimate" and (count := await executor.run_sync(self._estimate_count, qs)) is not None:
+            return count, False
+
+        return await executor.count(qs), True
+
+    def _wraps_pagination(
+        self,
+        qs: QuerySet,
+        count: Optional[int] = None,
+        pks: bool = False,
+        path: Optional[str] = "-",
+        extra: Optional[dict[str, Any]] = None,
+        limit: int = PAGE_LIMIT,
+        offset: int = 0,
+    ):
+        if path == "-":
+            path = self.path
+
+        if extra is None:
+            extra = {}
+
+        if pks:
+            return self._paginate(qs[:PKS_LIMIT], count, path, extra, limit, offset)
+
+        exact = True
+        if count is None:
+            count, exact = self._count(qs)
+
+        if self.pagination == "cursor":
+            return self._wraps_cursor_pagination(qs, count, path, extra, limit)
+
+        if exact:
+            results = self._serialize_page(qs[offset : offset + limit])
+            return self._paginate(results, count, path, extra, limit, offset)
+
+        # the count is not reliable, fetch one more row to know if there is a next page
+        results = self._serialize_page(qs[offset : offset + limit + 1])
+        return self._paginate(results[:limit], count, path, extra, limit, offset, has_more=len(results) > limit)
+
+    async def _awraps_pagination(
+        self,
+        qs: QuerySet,
+        count: Optional[int] = None,
+        pks: bool = False,
+        path: Optional[str] = "-",
+        extra: Optional[dict[str, Any]] = None,
+        limit: int = PAGE_LIMIT,
+        offset: int = 0,
+    ):
+        if path == "-":
+            path = self.path
+
+        if extra is None:
+            extra = {}
+
+        if pks:
+            return self._paginate(qs[:PKS_LIMIT], count, path, extra, limit, offset)
+
+        exact = True
+        if count is None:
+            count, exact = await self._acount(qs)
+
+        if self.pagination == "cursor":
+            return await self._awraps_cursor_pagination(qs, count, path, extra, limit)
+
+        if exact:
+            results = await self._aserialize_page(qs[offset : offset + limit])
+            return self._paginate(results, count, path, extra, limit, offset)
+
+        # the count is not reliable, fetch one more row to know if there is a next page
+        results = await self._aserialize_page(qs[offset : offset + limit + 1])
+        return self._paginate(results[:limit], count, path, extra, limit, offset, has_more=len(results) > limit)
+
+    def _paginate(
+        self,
+        results: list[Any],
+        count: int,
+        path: Optional[str] = "-",
+        extra: Optional[dict[str, Any]] = None,
+        limit: int = PAGE_LIMIT,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        has_more: Optional[bool] = None,
+    ):
+        if path == "-":
+            path = self.path
+
+        if extra is None:
+            extra = {}
+
+        if not path:
+            return {"count": count, "results": results}
+
+        if has_more is None:
+            has_more = cursor is not None if self.pagination == "cursor" else count > offset + limit
+
+        if self.pagination == "cursor":
+            obj = {
+                "count": count,
+                "next": None,
+                "previous": None,
+                "first": update_querystring(path, {"limit": limit, **extra}),
+                "last": None,
+            }
+
+            if count is None:
+                obj["has_more"] = has_more
+
+            if cursor:
+                obj["next"] = update_querystring(
+                    path,
+                    {
+                        "limit": limit,
+                        "cursor": cursor,
+                        **extra,
+                    },
+                )
+
+            obj["results"] = results
+            return obj
+
+        obj = {
+            "count": count,
+            "next": None,
+            "previous": None,
+            "first": update_querystring(
+                path,
+                {
+                    "limit": limit,
+                    "offset": 0,
+                    **extra,
+                },
+            ),
+            "last": None,
+        }
+
+        if count is None:
+            obj["has_more"] = has_more
+
+        else:
+            last = (math.ceil(count / limit) * limit) - limit
+            obj["last"] = update_querystring(
+                path,
+                {
+                    "limit": limit,
+                    "offset": last if last >= 0 else 0,
+                    **extra,
+                },
+            )
+
+        if offset > 0:
+            previous = offset - limit
+            obj["previous"] = update_querystring(
+                path,
+                {
+                    "limit": limit,
+                    "offset": previous if previous >= 0 else 0,
+                    **extra,
+                },
+            )
+
+        if has_more:
+            obj["next"] = update_querystring(
+                path,
+                {
+                    "limit": limit,
+                    "offset": offset + limit,
+                    **extra,
+                },
+            )
+
+        obj["results"] = results
+
+        return obj
+
+    def _get_cursor_field(self) -> tuple[django_fields.Field, bool]:
+        descending = self.sort_by.startswith("-")
+        name = self.sort_by.lstrip("-")
+
+        try:
+            if name == "pk":
+                return self.model._meta.pk, descending
+
+            return self.model._meta.get_field(name), descending
+
+        except FieldDoesNotExist:
+            raise ValidationException(f"Invalid value for `sort`, field {name} is not sortable using a cursor")
+
+    def _encode_cursor(self, instance: models.Model) -> str:
+        field, _ = self._get_cursor_field()
+        value = getattr(instance, field.attname)
+
+        # the json encoder of django drops the microseconds, the next page would repeat the row
+        if isinstance(value, (datetime, time)):
+            value = value.isoformat()
+
+        value = json.dumps([value, instance.pk], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(value.encode("utf-8")).decode("utf-8").rstrip("=")
+
+    def _decode_cursor(self, cursor: str) -> tuple[Any, Any]:
+        field, _ = self._get_cursor_field()
+
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            return field.to_python(value), self.model._meta.pk.to_python(pk)
+
+        except Exception:
+            raise ValidationException("Invalid value for `cursor`")
+
+    def _cursor_queryset(self, qs: QuerySet) -> QuerySet:
+        field, descending = self._get_cursor_field()
+        lookup = "lt" if descending else "gt"
+
+        if field.primary_key:
+            qs = qs.order_by(self.sort_by)
+
+        # the nulls go after the other values, and before them when the order is descending
+        elif field.null:
+            order = F(field.attname).desc(nulls_first=True) if descending else F(field.attname).asc(nulls_last=True)
+            qs = qs.order_by(order, "-pk" if descending else "pk")
+
+        else:
+            qs = qs.order_by(self.sort_by, "-pk" if descending else "pk")
+
+        cursor = self.request.GET.get("cursor") if self.request is not None else None
+        if cursor:
+            value, pk = self._decode_cursor(cursor)
+
+            if field.primary_key:
+                qs = qs.filter(**{f"pk__{lookup}": pk})
+
+            elif value is None:
+                q = Q(**{f"{field.attname}__isnull": True, f"pk__{lookup}": pk})
+                if descending:
+                    q |= Q(**{f"{field.attname}__isnull": False})
+
+                qs = qs.filter(q)
+
+            else:
+                q = Q(**{f"{field.attname}__{lookup}": value}) | Q(**{field.attname: value, f"pk__{lookup}": pk})
+                if field.null and not descending:
+                    q |= Q(**{f"{field.attname}__isnull": True})
+
+                qs = qs.filter(q)
+
+        return qs
+
+    def _wraps_cursor_pagination(
+        self,
+        qs: QuerySet,
+        count: Optional[int],
+        path: Optional[str],
+        extra: dict[str, Any],
+        limit: int,
+    ):
+        instances = list(self._cursor_queryset(qs)[: limit + 1])
+        cursor = self._encode_cursor(instances[limit - 1]) if len(instances) > limit else None
+        instances = instances[:limit]
+
+        return self._paginate(self._serialize_page(instances), count, path, extra, limit, cursor=cursor)
+
+    async def _awraps_cursor_pagination(
+        self,
+        qs: QuerySet,
+        count: Optional[int],
+        path: Optional[str],
+        extra: dict[str, Any],
+        limit: int,
+    ):
+        instances = await executor.fetch(self._cursor_queryset(qs)[: limit + 1])
+        cursor = self._encode_cursor(instances[limit - 1]) if len(instances) > limit else None
+        instances = instances[:limit]
+
+        return self._paginate(await self._aserialize_page(instances), count, path, extra, limit, cursor=cursor)
+
+    def _get_stream_queryset(self, qs: QuerySet, exact: bool, limit: int, offset: int) -> QuerySet:
+        # one more row tells if there is a next page
+        if self.pagination == "cursor":
+            return self._cursor_queryset(qs)[: limit + 1]
+
+        if exact:
+            return qs[offset : offset + limit]
+
+        return qs[offset : offset + limit + 1]
+
+    def _get_stream_chunk(
+        self, rows: list, results: list[dict], size: int, limit: int
+    ) -> tuple[Optional[models.Model], bytes]:
+        last = None
+        if self.pagination == "cursor" and size < limit <= size + len(rows):
+            last = rows[limit - 1 - size]
+
+        results = results[: max(limit - size, 0)]
+        if not results:
+            return last, b""
+
+        return last, (b"," if size else b"") + b",".join(dumps(x) for x in results)
+
+    def _get_stream_envelope(
+        self, count: Optional[int], exact: bool, last: Optional[models.Model], size: int, limit: int, offset: int
+    ) -> bytes:
+        cursor = self._encode_cursor(last) if last is not None and size > limit else None
+        has_more = None if exact and self.pagination == "offset" else size > limit
+
+        envelope = self._paginate([], count, limit=limit, offset=offset, cursor=cursor, has_more=has_more)
+        del envelope["results"]
+
+        return b"], " + dumps(envelope)[1:]
+
+    def _stream_pagination(self, qs: QuerySet, limit: int = PAGE_LIMIT, offset: int = 0) -> Iterator[bytes]:
+        count, exact = self._count(qs)
+        qs = self._get_stream_queryset(qs, exact, limit, offset)
+        last = None
+
+        # the envelope goes after the results, the links are known once the last row was read
+        yield b'{"results": ['
+
+        size = 0
+        for rows, results in self._serialize_chunks(qs, instances=self.pagination == "cursor"):
+            row, chunk = self._get_stream_chunk(rows, results, size, limit)
+            last = row or last
+            if chunk:
+                yield chunk
+
+            size += len(rows)
+
+        yield self._get_stream_envelope(count, exact, last, size, limit, offset)
+
+    async def _astream_pagination(self, qs: QuerySet, limit: int = PAGE_LIMIT, offset: int = 0) -> AsyncIterator[bytes]:
+        count, exact = await self._acount(qs)
+        qs = self._get_stream_queryset(qs, exact, limit, offset)
+        last = None
+
+        yield b'{"results": ['
+
+        size = 0
+        async for rows, results in self._aserialize_chunks(qs, instances=self.pagination == "cursor"):
+            row, chunk = self._get_stream_chunk(rows, results, size, limit)
+            last = row or last
+            if chunk:
+                yield chunk
+
+            size += len(rows)
+
+        yield self._get_stream_envelope(count, exact, last, size, limit, offset)
+
+    @classmethod
+    def _get_query_value(
+        cls, handler: QueryHandler, error_handler: Optional[QueryHandler], parents: list[str], key: str, value: str
+    ):
+        def get_key():
+            if parents:
+                return ".".join(parents) + "." + key
+
+            return key
+
+        if error_handler:
+            try:
+                return handler(value)
+            except Exception:
+                raise ValidationException(f"Invalid value for field {get_key()}")
+
+        return handler(value)
+
+    @classmethod
+    def _validate_filter(cls, x: str, parents: Optional[list[str]] = None) -> FilterOperation | None:
+        if parents is None:
+            parents = []
+
+        if "=" in x:
+            if "![" in x.split("=")[0] and "]=" in x:
+                match = EXCLUDE_OPERATION_PATTERN.search(x)
+                if not match:
+                    raise ValidationException(
+                        f"Invalid filter {x}, format should be `field[operation]=value` or `field![operation]=value`"
+                    )
+
+                key, operation, value = match.groups()
+
+                handler, error_handler, supported_operations = cls._filter_map[key]
+
+                operations = operation.split(",")
+                for operation in operations:
+                    if operation not in supported_operations:
+                        raise ValidationException(f"Operation `{operation}` not supported for field {key}")
+
+                key = cls._rewrites.get(key, key)
+
+                return None, {
+                    "field": key,
+                    "operation": operation.replace(",", "__"),
+                    "value": value,
+                    "parents": parents,
+                }
+
+            elif "[" in x.split("=")[0] and "]=" in x:
+                match = OPERATION_PATTERN.search(x)
+                if not match:
+                    raise ValidationException(
+                        f"Invalid filter {x}, format should be `field[operation]=value` or `field![operation]=value`"
+                    )
+                key, operation, value = match.groups()
+
+                handler, error_handler, supported_operations = cls._filter_map[key]
+
+                operations = operation.split(",")
+                for operation in operations:
+                    if operation not in supported_operations:
+                        raise ValidationException(f"Operation `{operation}` not supported for field {key}")
+
+                key = cls._rewrites.get(key, key)
+
+                return {
+                    "field": key,
+                    "operation": operation.replace(",", "__"),
+                    "value": value,
+                    "parents": parents,
+                }, None
+
+            elif "!<=" in x:
+                field, value = x.split("!<=")
+                handler, error_handler, supported_operations = cls._filter_map[field]
+
+                operation = "lte"
+                if operation not in supported_operations:
+                    raise ValidationException(f"Operation `!<=` not supported for field {field}")
+
+                value = cls._get_query_value(handler, error_handler, parents, field, value)
+                field = cls._rewrites.get(field, field)
+
+                return None, {"field": field, "operation": operation, "value": value, "parents": parents}
+
+            elif "!>=" in x:
+                field, value = x.split("!>=")
                 handler, error_handler, supported_operations = cls._filter_map[field]
 
                 operation = "gte"
@@ -1205,97 +2429,340 @@ class Serializer(SerializerMetaBuilder):
         elif "[" in x:
             selector = "["
 
-        if "." not in x.split(selector)[0]:
+        path = x.split(selector)[0]
+        if "." not in path:
             return cls._validate_filter(x, parents)
 
-        child, *rest = x.split(".")
-        child = x.split(selector)[0].split(".")[0]
-
-        ser: Serializer | None = getattr(cls, child, None)
-        if ser is None:
+        prefix = path.rsplit(".", 1)[0]
+        if (index := cls._filter_index.get(prefix)) is None:
             return None, None
 
-        child = cls._rewrites.get(child, child)
-        forward = cls._lookups.get(child, child) if child.endswith("_set") else child
+        ser, lookups = index
+        return ser._validate_filter(x[len(prefix) + 1 :], parents + lookups)
 
-        return ser._validate_child_filter(".".join(rest), parents + [forward])
+    @classmethod
+    def _build_filter(cls, filters: list[FilterOperation]) -> Q:
+        named = {}
+        unnamed = []
+        for filter in filters:
+            is_iexact_in = filter["operation"] == "iexact__in" or filter["operation"] == "in__iexact"
 
-    def _query_filter(self, qs: QuerySet) -> QuerySet:
-        def build_filter(filters: list[FilterOperation]):
-            named = {}
-            unnamed = []
-            for filter in filters:
-                is_iexact_in = filter["operation"] == "iexact__in" or filter["operation"] == "in__iexact"
-
-                if filter["parents"] and is_iexact_in:
-                    query = Q()
-                    for value in filter["value"]:
-                        kwargs = {}
-                        kwargs["__".join(filter["parents"]) + f"__{filter['field']}__iexact"] = value
-                        query |= Q(**kwargs)
-
-                    unnamed.append(query)
-
-                elif filter["parents"]:
-                    named["__".join(filter["parents"]) + f"__{filter['field']}__{filter['operation']}"] = filter[
-                        "value"
-                    ]
-
-                elif is_iexact_in:
-                    query = Q()
-                    for value in filter["value"]:
-                        kwargs = {}
-                        kwargs[f"{filter['field']}__iexact"] = value
-                        query |= Q(**kwargs)
-
-                    unnamed.append(query)
+            if filter["parents"] and is_iexact_in:
+                query = Q()
+                for value in filter["value"]:
+                    kwargs = {}
+                    kwargs["__".join(filter["parents"]) + f"__{filter['field']}__iexact"] = value
+                    query |= Q(**kwargs)
 
-                else:
-                    named[f"{filter['field']}__{filter['operation']}"] = filter["value"]
+                unnamed.append(query)
+
+            elif filter["parents"]:
+                named["__".join(filter["parents"]) + f"__{filter['field']}__{filter['operation']}"] = filter["value"]
+
+            elif is_iexact_in:
+                query = Q()
+                for value in filter["value"]:
+                    kwargs = {}
+                    kwargs[f"{filter['field']}__iexact"] = value
+                    query |= Q(**kwargs)
+
+                unnamed.append(query)
 
-            return unnamed, named
+            else:
+                named[f"{filter['field']}__{filter['operation']}"] = filter["value"]
+
+        return Q(*unnamed, **named)
 
+    @classmethod
+    @lru_cache(maxsize=FILTERS_SIZE)
+    def _compile_filters(cls, tokens: tuple[str, ...]) -> tuple[Optional[Q], Optional[Q]]:
         query_filters: list[FilterOperation] = []
         exclude_filters: list[FilterOperation] = []
 
-        for x in (self.request.META.get("QUERY_STRING") or "").split("&"):
-            if x.startswith("sets=") or x.startswith("sort=") or x.startswith("limit=") or x.startswith("offset="):
-                continue
-
+        for x in tokens:
             if "." in x.split("=")[0]:
-                query, exclude = self._validate_child_filter(x)
+                query, exclude = cls._validate_child_filter(x)
 
-                if not query and not exclude:
-                    continue
+            else:
+                query, exclude = cls._validate_filter(x)
 
-                if query:
-                    query_filters.append(query)
+            if query:
+                query_filters.append(query)
 
-                if exclude:
-                    exclude_filters.append(exclude)
+            if exclude:
+                exclude_filters.append(exclude)
 
-            else:
-                query, exclude = self._validate_filter(x)
+        return (
+            cls._build_filter(query_filters) if query_filters else None,
+            cls._build_filter(exclude_filters) if exclude_filters else None,
+        )
 
-                if query:
-                    query_filters.append(query)
+    def _query_filter(self, qs: QuerySet) -> QuerySet:
+        # the filters are combined with AND, their order does not change the query, nor its entry in the cache
+        tokens = tuple(
+            sorted(
+                x
+                for x in (self.request.META.get("QUERY_STRING") or "").split("&")
+                if x and not x.startswith(RESERVED_PARAMS)
+            )
+        )
+        if not tokens:
+            return qs
 
-                if exclude:
-                    exclude_filters.append(exclude)
+        # the Q objects are shared between requests, filter and exclude do not modify them
+        query, exclude = self._compile_filters(tokens)
 
-        if query_filters:
-            args, kwargs = build_filter(query_filters)
-            qs = qs.filter(*args, **kwargs)
+        if query is not None:
+            qs = qs.filter(query)
 
-        if exclude_filters:
-            args, kwargs = build_filter(exclude_filters)
-            qs = qs.exclude(*args, **kwargs)
+        if exclude is not None:
+            qs = qs.exclude(exclude)
 
         return qs
 
+    @classmethod
+    @lru_cache(maxsize=FILTERS_SIZE)
+    def _compile_aggregation(cls, group_by: tuple[str, ...], aggregations: tuple[str, ...]) -> Annotate | Aggregate:
+        for field in group_by:
+            if field not in cls.group_by:
+                raise ValidationException(
+                    f"Invalid value for `group_by`, {field} is not supported, expected any of {', '.join(cls.group_by)}"
+                )
+
+        expressions = {}
+        for aggregation in aggregations:
+            if aggregation not in cls.aggregations:
+                raise ValidationException(
+                    f"Invalid value for `agg`, {aggregation} is not supported, "
+                    f"expected any of {', '.join(cls.aggregations)}"
+                )
+
+            name, _, field = aggregation.partition(":")
+            alias = f"{name}_{field}" if field else name
+            expressions[alias] = AGGREGATES[name](cls._rewrites.get(field, field) if field else "*")
+
+        if group_by:
+            return Annotate(*[cls._rewrites.get(x, x) for x in group_by], **expressions)
+
+        return Aggregate(**expressions)
+
+    def _uses_entities(self) -> bool:
+        # the next cursor is read from the last object, it is not known from its pk
+        return (
+            self.entity_cache
+            and self.pagination == "offset"
+            and not self.stream
+            and not is_cache_bypassed(self.request.headers)
+        )
+
+    def _get_list_fields(self, args: tuple, kwargs: dict[str, Any]) -> frozenset[str]:
+        # the Q and F objects can read any field
+        if args:
+            return frozenset(["__all__"])
+
+        names = [x.split("__")[0] for x in kwargs]
+
+        for x in (self.request.META.get("QUERY_STRING") or "").split("&"):
+            if x and not x.startswith(RESERVED_PARAMS) and (match := re.match(r"\w+", x)):
+                names.append(match.group().split("__")[0])
+
+        # a list sorted by a related field is stale when the relation changes
+        names.append(self.sort_by.lstrip("-").split("__")[0])
+        return frozenset(self.model._meta.pk.name if x == "pk" else x for x in names)
+
+    def _get_entities_queryset(self, pks: list[Any]) -> QuerySet:
+        return self._prefetch(self.model.objects.using(self._db).filter(pk__in=pks))
+
+    def _merge_entities(
+        self, pks: list[Any], items: list[Optional[bytes]], results: dict[Any, dict]
+    ) -> tuple[list[bytes], dict[Any, bytes]]:
+        contents = {x: dumps(y) for x, y in results.items()}
+        items = [contents.get(x) if item is None else item for x, item in zip(pks, items)]
+
+        # an object that was deleted after the list was cached is left out
+        return [x for x in items if x is not None], contents
+
+    def _get_entities(self, pks: list[Any], query: list[str]) -> list[bytes]:
+        serializer = self.get_serializer_path()
+        items = get_entities_cache(serializer=serializer, pks=pks, query=query, headers=self.request.headers)
+
+        if not (missing := [x for x, item in zip(pks, items) if item is None]):
+            return items
+
+        items, contents = self._merge_entities(pks, items, self._serialize_by_pk(self._get_entities_queryset(missing)))
+        set_entities_cache(
+            serializer=serializer,
+            values=contents,
+            ttl=self.ttl,
+            query=query,
+            headers=self.request.headers,
+            cache_control=self.cache_control,
+        )
+
+        return items
+
+    async def _aget_entities(self, pks: list[Any], query: list[str]) -> list[bytes]:
+        serializer = self.get_serializer_path()
+        items = await aget_entities_cache(serializer=serializer, pks=pks, query=query, headers=self.request.headers)
+
+        if not (missing := [x for x, item in zip(pks, items) if item is None]):
+            return items
+
+        results = await self._aserialize_by_pk(self._get_entities_queryset(missing))
+        items, contents = self._merge_entities(pks, items, results)
+        await aset_entities_cache(
+            serializer=serializer,
+            values=contents,
+            ttl=self.ttl,
+            query=query,
+            headers=self.request.headers,
+            cache_control=self.cache_control,
+        )
+
+        return items
+
+    def _get_list_params(self, params: Params, kind: str) -> dict[str, Any]:
+        return {
+            **self._get_cache_params(*params),
+            "fields": self._get_list_fields(*params),
+            "kind": kind,
+        }
+
+    def _get_pks_queryset(self, qs: QuerySet, exact: bool, limit: int, offset: int) -> QuerySet:
+        # the count is not reliable, fetch one more row to know if there is a next page
+        return qs.values_list("pk", flat=True)[offset : offset + limit + (0 if exact else 1)]
+
+    def _build_list_entry(
+        self, pks: list[Any], count: Optional[int], exact: bool, limit: int, offset: int
+    ) -> dict[str, Any]:
+        envelope = self._paginate([], count, limit=limit, offset=offset, has_more=None if exact else len(pks) > limit)
+        del envelope["results"]
+
+        return {"pks": pks[:limit], "envelope": envelope}
+
+    def _filter_entities(self, qs: QuerySet, params: Params, limit: int, offset: int) -> HttpResponse:
+        list_params = self._get_list_params(params, "filter")
+
+        if (entry := get_list_cache(**list_params)) is None:
+            count, exact = self._count(qs)
+            pks = list(self._get_pks_queryset(qs, exact, limit, offset))
+
+            entry = self._build_list_entry(pks, count, exact, limit, offset)
+            set_list_cache(value=entry, ttl=self.ttl, cache_control=self.cache_control, **list_params)
+
+        items = self._get_entities(entry["pks"], list_params["query"])
+        return set_entity_response(envelope=entry["envelope"], items=items, **self._set_cache_params(*params))
+
+    async def _afilter_entities(self, qs: QuerySet, params: Params, limit: int, offset: int) -> HttpResponse:
+        list_params = self._get_list_params(params, "filter")
+
+        if (entry := await aget_list_cache(**list_params)) is None:
+            count, exact = await self._acount(qs)
+            pks = await executor.fetch(self._get_pks_queryset(qs, exact, limit, offset))
+
+            entry = self._build_list_entry(pks, count, exact, limit, offset)
+            await aset_list_cache(value=entry, ttl=self.ttl, cache_control=self.cache_control, **list_params)
+
+        items = await self._aget_entities(entry["pks"], list_params["query"])
+        return await aset_entity_response(envelope=entry["envelope"], items=items, **self._set_cache_params(*params))
+
+    def _get_entity(self, qs: QuerySet, params: Params) -> Optional[HttpResponse]:
+        list_params = self._get_list_params(params, "get")
+
+        if (entry := get_list_cache(**list_params)) is None:
+            entry = {"pks": list(qs.values_list("pk", flat=True)[:1]), "envelope": None}
+            set_list_cache(value=entry, ttl=self.ttl, cache_control=self.cache_control, **list_params)
+
+        if not (items := self._get_entities(entry["pks"], list_params["query"])):
+            return None
+
+        return set_entity_response(envelope=None, items=items, **self._set_cache_params(*params))
+
+    async def _aget_entity(self, qs: QuerySet, params: Params) -> Optional[HttpResponse]:
+        list_params = self._get_list_params(params, "get")
+
+        if (entry := await aget_list_cache(**list_params)) is None:
+            entry = {"pks": await executor.fetch(qs.values_list("pk", flat=True)[:1]), "envelope": None}
+            await aset_list_cache(value=entry, ttl=self.ttl, cache_control=self.cache_control, **list_params)
+
+        if not (items := await self._aget_entities(entry["pks"], list_params["query"])):
+            return None
+
+        return await aset_entity_response(envelope=None, items=items, **self._set_cache_params(*params))
+
+    def _get_modified_since(self) -> Optional[int]:
+        if self.last_modified_field is None:
+            return None
+
+        return parse_http_date_safe(self.request.headers.get("If-Modified-Since", ""))
+
+    def _build_not_modified(self, since: int, modified: float, last: Optional[datetime]) -> Optional[HttpResponse]:
+        # a deletion does not change the max, but it is seen by the invalidation of the serializer
+        if modified > since or last is None or last.timestamp() > since:
+            return None
+
+        return build_not_modified({"Last-Modified": http_date(since)})
+
+    def _get_not_modified(self, qs: QuerySet) -> Optional[HttpResponse]:
+        if (since := self._get_modified_since()) is None:
+            return None
+
+        modified = get_modified(self.get_serializer_path())
+        last = qs.aggregate(last=Max(self.last_modified_field))["last"]
+        return self._build_not_modified(since, modified, last)
+
+    async def _aget_not_modified(self, qs: QuerySet) -> Optional[HttpResponse]:
+        if (since := self._get_modified_since()) is None:
+            return None
+
+        modified = await aget_modified(self.get_serializer_path())
+        last = (await qs.aaggregate(last=Max(self.last_modified_field)))["last"]
+        return self._build_not_modified(since, modified, last)
+
+    def _get_aggregation(self) -> Optional[Annotate | Aggregate]:
+        group_by = tuple(x for x in self.request.GET.get("group_by", "").split(",") if x)
+        aggregations = tuple(x for x in self.request.GET.get("agg", "").split(",") if x)
+
+        if not group_by and not aggregations:
+            return None
+
+        if not aggregations:
+            raise ValidationException("Invalid value for `agg`, `group_by` requires at least one aggregation")
+
+        return self._compile_aggregation(group_by, aggregations)
+
+    def _get_groups_queryset(self, qs: QuerySet, call: Annotate) -> QuerySet:
+        # one row per group, sorted by the groups to get a stable response
+        return qs.values(*call.args).annotate(**call.kwargs).order_by(*call.args)
+
+    def _aggregate(self, qs: QuerySet, call: Annotate | Aggregate) -> list[dict[str, Any]] | dict[str, Any]:
+        if isinstance(call, Aggregate):
+            return qs.aggregate(**call.kwargs)
+
+        return list(self._get_groups_queryset(qs, call))
+
+    async def _aaggregate(self, qs: QuerySet, call: Annotate | Aggregate) -> list[dict[str, Any]] | dict[str, Any]:
+        if isinstance(call, Aggregate):
+            return await qs.aaggregate(**call.kwargs)
+
+        return await executor.fetch(self._get_groups_queryset(qs, call))
+
     @classmethod
     def help(cls, depth: Optional[int] = None):
-        original_depth = depth
+        cls._prepare()
+
+        if depth is None:
+            return HttpResponse(cls._get_help_content(), status=200, headers={"Content-Type": "application/json"})
+
+        return cls._get_help(depth)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _get_help_content(cls) -> bytes:
+        return dumps(cls._get_help())
+
+    @classmethod
+    def _get_help(cls, depth: Optional[int] = None):
 
         def get_field_info(field: FieldDescriptor):
             attributes = {
@@ -1437,14 +2904,9 @@ class Serializer(SerializerMetaBuilder):
                 }
             )
 
-        result = {"filters": sorted([*cls.filters, *inherited_filters]), "sets": sets}
+        return {"filters": sorted([*cls.filters, *inherited_filters]), "sets": sets}
 
-        if original_depth is None:
-            return HttpResponse(json.dumps(result), status=200, headers={"Content-Type": "application/json"})
-
-        return result
-
-    def filter(self, *args: Any, **kwargs: Any) -> List[dict[str, Any]] | dict[str, Any]:
+    def _get_help_response(self) -> Optional[dict[str, Any]]:
         self._verify_headers()
 
         if "help" in self.request.META.get("QUERY_STRING"):
@@ -1452,33 +2914,86 @@ class Serializer(SerializerMetaBuilder):
                 if x == "help":
                     return self.help()
 
-        cache = get_cache(
-            serializer=self.get_serializer_path(),
-            params=(args, kwargs),
-            query=self.request.META.get("QUERY_STRING").split("&"),
-            headers=self.request.headers,
-        )
-        if cache:
+        return None
+
+    def _get_cache_params(self, args: tuple, kwargs: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "serializer": self.get_serializer_path(),
+            "params": (args, kwargs),
+            "query": self.request.META.get("QUERY_STRING").split("&"),
+            "headers": self.request.headers,
+        }
+
+    def _set_cache_params(self, args: tuple, kwargs: dict[str, Any]) -> dict[str, Any]:
+        return {**self._get_cache_params(args, kwargs), "ttl": self.ttl, "cache_control": self.cache_control}
+
+    def _get_queryset(self, args: tuple, kwargs: dict[str, Any]) -> QuerySet:
+        return self._query_filter(self.model.objects.using(self._db).filter(*args, **kwargs))
+
+    @track_queries
+    def filter(self, *args: Any, **kwargs: Any) -> List[dict[str, Any]] | dict[str, Any]:
+        if (response := self._get_help_response()) is not None:
+            return response
+
+        if cache := get_cache(**self._get_cache_params(args, kwargs)):
             return cache
 
+        self._db = get_read_database(self.using, self.get_serializer_path())
+        qs = self._get_queryset(args, kwargs)
+
+        if not_modified := self._get_not_modified(qs):
+            return not_modified
+
+        if aggregation := self._get_aggregation():
+            return set_cache(value=self._aggregate(qs, aggregation), **self._set_cache_params(args, kwargs))
+
         self._set_fields()
-        qs = self.model.objects.filter(*args, **kwargs).order_by(self.sort_by)
-        qs = self._query_filter(qs)
-        qs = self._prefetch(qs)
+        limit, offset = self._get_pagination()
 
-        return set_cache(
-            serializer=self.get_serializer_path(),
-            value=self._wraps_pagination(qs),
-            ttl=self.ttl,
-            params=(args, kwargs),
-            query=self.request.META.get("QUERY_STRING").split("&"),
-            headers=self.request.headers,
-            cache_control=self.cache_control,
-        )
+        if self._uses_entities():
+            return self._filter_entities(qs.order_by(self.sort_by), (args, kwargs), limit, offset)
+
+        qs = self._prefetch(qs.order_by(self.sort_by))
+
+        if self.stream:
+            chunks = self._stream_pagination(qs, limit=limit, offset=offset)
+            return stream_cache(chunks=chunks, **self._set_cache_params(args, kwargs))
+
+        value = self._wraps_pagination(qs, limit=limit, offset=offset)
+        return set_cache(value=value, **self._set_cache_params(args, kwargs))
+
+    async def afilter(self, *args: Any, **kwargs: Any) -> List[dict[str, Any]] | dict[str, Any]:
+        if (response := self._get_help_response()) is not None:
+            return response
+
+        if cache := await aget_cache(**self._get_cache_params(args, kwargs)):
+            return cache
+
+        self._db = await aget_read_database(self.using, self.get_serializer_path())
+        qs = self._get_queryset(args, kwargs)
 
-    @sync_to_async
-    def afilter(self, *args: Any, **kwargs: Any) -> List[dict[str, Any]]:
-        return self.filter(*args, **kwargs)
+        if not_modified := await self._aget_not_modified(qs):
+            return not_modified
+
+        if aggregation := self._get_aggregation():
+            return await aset_cache(
+                value=await self._aaggregate(qs, aggregation), **self._set_cache_params(args, kwargs)
+            )
+
+        self._set_fields()
+        limit, offset = self._get_pagination()
+
+        if self._uses_entities():
+            return await self._afilter_entities(qs.order_by(self.sort_by), (args, kwargs), limit, offset)
+
+        qs = self._prefetch(qs.order_by(self.sort_by))
+
+        if self.stream:
+            chunks = self._astream_pagination(qs, limit=limit, offset=offset)
+            return astream_cache(chunks=chunks, **self._set_cache_params(args, kwargs))
+
+        value = await self._awraps_pagination(qs, limit=limit, offset=offset)
+        return await aset_cache(value=value, **self._set_cache_params(args, kwargs))
 
     def _verify_headers(self):
         accept = self.request.headers.get("Accept", "application/json")
@@ -1488,44 +3003,141 @@ class Serializer(SerializerMetaBuilder):
 
         raise ValidationException("Accept header must be application/json")
 
+    @track_queries
     def get(self, *args: Any, **kwargs: Any) -> dict[str, Any] | None:
-        self._verify_headers()
+        if (response := self._get_help_response()) is not None:
+            return response
 
-        if "help" in self.request.META.get("QUERY_STRING"):
-            for x in (self.request.META.get("QUERY_STRING") or "").split("&"):
-                if x == "help":
-                    return self.help()
+        if cache := get_cache(**self._get_cache_params(args, kwargs)):
+            return cache
 
-        cache = get_cache(
-            serializer=self.get_serializer_path(),
-            params=(args, kwargs),
-            query=self.request.META.get("QUERY_STRING").split("&"),
-            headers=self.request.headers,
-        )
-        if cache:
+        self._db = get_read_database(self.using, self.get_serializer_path())
+        qs = self._get_queryset(args, kwargs)
+
+        if not_modified := self._get_not_modified(qs):
+            return not_modified
+
+        self._set_fields()
+
+        if self._uses_entities():
+            return self._get_entity(qs.order_by(self.sort_by), (args, kwargs))
+
+        results = self._serialize_page(self._prefetch(qs.order_by(self.sort_by))[:1])
+        if not results:
+            return None
+
+        return set_cache(value=results[0], **self._set_cache_params(args, kwargs))
+
+    async def aget(self, *args: Any, **kwargs: Any) -> dict[str, Any] | None:
+        if (response := self._get_help_response()) is not None:
+            return response
+
+        if cache := await aget_cache(**self._get_cache_params(args, kwargs)):
             return cache
 
+        self._db = await aget_read_database(self.using, self.get_serializer_path())
+        qs = self._get_queryset(args, kwargs)
+
+        if not_modified := await self._aget_not_modified(qs):
+            return not_modified
+
         self._set_fields()
-        qs = self.model.objects.filter(*args, **kwargs).order_by(self.sort_by)
-        qs = self._query_filter(qs)
-        qs = self._prefetch(qs)
-        qs = qs.first()
-        if qs is None:
+
+        if self._uses_entities():
+            return await self._aget_entity(qs.order_by(self.sort_by), (args, kwargs))
+
+        results = await self._aserialize_page(self._prefetch(qs.order_by(self.sort_by))[:1])
+        if not results:
             return None
 
-        return set_cache(
-            serializer=self.get_serializer_path(),
-            value=self._serialize(qs),
-            ttl=self.ttl,
-            params=(args, kwargs),
-            query=self.request.META.get("QUERY_STRING").split("&"),
-            headers=self.request.headers,
-            cache_control=self.cache_control,
-        )
+        return await aset_cache(value=results[0], **self._set_cache_params(args, kwargs))
+
+    def _get_many_params(
+        self, ids: Iterable[Any], args: tuple, kwargs: dict[str, Any]
+    ) -> tuple[list[Any], list[Params]]:
+        field = self.model._meta.pk
+
+        try:
+            ids = [field.to_python(x) for x in ids]
+
+        except DjangoValidationError:
+            raise ValidationException("Invalid value for `ids`, expected a list of primary keys")
+
+        return ids, [(args, {**kwargs, "pk": x}) for x in ids]
+
+    def _get_many_queryset(self, ids: list[Any], args: tuple, kwargs: dict[str, Any]) -> QuerySet:
+        self._set_fields()
+        qs = self.model.objects.using(self._db).filter(*args, **kwargs).filter(pk__in=ids)
+        qs = self._query_filter(qs)
+        return self._prefetch(qs)
+
+    def _get_missing(self, ids: list[Any], items: list[Optional[bytes]]) -> list[Any]:
+        return list(dict.fromkeys(x for x, item in zip(ids, items) if item is None))
+
+    def _merge_many(
+        self,
+        ids: list[Any],
+        items: list[Optional[bytes]],
+        results: dict[Any, dict],
+        args: tuple,
+        kwargs: dict[str, Any],
+    ) -> tuple[list[Optional[bytes]], list[tuple[Params, bytes]]]:
+        contents = {x: dumps(y) for x, y in results.items()}
+        items = [contents.get(x) if item is None else item for x, item in zip(ids, items)]
+        return items, [((args, {**kwargs, "pk": x}), y) for x, y in contents.items()]
+
+    @track_queries
+    def get_many(self, ids: Iterable[Any], *args: Any, **kwargs: Any) -> HttpResponse:
+        if (response := self._get_help_response()) is not None:
+            return response
+
+        serializer = self.get_serializer_path()
+        query = self.request.META.get("QUERY_STRING").split("&")
+        ids, params = self._get_many_params(ids, args, kwargs)
+
+        items = get_many_cache(serializer=serializer, params=params, query=query, headers=self.request.headers)
+
+        if missing := self._get_missing(ids, items):
+            self._db = get_read_database(self.using, serializer)
+            results = self._serialize_by_pk(self._get_many_queryset(missing, args, kwargs))
+            items, values = self._merge_many(ids, items, results, args, kwargs)
+
+            set_many_cache(
+                serializer=serializer,
+                values=values,
+                ttl=self.ttl,
+                query=query,
+                headers=self.request.headers,
+                cache_control=self.cache_control,
+            )
+
+        return build_many_response(items, self.request.headers, self.cache_control)
 
-    @sync_to_async
-    def aget(self, *args: Any, **kwargs: Any) -> dict[str, Any] | None:
-        return self.get(*args, **kwargs)
+    async def aget_many(self, ids: Iterable[Any], *args: Any, **kwargs: Any) -> HttpResponse:
+        if (response := self._get_help_response()) is not None:
+            return response
+
+        serializer = self.get_serializer_path()
+        query = self.request.META.get("QUERY_STRING").split("&")
+        ids, params = self._get_many_params(ids, args, kwargs)
+
+        items = await aget_many_cache(serializer=serializer, params=params, query=query, headers=self.request.headers)
+
+        if missing := self._get_missing(ids, items):
+            self._db = await aget_read_database(self.using, serializer)
+            results = await self._aserialize_by_pk(self._get_many_queryset(missing, args, kwargs))
+            items, values = self._merge_many(ids, items, results, args, kwargs)
+
+            await aset_many_cache(
+                serializer=serializer,
+                values=values,
+                ttl=self.ttl,
+                query=query,
+                headers=self.request.headers,
+                cache_control=self.cache_control,
+            )
+
+        return build_many_response(items, self.request.headers, self.cache_control)
 
     def _instances(
         self,
@@ -1539,21 +3151,34 @@ class Serializer(SerializerMetaBuilder):
         qs = self._prefetch(qs)
         return self._wraps_pagination(qs, count, extra=extra)
 
-    @sync_to_async
-    def _ainstances(
+    async def _ainstances(
         self, qs: QuerySet[models.Model], count: Optional[int] = None, extra: Optional[dict[str, Any]] = None
     ) -> List[dict[str, Any]]:
-        return self._instances(qs, count, extra)
+        self._set_fields()
+
+        qs = qs.order_by(self.sort_by)
+        qs = self._prefetch(qs)
+        return await self._awraps_pagination(qs, count, extra=extra)
 
     def _instance(self, instance: models.Model) -> dict[str, Any] | None:
-        return self._serialize(instance)
+        return self._serialize_page([instance])[0]
+
+    async def ainstance(self, instance: models.Model) -> dict[str, Any] | None:
+        return (await self._aserialize_page([instance]))[0]
 
-    @sync_to_async
-    def ainstance(self, instance: models.Model) -> dict[str, Any] | None:
-        return self._instance(instance)
+    def _fork(self) -> "Serializer":
+        # same request, sets and depth, but its own state to be used concurrently
+        serializer = copy.copy(self)
+        serializer.init(self._parent_sets, self.depth, self._parent_fields)
+        return serializer
 
     def __init_subclass__(cls):
-        cls._prepare_fields()
+        if cls.lazy:
+            PENDING_SERIALIZERS.append(cls)
+
+        else:
+            cls._prepare()
+
         super().__init_subclass__()
 
     def __init__(
@@ -1561,6 +3186,7 @@ class Serializer(SerializerMetaBuilder):
         request: Optional[HttpRequest | AsyncRequest] = None,
         sets: Optional[Collection[str]] = None,
     ):
+        self._prepare()
         self.request = request
 
         if request and (sort_by := request.GET.get("sort")):
@@ -1572,8 +3198,12 @@ class Serializer(SerializerMetaBuilder):
         self,
         sets: Optional[Collection[str]] = None,
         depth: Optional[int] = None,
+        fields: Optional[Collection[str]] = None,
     ) -> None:
         self._serializer_instances: dict[str, Type["Serializer"]] = {}
+        self._pk_lists: dict[str, dict[Any, list[Any]]] = {}
+        self._expanded: dict[str, Any] = {}
+        self._plan: Optional[SerializationPlan] = None
 
         if depth is not None:
             self.depth = depth
@@ -1585,4 +3215,7 @@ class Serializer(SerializerMetaBuilder):
         else:
             self._parent_sets = None
 
+        self._parent_fields = frozenset(fields) if fields is not None else None
+        self._sparse_fields: Optional[frozenset[str]] = None
+
         self._expand_sets = set()
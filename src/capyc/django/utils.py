@@ -24,6 +24,9 @@ class FieldRelatedDescriptor:
         primary_key: bool = False,
         unique: bool = False,
         query_param: Optional[str] = None,
+        through: Optional[Type[models.Model]] = None,
+        through_fields: Optional[tuple[str, str]] = None,
+        related_query_name: Optional[str] = None,
     ):
         self.path = path
         self.field_name = field_name
@@ -39,6 +42,9 @@ class FieldRelatedDescriptor:
         self.primary_key = primary_key
         self.unique = unique
         self.query_param = query_param
+        self.through = through
+        self.through_fields = through_fields
+        self.related_query_name = related_query_name
 
     def __repr__(self) -> str:
         return (
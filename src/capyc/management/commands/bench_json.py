@@ -0,0 +1,66 @@
+import timeit
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from capyc.django.encoder import get_encoders, json_dumps
+
+
+def build_page(rows: int) -> dict:
+    return {
+        "count": rows,
+        "next": None,
+        "previous": None,
+        "first": f"/permission?limit={rows}&offset=0",
+        "last": f"/permission?limit={rows}&offset=0",
+        "results": [
+            {
+                "id": i,
+                "name": f"Permission {i}",
+                "codename": f"permission_{i}",
+                "price": Decimal("10.25") * i,
+                "uuid": uuid.uuid4(),
+                "created_at": date(2024, 1, 1),
+                "groups": {
+                    "count": 3,
+                    "next": None,
+                    "previous": None,
+                    "first": f"/group?limit=20&offset=0&permissions.pk={i}",
+                    "last": f"/group?limit=20&offset=0&permissions.pk={i}",
+                    "results": [1, 2, 3],
+                },
+            }
+            for i in range(rows)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure the encode time of every installed JSON encoder per payload size"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=str,
+            default="10,100,1000,10000",
+            help="Comma separated list of rows per payload.",
+        )
+        parser.add_argument("--repeat", type=int, default=20, help="Times that every payload is encoded.")
+
+    def handle(self, *args, **options):
+        encoders = get_encoders()
+
+        self.stdout.write(f"{'rows':>8} {'size':>12} " + " ".join(f"{x:>12}" for x in encoders))
+
+        for rows in [int(x) for x in options["rows"].split(",") if x]:
+            page = build_page(rows)
+            size = len(json_dumps(page)) / 1024
+
+            timings = []
+            for encoder in encoders.values():
+                best = min(timeit.repeat(lambda: encoder(page), number=1, repeat=options["repeat"]))
+                timings.append(f"{best * 1000:>9.3f} ms")
+
+            self.stdout.write(f"{rows:>8} {size:>9.1f} KB " + " ".join(timings))
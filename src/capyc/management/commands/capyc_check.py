@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+
+from capyc.django.serializer import get_serializers
+
+
+class Command(BaseCommand):
+    help = "Prepare and validate every serializer, including the lazy ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module",
+            type=str,
+            default="serializers",
+            help="Comma separated list of modules of every app that declare serializers.",
+        )
+
+    def handle(self, *args, **options):
+        for module in [x for x in options["module"].split(",") if x]:
+            autodiscover_modules(module)
+
+        errors = []
+        serializers = get_serializers()
+
+        for serializer in serializers:
+            try:
+                serializer._prepare()
+
+            except Exception as e:
+                errors.append(f"{serializer.get_serializer_path()}: {e}")
+
+        for error in errors:
+            self.stderr.write(self.style.ERROR(error))
+
+        if errors:
+            raise CommandError(f"{len(errors)} of {len(serializers)} serializers are invalid")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(serializers)} serializers are valid"))
@@ -0,0 +1,160 @@
+from typing import Optional, Type, TypedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models
+from django.utils.module_loading import autodiscover_modules
+
+from capyc.django.serializer import Serializer, get_serializers
+
+
+class Usage(TypedDict):
+    model: Type[models.Model]
+    field: models.Field
+    kinds: set[str]
+    paths: set[str]
+
+
+def get_field(model: Type[models.Model], name: str) -> Optional[models.Field]:
+    if name == "pk":
+        return model._meta.pk
+
+    try:
+        field = model._meta.get_field(name)
+
+    except FieldDoesNotExist:
+        return None
+
+    # the many to many and reverse relations are read through a foreign key, django indexes it
+    if field.is_relation and (field.many_to_many or field.one_to_many or field.auto_created):
+        return None
+
+    return field
+
+
+def get_declared_indexes(model: Type[models.Model]) -> list[list[str]]:
+    meta = model._meta
+    result = []
+
+    for field in meta.local_fields:
+        if field.primary_key or field.unique or field.db_index:
+            result.append([field.column])
+
+    def columns(fields: list[str]) -> list[str]:
+        return [meta.get_field(x.lstrip("-")).column for x in fields]
+
+    for index in meta.indexes:
+        if index.fields:
+            result.append(columns(index.fields))
+
+    for constraint in meta.constraints:
+        if isinstance(constraint, models.UniqueConstraint) and constraint.fields:
+            result.append(columns(constraint.fields))
+
+    for fields in meta.unique_together:
+        result.append(columns(fields))
+
+    return result
+
+
+def get_db_indexes(model: Type[models.Model], database: str) -> list[list[str]]:
+    connection = connections[database]
+
+    with connection.cursor() as cursor:
+        if model._meta.db_table not in connection.introspection.table_names(cursor):
+            return []
+
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+
+    return [
+        x["columns"] for x in constraints.values() if x["columns"] and (x["index"] or x["unique"] or x["primary_key"])
+    ]
+
+
+def get_suggestion(model: Type[models.Model], field: models.Field) -> str:
+    table = model._meta.db_table
+    name = f"{table}_{field.column}_idx"
+
+    # django limits the name of an index to 30 characters
+    if len(name) > 30:
+        name = f"{table[: max(30 - len(field.column) - 5, 1)]}_{field.column}_idx"[:30]
+
+    return f'{model._meta.label}: models.Index(fields=["{field.name}"], name="{name}")'
+
+
+class Command(BaseCommand):
+    help = "List the filters and sorts of the serializers that are not covered by an index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module",
+            type=str,
+            default="serializers",
+            help="Comma separated list of modules of every app that declare serializers.",
+        )
+        parser.add_argument("--database", type=str, default="default", help="Database to introspect.")
+        parser.add_argument("--fail", action="store_true", help="Exit with an error if any column is not indexed.")
+
+    def handle(self, *args, **options):
+        for module in [x for x in options["module"].split(",") if x]:
+            autodiscover_modules(module)
+
+        usages: dict[tuple[str, str], Usage] = {}
+
+        def add(serializer: Type[Serializer], name: str, kind: str, path: str):
+            field = get_field(serializer.model, name)
+            if field is None:
+                return
+
+            key = (serializer.model._meta.label, field.column)
+            if key not in usages:
+                usages[key] = {"model": serializer.model, "field": field, "kinds": set(), "paths": set()}
+
+            usages[key]["kinds"].add(kind)
+            usages[key]["paths"].add(path)
+
+        for serializer in get_serializers():
+            if serializer.model is None:
+                continue
+
+            serializer._prepare()
+            current = serializer.get_serializer_path()
+
+            for name in serializer.filters:
+                add(serializer, serializer._rewrites.get(name, name), "filter", f"{current}?{name}")
+
+            for path, (child, _) in serializer._filter_index.items():
+                for name in child.filters:
+                    add(child, child._rewrites.get(name, name), "filter", f"{current}?{path}.{name}")
+
+            sort_by = serializer.sort_by.lstrip("-")
+            add(serializer, sort_by, "sort", f"{current}?sort={serializer.sort_by}")
+
+        indexes: dict[str, list[list[str]]] = {}
+        missing = []
+
+        for (label, column), usage in sorted(usages.items()):
+            if label not in indexes:
+                model = usage["model"]
+                indexes[label] = get_declared_indexes(model) + get_db_indexes(model, options["database"])
+
+            # only an index that starts with the column can be used to filter or sort by it
+            if any(x[0] == column for x in indexes[label]):
+                continue
+
+            missing.append(usage)
+
+        for usage in missing:
+            self.stdout.write(
+                f"{usage['model']._meta.label}.{usage['field'].name} ({', '.join(sorted(usage['kinds']))})"
+            )
+
+            for path in sorted(usage["paths"]):
+                self.stdout.write(f"    {path}")
+
+            self.stdout.write(f"    {get_suggestion(usage['model'], usage['field'])}")
+
+        if missing and options["fail"]:
+            raise CommandError(f"{len(missing)} of {len(usages)} filtered or sorted columns are not indexed")
+
+        self.stdout.write(f"{len(missing)} of {len(usages)} filtered or sorted columns are not indexed")
@@ -1,5 +1,6 @@
 """Centralized Breathecode fixtures for all our libraries."""
 
 from .database import *  # noqa: F401
+from .queries import *  # noqa: F401
 from .queryset import *  # noqa: F401
 from .signals import *  # noqa: F401
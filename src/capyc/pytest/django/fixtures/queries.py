@@ -0,0 +1,53 @@
+"""
+Query budget fixtures.
+"""
+
+from contextlib import contextmanager
+from typing import Generator, Optional, final
+
+import pytest
+
+from capyc.django import queries
+
+__all__ = ["QueryBudget", "query_budget"]
+
+
+@final
+class QueryBudget:
+    """
+    Query budget utils.
+    """
+
+    @contextmanager
+    def __call__(
+        self, max_queries: Optional[int] = None, repeated: Optional[int] = None
+    ) -> Generator[None, None, None]:
+        """
+        Assert that the block runs at most `max_queries` queries and no query shape more than `repeated` times.
+
+        Usage:
+
+        ```py
+        serializer = PermissionSerializer(request=request)
+
+        # pass if the serializer runs 2 queries or less without a N+1
+        with query_budget(2):  # 🟢
+            serializer.filter()
+        ```
+        """
+
+        with queries.QueryRecorder() as recorder:
+            yield
+
+        errors = queries.get_errors(recorder.report(repeated), max_queries)
+        assert not errors, f"{recorder.report(repeated)['count']} queries were done: " + "; ".join(errors)
+
+
+@pytest.fixture
+def query_budget(monkeypatch: pytest.MonkeyPatch) -> Generator[QueryBudget, None, None]:
+    """
+    Query budget utils, the `query_budget` declared by a serializer raises an exception when it is exceeded.
+    """
+
+    monkeypatch.setitem(queries.settings, "action", "raise")
+    yield QueryBudget()
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Type
+from typing import Any, Optional, Type
 
 from asgiref.sync import async_to_sync
 from django.db import models
@@ -7,6 +7,7 @@ from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 import capyc.django.cache as actions
+from capyc.django import routing
 
 __all__ = []
 
@@ -14,16 +15,24 @@ logger = logging.getLogger(__name__)
 
 
 @receiver(post_save)
-def on_save(*args: Any, **kwargs: Any):
-    clean_cache(*args, **kwargs)
+def on_save(sender: Type[models.Model], instance: models.Model, created: bool = False, **kwargs: Any):
+    routing.pin()
+
+    # a new object can be part of any list, the changed fields are only known with update_fields
+    fields = None
+    if not created and kwargs.get("update_fields") is not None:
+        fields = {sender._meta.get_field(x).name for x in kwargs["update_fields"]}
+
+    clean_cache(sender, pk=instance.pk, fields=fields)
 
 
 @receiver(post_delete)
-def on_delete(*args: Any, **kwargs: Any):
-    clean_cache(*args, **kwargs)
+def on_delete(sender: Type[models.Model], instance: models.Model, **kwargs: Any):
+    routing.pin()
+    clean_cache(sender, pk=instance.pk)
 
 
 @async_to_sync
-async def clean_cache(sender: Type[models.Model], **_: Any):
+async def clean_cache(sender: Type[models.Model], pk: Any = None, fields: Optional[set[str]] = None):
     key = f"{sender._meta.app_label}.{sender.__name__}"
-    await actions.delete_cache(key)
+    await actions.delete_cache(key, pk=pk, fields=fields)
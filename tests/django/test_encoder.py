@@ -0,0 +1,66 @@
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from capyc.django import encoder
+from capyc.django.cache import compress
+
+VALUE = {
+    "decimal": Decimal("10.50"),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "date": date(2024, 1, 2),
+    "list": [1, "a", None, True],
+}
+
+EXPECTED = {
+    "decimal": "10.50",
+    "uuid": "12345678-1234-5678-1234-567812345678",
+    "date": "2024-01-02",
+    "list": [1, "a", None, True],
+}
+
+
+@pytest.mark.parametrize("name", ["orjson", "msgspec", "json"])
+def test_encoders(name: str):
+    if name not in encoder.get_encoders():
+        pytest.skip(f"{name} is not installed")
+
+    assert json.loads(encoder.get_encoders()[name](VALUE)) == EXPECTED
+
+
+def test_fallback(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(encoder, "ORJSON_INSTALLED", False)
+    monkeypatch.setattr(encoder, "MSGSPEC_INSTALLED", False)
+
+    for name in ["auto", "orjson", "msgspec", "json"]:
+        monkeypatch.setitem(encoder.settings, "encoder", name)
+        assert encoder.get_encoder() is encoder.json_dumps
+
+
+def test_json(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(encoder.settings, "encoder", "json")
+
+    assert encoder.get_encoder() is encoder.json_dumps
+    assert isinstance(encoder.dumps(VALUE), bytes)
+
+
+def test_compress():
+    res = compress(VALUE, {})
+
+    assert res["headers"] == {"Content-Type": "application/json"}
+    assert json.loads(res["content"]) == EXPECTED
+
+
+def test_bench_json():
+    out = StringIO()
+    call_command("bench_json", rows="1,10", repeat=1, stdout=out)
+
+    lines = out.getvalue().splitlines()
+
+    assert len(lines) == 3
+    assert lines[0].split()[2:] == list(encoder.get_encoders())
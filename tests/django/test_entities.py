@@ -0,0 +1,209 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory
+
+import capyc.pytest as capy
+from capyc.django import serializer as serializer_module
+from capyc.django.cache import delete_cache
+from capyc.django.cache import settings as cache_settings
+from capyc.django.serializer import Serializer
+
+
+class PermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+        "extra": ("codename",),
+    }
+    filters = ("name", "codename")
+    depth = 2
+    entity_cache = True
+
+
+@pytest.fixture(autouse=True)
+def setup(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(cache_settings, "is_cache_enabled", True)
+
+    # only the first serializer of a model is registered, other test modules declare one too
+    key = PermissionSerializer.get_serializer_path()
+    monkeypatch.setitem(serializer_module.SERIALIZER_REGISTRY, "auth.Permission", {key})
+    monkeypatch.setitem(serializer_module.SERIALIZER_DEPTHS, key, PermissionSerializer.depth)
+
+
+def get_keys(kind: str) -> list[str]:
+    return [x for x in cache.keys("*") if f"PermissionSerializer.{kind}" in x]
+
+
+def serialize(query: str = "", **kwargs):
+    factory = APIRequestFactory()
+    return PermissionSerializer(request=factory.get(f"/notes/547/?{query}")).filter(**kwargs)
+
+
+def test_list(database: capy.Database, django_assert_num_queries):
+    model = database.create(permission=3)
+    ids = [x.id for x in model.permission]
+
+    expected = {
+        "count": 3,
+        "first": "/permission?limit=20&offset=0",
+        "last": "/permission?limit=20&offset=0",
+        "next": None,
+        "previous": None,
+        "results": [{"id": x.id, "name": x.name} for x in model.permission],
+    }
+
+    # the count, the primary keys and the objects
+    with django_assert_num_queries(3):
+        assert json.loads(serialize(id__in=ids).content) == expected
+
+    with django_assert_num_queries(0):
+        assert json.loads(serialize(id__in=ids).content) == expected
+
+    assert len(get_keys("list")) == 1
+    assert len(get_keys("entity")) == 3
+
+    # other lists read the same objects
+    with django_assert_num_queries(2):
+        content = json.loads(serialize("limit=1&offset=1", id__in=ids).content)
+
+    assert content["results"] == [{"id": model.permission[1].id, "name": model.permission[1].name}]
+
+
+def test_sets(database: capy.Database):
+    model = database.create(permission=1)
+
+    serialize(id=model.permission.id)
+    content = json.loads(serialize("sets=extra", id=model.permission.id).content)
+
+    assert content["results"] == [
+        {"id": model.permission.id, "name": model.permission.name, "codename": model.permission.codename}
+    ]
+    assert len(get_keys("entity")) == 2
+
+
+def test_update(database: capy.Database, django_assert_num_queries):
+    model = database.create(permission=3)
+    ids = [x.id for x in model.permission]
+
+    serialize(id__in=ids)
+    serialize(f"name={model.permission[0].name}", id__in=ids)
+
+    model.permission[0].name = "changed"
+    model.permission[0].save()
+    async_to_sync(delete_cache)("auth.Permission", pk=model.permission[0].id, fields={"name"})
+
+    # the list filtered by name was deleted, the other one only needs the changed object
+    assert len(get_keys("list")) == 1
+    assert len(get_keys("entity")) == 2
+
+    with django_assert_num_queries(1):
+        content = json.loads(serialize(id__in=ids).content)
+
+    assert [x["name"] for x in content["results"]] == ["changed", model.permission[1].name, model.permission[2].name]
+
+
+def test_update__related_sort(database: capy.Database):
+    model = database.create(permission=2, content_type=[{"model": "a"}, {"model": "b"}])
+    ids = [x.id for x in model.permission]
+
+    for permission, content_type in zip(model.permission, model.content_type):
+        permission.content_type = content_type
+        permission.save()
+
+    factory = APIRequestFactory()
+    serializer = PermissionSerializer(request=factory.get("/notes/547/?sort=content_type__model"))
+
+    assert serializer._get_list_fields((), {"id__in": ids}) == {"content_type", "id"}
+
+    content = json.loads(serialize("sort=content_type__model", id__in=ids).content)
+    assert [x["id"] for x in content["results"]] == ids
+
+    for permission, content_type in zip(model.permission, reversed(model.content_type)):
+        permission.content_type = content_type
+        permission.save(update_fields=["content_type"])
+        async_to_sync(delete_cache)("auth.Permission", pk=permission.id, fields={"content_type"})
+
+    # the list is sorted by a field of the relation that changed
+    assert get_keys("list") == []
+
+    content = json.loads(serialize("sort=content_type__model", id__in=ids).content)
+    assert [x["id"] for x in content["results"]] == list(reversed(ids))
+
+
+def test_unknown_fields(database: capy.Database):
+    model = database.create(permission=3)
+    ids = [x.id for x in model.permission]
+
+    serialize(id__in=ids)
+    async_to_sync(delete_cache)("auth.Permission", pk=model.permission[0].id)
+
+    # a new or deleted object can be part of any list
+    assert get_keys("list") == []
+    assert len(get_keys("entity")) == 2
+
+
+def test_parent(database: capy.Database, monkeypatch: pytest.MonkeyPatch):
+    model = database.create(permission=2, group=1)
+    ids = [x.id for x in model.permission]
+    key = PermissionSerializer.get_serializer_path()
+
+    serialize(id__in=ids)
+    monkeypatch.setitem(serializer_module.SERIALIZER_REGISTRY, "auth.Group", {"app.GroupSerializer"})
+    monkeypatch.setitem(serializer_module.SERIALIZER_PARENTS, "app.GroupSerializer", {key})
+
+    # the objects that embed a group are not known
+    async_to_sync(delete_cache)("auth.Group", pk=model.group.id, fields={"name"})
+
+    assert get_keys("list") == []
+    assert get_keys("entity") == []
+
+
+def test_get(database: capy.Database, django_assert_num_queries):
+    model = database.create(permission=2)
+
+    serialize(id__in=[x.id for x in model.permission])
+
+    factory = APIRequestFactory()
+    with django_assert_num_queries(1):
+        response = PermissionSerializer(request=factory.get("/notes/547/")).get(id=model.permission[0].id)
+
+    assert json.loads(response.content) == {"id": model.permission[0].id, "name": model.permission[0].name}
+
+    with django_assert_num_queries(0):
+        response = PermissionSerializer(request=factory.get("/notes/547/")).get(id=model.permission[0].id)
+
+    assert json.loads(response.content) == {"id": model.permission[0].id, "name": model.permission[0].name}
+    assert PermissionSerializer(request=factory.get("/notes/547/")).get(id=0) is None
+
+
+def test_not_modified(database: capy.Database, django_assert_num_queries):
+    model = database.create(permission=1)
+
+    response = serialize(id=model.permission.id)
+
+    factory = APIRequestFactory()
+    request = factory.get("/notes/547/", headers={"If-None-Match": response["ETag"]})
+
+    with django_assert_num_queries(0):
+        assert PermissionSerializer(request=request).filter(id=model.permission.id).status_code == 304
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(reset_sequences=True)
+async def test_async(database: capy.Database):
+    model = await database.acreate(permission=2)
+    ids = [x.id for x in model.permission]
+
+    factory = APIRequestFactory()
+    response = await PermissionSerializer(request=factory.get("/notes/547/")).afilter(id__in=ids)
+
+    assert [x["id"] for x in json.loads(response.content)["results"]] == ids
+
+    response = await PermissionSerializer(request=factory.get("/notes/547/")).aget(id=ids[1])
+
+    assert json.loads(response.content) == {"id": ids[1], "name": model.permission[1].name}
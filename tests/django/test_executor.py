@@ -0,0 +1,88 @@
+import json
+import threading
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Permission
+from rest_framework.test import APIRequestFactory
+
+import capyc.pytest as capy
+from capyc.django import executor
+from capyc.django.cache import settings as cache_settings
+from capyc.django.serializer import Serializer
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(executor.settings, "size", 2)
+    executor.shutdown_executor()
+
+    yield
+
+    executor.shutdown_executor()
+
+
+class PermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+    }
+    filters = ("name",)
+    depth = 2
+
+
+@pytest.mark.asyncio
+async def test_disabled():
+    assert executor.get_executor() is None
+    assert await executor.run_sync(lambda x: x * 2, 3) == 6
+    assert executor.get_metrics()["completed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_sync(pool):
+    main = threading.get_ident()
+
+    thread = await executor.run_sync(threading.get_ident)
+    metrics = executor.get_metrics()
+
+    assert thread != main
+    assert metrics["size"] == 2
+    assert metrics["queued"] == 0
+    assert metrics["running"] == 0
+    assert metrics["completed"] == 1
+    assert metrics["max_wait"] >= metrics["avg_wait"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_run_sync__exception(pool):
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await executor.run_sync(fail)
+
+    assert executor.get_metrics()["running"] == 0
+    assert executor.get_metrics()["completed"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_afilter(database: capy.Database, pool, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(cache_settings, "is_cache_enabled", False)
+    model = await database.acreate(permission=3)
+    ids = [x.id for x in model.permission]
+
+    factory = APIRequestFactory()
+
+    def get_expected():
+        serializer = PermissionSerializer(request=factory.get("/notes/547/"))
+        return json.loads(serializer.filter(id__in=ids).content)
+
+    expected = await sync_to_async(get_expected)()
+
+    serializer = PermissionSerializer(request=factory.get("/notes/547/"))
+    response = await serializer.afilter(id__in=ids)
+
+    assert json.loads(response.content) == expected
+    assert executor.get_metrics()["completed"] == 2
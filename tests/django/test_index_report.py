@@ -0,0 +1,85 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import CommandError, call_command
+
+from capyc.django.serializer import Serializer
+from capyc.management.commands import capyc_index_report
+
+
+class ContentTypeSerializer(Serializer):
+    model = ContentType
+    path = "/contenttype"
+    fields = {
+        "default": ("id", "app_label"),
+    }
+    filters = ("app_label", "model")
+    depth = 2
+
+
+class GroupSerializer(Serializer):
+    model = Group
+    path = "/group"
+    fields = {
+        "default": ("id", "name"),
+    }
+    filters = ("name",)
+    depth = 2
+
+
+class PermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+        "expand_ids": ("content_type[]",),
+    }
+    rewrites = {
+        "group_set": "groups",
+    }
+    filters = ("name", "codename", "content_type", "groups")
+    sort_by = "-name"
+    depth = 2
+    content_type = ContentTypeSerializer
+    groups = GroupSerializer
+
+
+@pytest.fixture(autouse=True)
+def serializers(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(capyc_index_report, "get_serializers", lambda: [PermissionSerializer])
+
+
+def test_report(db):
+    out = StringIO()
+    call_command("capyc_index_report", stdout=out)
+
+    path = "tests.django.test_index_report.PermissionSerializer"
+    assert out.getvalue().splitlines() == [
+        "auth.Permission.codename (filter)",
+        f"    {path}?codename",
+        '    auth.Permission: models.Index(fields=["codename"], name="auth_permission_codename_idx")',
+        "auth.Permission.name (filter, sort)",
+        f"    {path}?name",
+        f"    {path}?sort=-name",
+        '    auth.Permission: models.Index(fields=["name"], name="auth_permission_name_idx")',
+        "contenttypes.ContentType.model (filter)",
+        f"    {path}?content_type.model",
+        '    contenttypes.ContentType: models.Index(fields=["model"], name="django_content_type_model_idx")',
+        "3 of 6 filtered or sorted columns are not indexed",
+    ]
+
+
+def test_fail(db):
+    with pytest.raises(CommandError, match="3 of 6 filtered or sorted columns are not indexed"):
+        call_command("capyc_index_report", fail=True, stdout=StringIO())
+
+
+def test_declared_indexes():
+    assert ["content_type_id", "codename"] in capyc_index_report.get_declared_indexes(Permission)
+    assert ["name"] in capyc_index_report.get_declared_indexes(Group)
+
+
+def test_db_indexes(db):
+    assert ["app_label", "model"] in capyc_index_report.get_db_indexes(ContentType, "default")
@@ -0,0 +1,124 @@
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import Group, Permission
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIRequestFactory
+
+import capyc.pytest as capy
+from capyc.django import serializer as serializer_module
+from capyc.django.cache import settings as cache_settings
+from capyc.django.serializer import Serializer, prepare_serializers
+from capyc.management.commands import capyc_check
+
+
+@pytest.fixture
+def pending(monkeypatch: pytest.MonkeyPatch):
+    pending = []
+    monkeypatch.setattr(serializer_module, "PENDING_SERIALIZERS", pending)
+    yield pending
+
+
+def declare():
+    class GroupSerializer(Serializer):
+        model = Group
+        path = "/group"
+        fields = {
+            "default": ("id", "name"),
+        }
+        filters = ("name",)
+        lazy = True
+
+    class PermissionSerializer(Serializer):
+        model = Permission
+        path = "/permission"
+        fields = {
+            "default": ("id", "name"),
+            "lists": ("groups",),
+        }
+        rewrites = {
+            "group_set": "groups",
+        }
+        filters = ("name", "groups")
+        lazy = True
+        groups = GroupSerializer
+
+    return PermissionSerializer, GroupSerializer
+
+
+def declare_invalid():
+    class InvalidSerializer(Serializer):
+        model = Permission
+        path = "/permission"
+        fields = {
+            "default": ("id", "unknown"),
+        }
+        lazy = True
+
+    return InvalidSerializer
+
+
+def test_declare(pending):
+    PermissionSerializer, GroupSerializer = declare()
+
+    assert pending == [GroupSerializer, PermissionSerializer]
+    assert "_filter_index" not in PermissionSerializer.__dict__
+    assert "_filter_index" not in GroupSerializer.__dict__
+
+
+def test_prepared_on_first_use(database: capy.Database, pending, monkeypatch: pytest.MonkeyPatch):
+    model = database.create(permission=2, group=1)
+    model.group.permissions.set([model.permission[0]])
+    monkeypatch.setitem(cache_settings, "is_cache_enabled", False)
+
+    PermissionSerializer, GroupSerializer = declare()
+
+    factory = APIRequestFactory()
+    serializer = PermissionSerializer(request=factory.get(f"/notes/547/?groups.name={model.group.name}"))
+    content = json.loads(serializer.filter(id__in=[x.id for x in model.permission]).content)
+
+    assert [x["id"] for x in content["results"]] == [model.permission[0].id]
+    assert PermissionSerializer._filter_index["groups"][0] is GroupSerializer
+    assert pending == []
+
+
+def test_prepare_serializers(pending):
+    PermissionSerializer, GroupSerializer = declare()
+
+    assert prepare_serializers() == [GroupSerializer, PermissionSerializer]
+    assert PermissionSerializer._prepared is True
+    assert GroupSerializer._prepared is True
+    assert pending == []
+
+
+def test_invalid(pending):
+    InvalidSerializer = declare_invalid()
+
+    with pytest.raises(AssertionError, match="Field 'unknown' not found"):
+        InvalidSerializer()
+
+    assert "_prepared" not in InvalidSerializer.__dict__
+    assert pending == [InvalidSerializer]
+
+
+def test_capyc_check(pending, monkeypatch: pytest.MonkeyPatch):
+    serializers = list(declare())
+    monkeypatch.setattr(capyc_check, "get_serializers", lambda: serializers)
+
+    out = StringIO()
+    call_command("capyc_check", stdout=out)
+
+    assert out.getvalue() == "2 serializers are valid\n"
+    assert pending == []
+
+
+def test_capyc_check__invalid(pending, monkeypatch: pytest.MonkeyPatch):
+    serializers = [*declare(), declare_invalid()]
+    monkeypatch.setattr(capyc_check, "get_serializers", lambda: serializers)
+
+    err = StringIO()
+    with pytest.raises(CommandError, match="1 of 3 serializers are invalid"):
+        call_command("capyc_check", stdout=StringIO(), stderr=err)
+
+    assert "InvalidSerializer: Field 'unknown' not found" in err.getvalue()
@@ -0,0 +1,149 @@
+import json
+import logging
+
+import pytest
+from django.contrib.auth.models import Group, Permission
+from rest_framework.test import APIRequestFactory
+
+import capyc.pytest as capy
+from capyc.django import queries
+from capyc.django.cache import settings as cache_settings
+from capyc.django.queries import QueryBudgetExceeded
+from capyc.django.serializer import Serializer
+
+
+class GroupSerializer(Serializer):
+    model = Group
+    path = "/group"
+    fields = {
+        "default": ("id", "name"),
+    }
+    filters = ("name",)
+    depth = 2
+
+
+class PermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+        "expand_lists": ("groups[]",),
+    }
+    rewrites = {
+        "group_set": "groups",
+    }
+    filters = ("name", "groups")
+    depth = 2
+    query_budget = 2
+    groups = GroupSerializer
+
+
+class BatchPermissionSerializer(PermissionSerializer):
+    batch = True
+
+
+class StreamPermissionSerializer(PermissionSerializer):
+    stream = True
+
+
+@pytest.fixture(autouse=True)
+def setup(db, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(cache_settings, "is_cache_enabled", False)
+
+
+def test_within_budget(database: capy.Database, query_budget: capy.QueryBudget):
+    model = database.create(permission=2)
+
+    factory = APIRequestFactory()
+    serializer = PermissionSerializer(request=factory.get("/notes/547/"))
+
+    with query_budget(2):
+        response = serializer.filter(id__in=[x.id for x in model.permission])
+
+    assert len(json.loads(response.content)["results"]) == 2
+
+
+def test_exceeded(database: capy.Database, query_budget: capy.QueryBudget):
+    model = database.create(permission=6, group=1)
+
+    factory = APIRequestFactory()
+    serializer = PermissionSerializer(request=factory.get("/notes/547/?sets=expand_lists"))
+
+    with pytest.raises(QueryBudgetExceeded) as e:
+        serializer.filter(id__in=[x.id for x in model.permission])
+
+    assert "PermissionSerializer.filter ran 8 queries" in str(e.value)
+    assert "8 queries exceed the budget of 2" in str(e.value)
+    assert "6 queries with the same shape, a N+1 in: SELECT" in str(e.value)
+
+
+def test_batch(database: capy.Database, query_budget: capy.QueryBudget):
+    model = database.create(permission=6, group=1)
+
+    factory = APIRequestFactory()
+    serializer = BatchPermissionSerializer(request=factory.get("/notes/547/?sets=expand_lists"))
+
+    with pytest.raises(QueryBudgetExceeded, match="3 queries exceed the budget of 2") as e:
+        serializer.filter(id__in=[x.id for x in model.permission])
+
+    assert "N+1" not in str(e.value)
+
+
+def test_stream(database: capy.Database, query_budget: capy.QueryBudget):
+    model = database.create(permission=6, group=1)
+
+    factory = APIRequestFactory()
+    serializer = StreamPermissionSerializer(request=factory.get("/notes/547/?sets=expand_lists"))
+    response = serializer.filter(id__in=[x.id for x in model.permission])
+
+    # the queries run while the response is read
+    with pytest.raises(QueryBudgetExceeded) as e:
+        b"".join(response.streaming_content)
+
+    assert "StreamPermissionSerializer.filter ran 8 queries" in str(e.value)
+    assert "6 queries with the same shape, a N+1 in: SELECT" in str(e.value)
+
+
+def test_log(database: capy.Database, caplog: pytest.LogCaptureFixture):
+    model = database.create(permission=6, group=1)
+
+    factory = APIRequestFactory()
+    serializer = PermissionSerializer(request=factory.get("/notes/547/?sets=expand_lists"))
+
+    with caplog.at_level(logging.WARNING, logger="capyc.django.queries"):
+        response = serializer.filter(id__in=[x.id for x in model.permission])
+
+    assert len(json.loads(response.content)["results"]) == 6
+    assert "8 queries exceed the budget of 2" in caplog.text
+
+
+def test_disabled(database: capy.Database, monkeypatch: pytest.MonkeyPatch):
+    model = database.create(permission=6, group=1)
+    monkeypatch.setattr(PermissionSerializer, "query_budget", None)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the queries must not be recorded")
+
+    monkeypatch.setattr(queries.QueryRecorder, "__enter__", fail)
+
+    factory = APIRequestFactory()
+    serializer = PermissionSerializer(request=factory.get("/notes/547/?sets=expand_lists"))
+    serializer.filter(id__in=[x.id for x in model.permission])
+
+
+def test_fixture(database: capy.Database, query_budget: capy.QueryBudget):
+    database.create(group=6)
+
+    with query_budget(7, repeated=6):
+        for x in Group.objects.all():
+            list(Group.objects.filter(id=x.id))
+
+    with pytest.raises(AssertionError, match="^7 queries were done: 7 queries exceed the budget of 6$"):
+        with query_budget(6, repeated=6):
+            for x in Group.objects.all():
+                list(Group.objects.filter(id=x.id))
+
+    with pytest.raises(AssertionError, match="6 queries with the same shape, a N\\+1 in: SELECT"):
+        with query_budget():
+            for x in Group.objects.all():
+                list(Group.objects.filter(id=x.id))
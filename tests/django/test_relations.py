@@ -0,0 +1,283 @@
+import json
+
+import pytest
+from django.db import connection, models
+from rest_framework.test import APIRequestFactory
+
+from capyc.django.cache import settings as cache_settings
+from capyc.django.serializer import Serializer
+
+
+class Country(models.Model):
+    code = models.CharField(max_length=2, unique=True)
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = "capyc"
+
+
+class City(models.Model):
+    name = models.CharField(max_length=50)
+    country = models.ForeignKey(Country, to_field="code", on_delete=models.CASCADE)
+
+    class Meta:
+        app_label = "capyc"
+
+
+class Address(models.Model):
+    street = models.CharField(max_length=50)
+    city = models.ForeignKey(City, on_delete=models.CASCADE)
+
+    class Meta:
+        app_label = "capyc"
+
+
+class Letter(models.Model):
+    subject = models.CharField(max_length=50)
+    address = models.ForeignKey(Address, on_delete=models.CASCADE)
+
+    class Meta:
+        app_label = "capyc"
+
+
+MODELS = [Country, City, Address, Letter]
+
+
+class CountrySerializer(Serializer):
+    model = Country
+    path = "/country"
+    fields = {
+        "default": ("id", "code", "name"),
+    }
+    depth = 2
+
+
+class CitySerializer(Serializer):
+    model = City
+    path = "/city"
+    fields = {
+        "default": ("id", "name", "country"),
+        "expand": ("country[]",),
+    }
+    depth = 2
+
+    country = CountrySerializer
+
+
+class BatchCitySerializer(CitySerializer):
+    batch = True
+
+
+class ExpandedCitySerializer(CitySerializer):
+    fields = {
+        "default": ("id", "name", "country[]"),
+    }
+
+
+class AddressSerializer(Serializer):
+    model = Address
+    path = "/address"
+    fields = {
+        "default": ("id", "street", "city[]"),
+    }
+    depth = 2
+
+    city = ExpandedCitySerializer
+
+
+class CityAddressesSerializer(Serializer):
+    model = City
+    path = "/city"
+    fields = {
+        "default": ("addresses",),
+    }
+    rewrites = {
+        "address_set": "addresses",
+    }
+    depth = 2
+
+
+class AddressCitySerializer(Serializer):
+    model = Address
+    path = "/address"
+    fields = {
+        "default": ("id", "city[]"),
+    }
+    depth = 2
+    batch = True
+
+    city = CityAddressesSerializer
+
+
+class LetterSerializer(Serializer):
+    model = Letter
+    path = "/letter"
+    fields = {
+        "default": ("id", "subject", "address[]"),
+    }
+    depth = 3
+
+    address = AddressSerializer
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables(django_db_setup, django_db_blocker):
+    # the models of this module are not part of any migration
+    with django_db_blocker.unblock():
+        with connection.schema_editor() as editor:
+            for model in MODELS:
+                editor.create_model(model)
+
+    yield
+
+    with django_db_blocker.unblock():
+        with connection.schema_editor() as editor:
+            for model in reversed(MODELS):
+                editor.delete_model(model)
+
+
+@pytest.fixture(autouse=True)
+def setup(db, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(cache_settings, "is_cache_enabled", False)
+
+
+@pytest.fixture
+def cities():
+    # the primary keys of the countries do not match the order of their codes
+    countries = [Country.objects.create(code=x, name=x.upper()) for x in ["uy", "ar"]]
+    return [City.objects.create(name=f"city {x.code}", country=x) for x in countries]
+
+
+def serialize_country(country: Country) -> dict:
+    return {"id": country.id, "code": country.code, "name": country.name}
+
+
+class TestToField:
+    @pytest.mark.parametrize("serializer", [CitySerializer, BatchCitySerializer])
+    def test_pk(self, cities: list[City], serializer: type[Serializer], django_assert_num_queries):
+        factory = APIRequestFactory()
+
+        with django_assert_num_queries(2):
+            content = json.loads(serializer(request=factory.get("/notes/547/")).filter().content)
+
+        assert content["results"] == [{"id": x.id, "name": x.name, "country": x.country.id} for x in cities]
+
+    @pytest.mark.parametrize("serializer", [CitySerializer, BatchCitySerializer])
+    def test_expand(self, cities: list[City], serializer: type[Serializer], django_assert_num_queries):
+        factory = APIRequestFactory()
+
+        with django_assert_num_queries(2):
+            content = json.loads(serializer(request=factory.get("/notes/547/?sets=expand")).filter().content)
+
+        assert content["results"] == [
+            {"id": x.id, "name": x.name, "country": serialize_country(x.country)} for x in cities
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_expand__async(self, cities: list[City]):
+        factory = APIRequestFactory()
+
+        serializer = BatchCitySerializer(request=factory.get("/notes/547/?sets=expand"))
+        content = json.loads((await serializer.afilter()).content)
+
+        assert content["results"] == [
+            {"id": x.id, "name": x.name, "country": serialize_country(x.country)} for x in cities
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_expand__async__not_joined(self, cities: list[City]):
+        serializer = BatchCitySerializer(request=APIRequestFactory().get("/notes/547/?sets=expand"))
+        serializer._set_fields()
+        serializer._prefetch(City.objects.all())
+        serializer._get_plan(asynchronous=True)
+
+        # the countries that were not joined are fetched by their code
+        instances = [await City.objects.aget(id=x.id) for x in cities]
+        await serializer._aload_expansions(instances)
+
+        assert serializer._expanded["country"] == {x.country.code: serialize_country(x.country) for x in cities}
+
+
+class TestReverseList:
+    def test_pk_lists(self, cities: list[City], django_assert_num_queries):
+        addresses = [Address.objects.create(street="street", city=x) for x in cities for _ in range(2)]
+
+        factory = APIRequestFactory()
+
+        # the count, the page and the primary keys of the addresses of every city
+        with django_assert_num_queries(3):
+            content = json.loads(CityAddressesSerializer(request=factory.get("/notes/547/")).filter().content)
+
+        assert [x["addresses"]["results"] for x in content["results"]] == [
+            [y.id for y in addresses if y.city_id == x.id] for x in cities
+        ]
+
+
+class TestForwardChain:
+    def test_depth_3(self, cities: list[City], django_assert_num_queries):
+        letters = [
+            Letter.objects.create(subject=f"letter {x.id}", address=Address.objects.create(street="street", city=x))
+            for x in cities
+        ]
+
+        factory = APIRequestFactory()
+
+        # the count and a single query with the three joins
+        with django_assert_num_queries(2) as captured:
+            content = json.loads(LetterSerializer(request=factory.get("/notes/547/")).filter().content)
+
+        assert captured.captured_queries[1]["sql"].count("JOIN") == 3
+        assert content["results"] == [
+            {
+                "id": x.id,
+                "subject": x.subject,
+                "address": {
+                    "id": x.address.id,
+                    "street": x.address.street,
+                    "city": {
+                        "id": x.address.city.id,
+                        "name": x.address.city.name,
+                        "country": serialize_country(x.address.city.country),
+                    },
+                },
+            }
+            for x in letters
+        ]
+
+    def test_query_plan(self):
+        serializer = LetterSerializer(request=APIRequestFactory().get("/notes/547/"))
+        serializer._set_fields()
+        plan = serializer._get_query_plan()
+
+        assert plan.selected == ["address", "address__city", "address__city__country"]
+        assert plan.only == [
+            "address",
+            "address__city",
+            "address__city__country",
+            "address__city__country__code",
+            "address__city__country__id",
+            "address__city__country__name",
+            "address__city__id",
+            "address__city__name",
+            "address__id",
+            "address__street",
+            "id",
+            "subject",
+        ]
+
+    def test_only_lists(self, cities: list[City], django_assert_num_queries):
+        addresses = [Address.objects.create(street="street", city=x) for x in cities for _ in range(2)]
+
+        factory = APIRequestFactory()
+
+        # the count, the page with the join and the primary keys of the addresses of the cities
+        with django_assert_num_queries(3) as captured:
+            content = json.loads(AddressCitySerializer(request=factory.get("/notes/547/")).filter().content)
+
+        assert captured.captured_queries[1]["sql"].count("JOIN") == 1
+        assert [x["id"] for x in content["results"]] == [x.id for x in addresses]
+        assert [x["city"]["addresses"]["results"] for x in content["results"]] == [
+            [y.id for y in addresses if y.city_id == x.city_id] for x in addresses
+        ]
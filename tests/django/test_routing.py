@@ -0,0 +1,175 @@
+import json
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Group, Permission
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+import capyc.pytest as capy
+from capyc.django import routing
+from capyc.django import serializer as serializer_module
+from capyc.django.cache import delete_cache
+from capyc.django.cache import settings as cache_settings
+from capyc.django.serializer import Serializer
+
+
+class GroupSerializer(Serializer):
+    model = Group
+    path = "/group"
+    fields = {
+        "default": ("id", "name"),
+    }
+    filters = ("name",)
+    depth = 2
+
+
+class PermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+        "lists": ("groups",),
+        "expand_ids": ("content_type[]",),
+        "expand_lists": ("groups[]",),
+    }
+    rewrites = {
+        "group_set": "groups",
+    }
+    filters = ("name", "groups")
+    depth = 2
+    using = "replica"
+    groups = GroupSerializer
+
+
+class BatchPermissionSerializer(PermissionSerializer):
+    batch = True
+
+
+@pytest.fixture(autouse=True)
+def setup(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(routing.settings, "replicas", ["replica"])
+    monkeypatch.setitem(cache_settings, "is_cache_enabled", False)
+    token = routing.pinned_until.set(0.0)
+
+    yield
+
+    routing.pinned_until.reset(token)
+
+
+def count_queries(fn):
+    with CaptureQueriesContext(connections["default"]) as primary:
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            result = fn()
+
+    return result, len(primary), len(replica)
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+@pytest.mark.parametrize("serializer", [PermissionSerializer, BatchPermissionSerializer])
+@pytest.mark.parametrize("sets", ["lists", "expand_ids", "expand_lists"])
+def test_replica(database: capy.Database, serializer: type[Serializer], sets: str):
+    model = database.create(permission=2, group=2)
+    # the write pins the context to the primary
+    routing.pinned_until.set(0.0)
+
+    factory = APIRequestFactory()
+    response, primary, replica = count_queries(
+        lambda: serializer(request=factory.get(f"/notes/547/?sets={sets}")).filter(
+            id__in=[x.id for x in model.permission]
+        )
+    )
+
+    assert len(json.loads(response.content)["results"]) == 2
+    assert primary == 0
+    assert replica > 1
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_read_your_writes(database: capy.Database, signals: capy.Signals):
+    model = database.create(permission=2)
+    routing.pinned_until.set(0.0)
+    signals.enable()
+
+    model.permission[0].name = "changed"
+    model.permission[0].save()
+
+    factory = APIRequestFactory()
+    response, primary, replica = count_queries(
+        lambda: PermissionSerializer(request=factory.get("/notes/547/")).get(id=model.permission[0].id)
+    )
+
+    assert json.loads(response.content)["name"] == "changed"
+    assert primary == 1
+    assert replica == 0
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_primary_policy(database: capy.Database, monkeypatch: pytest.MonkeyPatch):
+    model = database.create(permission=1)
+    routing.pinned_until.set(0.0)
+    monkeypatch.setattr(PermissionSerializer, "using", "primary")
+
+    factory = APIRequestFactory()
+    _, primary, replica = count_queries(
+        lambda: PermissionSerializer(request=factory.get("/notes/547/")).get(id=model.permission.id)
+    )
+
+    assert primary == 1
+    assert replica == 0
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_invalidation_pins_the_serializer(database: capy.Database, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(cache_settings, "is_cache_enabled", True)
+    model = database.create(permission=1)
+    routing.pinned_until.set(0.0)
+
+    key = PermissionSerializer.get_serializer_path()
+    # only the first serializer of a model is registered, other test modules declare one too
+    monkeypatch.setitem(serializer_module.SERIALIZER_REGISTRY, "auth.Permission", {key})
+    monkeypatch.setitem(serializer_module.SERIALIZER_DEPTHS, key, PermissionSerializer.depth)
+
+    assert routing.get_read_database("replica", key) == "replica"
+
+    async_to_sync(delete_cache)("auth.Permission")
+
+    assert routing.get_read_database("replica", key) == "default"
+    assert routing.get_read_database("replica", GroupSerializer.get_serializer_path()) == "replica"
+
+    factory = APIRequestFactory()
+    _, primary, replica = count_queries(
+        lambda: PermissionSerializer(request=factory.get("/notes/547/")).get(id=model.permission.id)
+    )
+
+    assert primary == 1
+    assert replica == 0
+
+
+def test_middleware():
+    factory = RequestFactory()
+    middleware = routing.ReplicaMiddleware(lambda request: HttpResponse())
+
+    response = middleware(factory.get("/"))
+    assert routing.COOKIE not in response.cookies
+
+    def write(request):
+        routing.pin(10)
+        return HttpResponse()
+
+    response = routing.ReplicaMiddleware(write)(factory.get("/"))
+    until = float(response.cookies[routing.COOKIE].value)
+
+    assert until > time.time()
+    assert response.cookies[routing.COOKIE]["max-age"] == 10
+
+    def read(request):
+        assert routing.is_pinned()
+        return HttpResponse()
+
+    response = routing.ReplicaMiddleware(read)(factory.get("/", HTTP_COOKIE=f"{routing.COOKIE}={until}"))
+    assert routing.COOKIE not in response.cookies
@@ -1,24 +1,32 @@
 import gzip
 import json
+import re
+import time
 import zlib
 from datetime import timedelta
 from typing import Optional
+from urllib.parse import parse_qs, urlparse
 
 import brotli
 import pytest
 import zstandard
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.admin.models import LogEntry
 from django.contrib.auth.models import Group, Permission, User
 from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
-from django.http import HttpResponse
+from django.db import models
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date
 from django_redis import get_redis_connection
 from redis.lock import Lock
 from rest_framework.test import APIRequestFactory
 
 import capyc.pytest as capy
-from capyc.django.cache import reset_cache, settings
-from capyc.django.serializer import Serializer
+from capyc.django.cache import delete_cache, get_etag, get_modified_key, reset_cache, settings
+from capyc.django.serializer import SERIALIZER_DEPTHS, Serializer, get_plan_metrics
+from capyc.rest_framework.exceptions import ValidationException
 
 
 @pytest.fixture(autouse=True)
@@ -53,6 +61,10 @@ def compress(value: str, encoding: Optional[str] = None):
 
 
 def decompress(value: dict, encoding: Optional[str] = None):
+    # the validators change with every response, TestConditionalRequests covers them
+    value.get("headers", {}).pop("ETag", None)
+    value.get("headers", {}).pop("Last-Modified", None)
+
     if encoding == "gzip":
         value["content"] = gzip.decompress(value["content"]).decode("utf-8")
     elif encoding == "br":
@@ -178,6 +190,130 @@ class UserSerializer(Serializer):
     permissions = PermissionSerializer
 
 
+class CursorPermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+    }
+    filters = ("name",)
+    depth = 2
+    pagination = "cursor"
+
+
+class CursorUserSerializer(Serializer):
+    model = User
+    path = "/user"
+    fields = {
+        "default": ("id", "username"),
+    }
+    depth = 2
+    pagination = "cursor"
+
+
+class BatchPermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name", "content_type[]"),
+    }
+    depth = 2
+    content_type = ContentTypeSerializer
+
+
+class BatchGroupSerializer(Serializer):
+    model = Group
+    path = "/group"
+    fields = {
+        "default": ("id", "name"),
+        "expand_lists": ("permissions[]",),
+    }
+    depth = 2
+    batch = True
+
+    permissions = BatchPermissionSerializer
+
+
+class BatchNestedGroupSerializer(Serializer):
+    model = Group
+    path = "/group"
+    fields = {
+        "default": ("id", "name", "permissions[]"),
+    }
+    depth = 2
+
+    permissions = BatchPermissionSerializer
+
+
+class BatchUserSerializer(Serializer):
+    model = User
+    path = "/user"
+    fields = {
+        "default": ("id", "username"),
+        "expand_lists": ("groups[]",),
+    }
+    depth = 3
+    batch = True
+
+    groups = BatchNestedGroupSerializer
+
+
+class StreamPermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+        "lists": ("groups",),
+    }
+    rewrites = {
+        "group_set": "groups",
+    }
+    filters = ("name",)
+    depth = 2
+    stream = True
+
+    groups = GroupSerializer
+
+
+class StreamCursorPermissionSerializer(StreamPermissionSerializer):
+    pagination = "cursor"
+
+
+class ModifiedUserSerializer(Serializer):
+    model = User
+    path = "/user"
+    fields = {
+        "default": ("id", "username"),
+    }
+    depth = 2
+    last_modified_field = "last_login"
+
+
+class AggregatePermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+    }
+    filters = ("name",)
+    depth = 2
+    group_by = ("content_type",)
+    aggregations = ("count", "min:id", "max:id")
+
+
+class LogEntrySerializer(Serializer):
+    model = LogEntry
+    path = "/logentry"
+    fields = {
+        "default": ("id", "object_repr", "user[]", "content_type[]"),
+    }
+    depth = 2
+    sort_by = "id"
+
+    user = UserSerializer
+    content_type = ContentTypeSerializer
+
+
 # @pytest.fixture(autouse=True)
 # def setup(db):
 #     yield
@@ -322,7 +458,7 @@ class TestNoExpandFilter:
                 },
             )
 
-    # countselectm2m select * 2
+    # countselectm2m select
     def test_permission__two_sets__two_items__lists(self, database: capy.Database, django_assert_num_queries):
         model = database.create(permission=2, group=2)
 
@@ -331,7 +467,7 @@ class TestNoExpandFilter:
 
         serializer = PermissionSerializer(request=request)
 
-        with django_assert_num_queries(4) as captured:
+        with django_assert_num_queries(3) as captured:
             assert_response(
                 serializer.filter(id__in=[x.id for x in model.permission]),
                 {
@@ -372,6 +508,68 @@ class TestNoExpandFilter:
             )
 
 
+class TestNoExpandBatchedLists:
+
+    # countselectm2m select * 2
+    def test_user__two_lists__many_items(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(user=4, group=2, permission=3)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=lists")
+
+        serializer = UserSerializer(request=request)
+
+        with django_assert_num_queries(4) as captured:
+            response = serializer.filter(id__in=[x.id for x in model.user])
+
+        content = json.loads(response.content)
+
+        assert content["count"] == 4
+        for user, result in zip(model.user, content["results"]):
+            assert result["id"] == user.id
+            assert result["groups"]["count"] == 2
+            assert result["groups"]["results"] == sorted([x.id for x in user.groups.all()])
+            assert result["permissions"]["count"] == 3
+            assert result["permissions"]["results"] == [x.id for x in user.user_permissions.all()]
+
+    def test_user__default_ordering(self, database: capy.Database):
+        model = database.create(
+            user=1,
+            content_type=1,
+            permission=[{"codename": x, "content_type_id": 1} for x in ["c", "a", "b"]],
+        )
+
+        factory = APIRequestFactory()
+        serializer = UserSerializer(request=factory.get("/notes/547/?sets=lists"))
+        content = json.loads(serializer.filter(id=model.user.id).content)
+
+        # the same order as user.user_permissions.all(), sorted by codename
+        assert content["results"][0]["permissions"]["results"] == [
+            model.permission[1].id,
+            model.permission[2].id,
+            model.permission[0].id,
+        ]
+
+    # countselectm2m select
+    def test_permission__pks_limit(self, database: capy.Database, django_assert_num_queries, monkeypatch):
+        model = database.create(permission=2, group=3)
+        monkeypatch.setattr("capyc.django.serializer.PKS_LIMIT", 2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=lists")
+
+        serializer = PermissionSerializer(request=request)
+
+        with django_assert_num_queries(3) as captured:
+            response = serializer.filter(id__in=[x.id for x in model.permission])
+
+        content = json.loads(response.content)
+
+        for result in content["results"]:
+            assert result["groups"]["count"] == 3
+            assert result["groups"]["results"] == [model.group[0].id, model.group[1].id]
+
+
 class TestExpandGet:
     # selectm2m select
     def test_permission__default(self, database: capy.Database, django_assert_num_queries):
@@ -488,135 +686,1030 @@ class TestExpandFilter:
         factory = APIRequestFactory()
         request = factory.get("/notes/547/?sets=intro,expand_ids")
 
-        with django_assert_num_queries(2) as captured:
-            serializer = PermissionSerializer(request=request)
+        with django_assert_num_queries(2) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": 2,
+                    "first": "/permission?limit=20&offset=0",
+                    "last": "/permission?limit=20&offset=0",
+                    "next": None,
+                    "previous": None,
+                    "results": [
+                        {
+                            "id": model.permission[0].id,
+                            "name": model.permission[0].name,
+                            "content_type": {
+                                "id": model.permission[0].content_type.id,
+                                "app_label": model.permission[0].content_type.app_label,
+                            },
+                        },
+                        {
+                            "id": model.permission[1].id,
+                            "name": model.permission[1].name,
+                            "content_type": {
+                                "id": model.permission[1].content_type.id,
+                                "app_label": model.permission[1].content_type.app_label,
+                            },
+                        },
+                    ],
+                },
+            )
+
+    # countselectm2m select * 2
+    def test_permission__two_sets__lists(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=2, group=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=intro,expand_lists")
+
+        with django_assert_num_queries(4) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": 2,
+                    "first": "/permission?limit=20&offset=0",
+                    "last": "/permission?limit=20&offset=0",
+                    "next": None,
+                    "previous": None,
+                    "results": [
+                        {
+                            "id": model.permission[0].id,
+                            "name": model.permission[0].name,
+                            "groups": {
+                                "count": 2,
+                                "next": None,
+                                "previous": None,
+                                "first": f"/group?limit=20&offset=0&permissions.pk={model.permission[0].id}",
+                                "last": f"/group?limit=20&offset=0&permissions.pk={model.permission[0].id}",
+                                "results": [
+                                    {
+                                        "id": model.group[0].id,
+                                        "name": model.group[0].name,
+                                    },
+                                    {
+                                        "id": model.group[1].id,
+                                        "name": model.group[1].name,
+                                    },
+                                ],
+                            },
+                        },
+                        {
+                            "id": model.permission[1].id,
+                            "name": model.permission[1].name,
+                            "groups": {
+                                "count": 2,
+                                "next": None,
+                                "previous": None,
+                                "first": f"/group?limit=20&offset=0&permissions.pk={model.permission[1].id}",
+                                "last": f"/group?limit=20&offset=0&permissions.pk={model.permission[1].id}",
+                                "results": [
+                                    {
+                                        "id": model.group[0].id,
+                                        "name": model.group[0].name,
+                                    },
+                                    {
+                                        "id": model.group[1].id,
+                                        "name": model.group[1].name,
+                                    },
+                                ],
+                            },
+                        },
+                    ],
+                },
+            )
+
+
+class TestBatchExpandFilter:
+    def serialize_permission(self, permission: Permission):
+        return {
+            "id": permission.id,
+            "name": permission.name,
+            "content_type": {
+                "id": permission.content_type.id,
+                "app_label": permission.content_type.app_label,
+            },
+        }
+
+    # countselectm2m select
+    def test_group__expand_lists(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(group=3, permission=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=expand_lists")
+
+        with django_assert_num_queries(3) as captured:
+            serializer = BatchGroupSerializer(request=request)
+            response = serializer.filter(id__in=[x.id for x in model.group])
+
+        assert json.loads(response.content) == {
+            "count": 3,
+            "first": "/group?limit=20&offset=0",
+            "last": "/group?limit=20&offset=0",
+            "next": None,
+            "previous": None,
+            "results": [
+                {
+                    "id": group.id,
+                    "name": group.name,
+                    "permissions": {
+                        "count": 2,
+                        "first": f"/permission?limit=20&offset=0&permissions.pk={group.id}",
+                        "last": f"/permission?limit=20&offset=0&permissions.pk={group.id}",
+                        "next": None,
+                        "previous": None,
+                        "results": [self.serialize_permission(x) for x in model.permission],
+                    },
+                }
+                for group in model.group
+            ],
+        }
+
+    # countselectm2m selectm2m select
+    def test_user__depth_3(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(user=4, group=2, permission=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=expand_lists")
+
+        with django_assert_num_queries(4) as captured:
+            serializer = BatchUserSerializer(request=request)
+            response = serializer.filter(id__in=[x.id for x in model.user])
+
+        content = json.loads(response.content)
+
+        assert content["count"] == 4
+        for user, result in zip(model.user, content["results"]):
+            assert result["id"] == user.id
+            assert result["groups"]["count"] == 2
+            assert [x["id"] for x in result["groups"]["results"]] == [x.id for x in model.group]
+
+            for group in result["groups"]["results"]:
+                assert group["permissions"]["count"] == 2
+                assert group["permissions"]["results"] == [self.serialize_permission(x) for x in model.permission]
+
+    def test_group__per_parent_limit(self, database: capy.Database, monkeypatch):
+        model = database.create(group=2, permission=3)
+        monkeypatch.setattr("capyc.django.serializer.PAGE_LIMIT", 2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=expand_lists")
+
+        serializer = BatchGroupSerializer(request=request)
+        content = json.loads(serializer.filter(id__in=[x.id for x in model.group]).content)
+
+        for group, result in zip(model.group, content["results"]):
+            assert result["permissions"]["count"] == 3
+            assert result["permissions"]["results"] == [self.serialize_permission(x) for x in model.permission[:2]]
+
+
+class TestAsync:
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    @pytest.mark.parametrize("sets", ["extra,lists", "expand_ids", "expand_lists"])
+    async def test_permission__afilter(self, database: capy.Database, sets: str):
+        model = await database.acreate(permission=3, group=2)
+        ids = [x.id for x in model.permission]
+
+        factory = APIRequestFactory()
+
+        def get_expected():
+            serializer = PermissionSerializer(request=factory.get(f"/notes/547/?sets={sets}"))
+            return json.loads(serializer.filter(id__in=ids).content)
+
+        expected = await sync_to_async(get_expected)()
+
+        serializer = PermissionSerializer(request=factory.get(f"/notes/547/?sets={sets}"))
+        response = await serializer.afilter(id__in=ids)
+
+        assert json.loads(response.content) == expected
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_group__afilter__batch(self, database: capy.Database):
+        model = await database.acreate(group=3, permission=2)
+        ids = [x.id for x in model.group]
+
+        factory = APIRequestFactory()
+
+        def get_expected():
+            serializer = BatchGroupSerializer(request=factory.get("/notes/547/?sets=expand_lists"))
+            return json.loads(serializer.filter(id__in=ids).content)
+
+        expected = await sync_to_async(get_expected)()
+
+        serializer = BatchGroupSerializer(request=factory.get("/notes/547/?sets=expand_lists"))
+        response = await serializer.afilter(id__in=ids)
+
+        assert json.loads(response.content) == expected
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_permission__aget(self, database: capy.Database):
+        model = await database.acreate(permission=2)
+
+        factory = APIRequestFactory()
+        serializer = PermissionSerializer(request=factory.get("/notes/547/?sets=expand_ids"))
+        response = await serializer.aget(id=model.permission[1].id)
+
+        assert json.loads(response.content) == {
+            "id": model.permission[1].id,
+            "name": model.permission[1].name,
+            "content_type": {
+                "id": model.permission[1].content_type_id,
+                "app_label": await sync_to_async(lambda: model.permission[1].content_type.app_label)(),
+            },
+        }
+
+        serializer = PermissionSerializer(request=factory.get("/notes/547/"))
+        assert await serializer.aget(id=0) is None
+
+
+class TestGetMany:
+    def test_order(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=3)
+        ids = [model.permission[2].id, 0, model.permission[0].id, model.permission[2].id]
+
+        factory = APIRequestFactory()
+
+        with django_assert_num_queries(1):
+            serializer = PermissionSerializer(request=factory.get("/notes/547/?sets=extra"))
+            response = serializer.get_many([str(x) for x in ids])
+
+        assert json.loads(response.content) == [
+            {"id": model.permission[2].id, "name": model.permission[2].name, "codename": model.permission[2].codename},
+            None,
+            {"id": model.permission[0].id, "name": model.permission[0].name, "codename": model.permission[0].codename},
+            {"id": model.permission[2].id, "name": model.permission[2].name, "codename": model.permission[2].codename},
+        ]
+
+    def test_cached(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=3, group=2)
+        ids = [x.id for x in model.permission]
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=expand_ids,lists")
+
+        expected = json.loads(PermissionSerializer(request=request).get_many(ids[:2]).content)
+
+        # only the missing object is fetched with its content type, then its groups are listed
+        with django_assert_num_queries(2):
+            response = PermissionSerializer(request=request).get_many(ids)
+
+        content = json.loads(response.content)
+
+        assert content[:2] == expected
+        assert content[2] == json.loads(PermissionSerializer(request=request).get(id=ids[2]).content)
+
+        with django_assert_num_queries(0):
+            response = PermissionSerializer(request=request).get_many(ids[::-1])
+
+        assert json.loads(response.content) == content[::-1]
+
+    def test_invalid_id(self, database: capy.Database):
+        factory = APIRequestFactory()
+        serializer = PermissionSerializer(request=factory.get("/notes/547/"))
+
+        with pytest.raises(ValidationException, match="Invalid value for `ids`"):
+            serializer.get_many(["a"])
+
+    def test_compressed(self, database: capy.Database, overwrite_settings):
+        model = database.create(permission=3)
+        overwrite_settings("min_compression_size", 0)
+        ids = [x.id for x in model.permission]
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=extra", headers={"Accept-Encoding": "gzip"})
+
+        response = PermissionSerializer(request=request).get_many(ids)
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert [x["id"] for x in json.loads(gzip.decompress(response.content))] == ids
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_aget_many(self, database: capy.Database):
+        model = await database.acreate(permission=3, group=2)
+        ids = [model.permission[1].id, 0, model.permission[0].id]
+
+        factory = APIRequestFactory()
+
+        def get_expected():
+            serializer = PermissionSerializer(request=factory.get("/notes/547/?sets=expand_ids,lists"))
+            content = json.loads(serializer.get_many(ids).content)
+            cache.clear()
+            return content
+
+        expected = await sync_to_async(get_expected)()
+
+        serializer = PermissionSerializer(request=factory.get("/notes/547/?sets=expand_ids,lists"))
+        response = await serializer.aget_many(ids)
+
+        assert json.loads(response.content) == expected
+        assert expected[1] is None
+
+        serializer = PermissionSerializer(request=factory.get("/notes/547/?sets=expand_ids,lists"))
+        response = await serializer.aget_many(ids)
+
+        assert json.loads(response.content) == expected
+
+
+class TestSparseFields:
+    def test_columns(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?fields=id,codename&sets=extra")
+
+        with django_assert_num_queries(2) as captured:
+            response = PermissionSerializer(request=request).filter(id__in=[x.id for x in model.permission])
+
+        assert json.loads(response.content)["results"] == [
+            {"id": x.id, "codename": x.codename} for x in model.permission
+        ]
+        assert '"auth_permission"."name"' not in captured.captured_queries[1]["sql"]
+
+    def test_nested(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=1)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?fields=name,content_type.app_label")
+
+        with django_assert_num_queries(2) as captured:
+            response = PermissionSerializer(request=request).filter(id=model.permission.id)
+
+        assert json.loads(response.content)["results"] == [
+            {"name": model.permission.name, "content_type": {"app_label": model.permission.content_type.app_label}}
+        ]
+        assert '"django_content_type"."model"' not in captured.captured_queries[1]["sql"]
+
+    def test_nested_list(self, database: capy.Database):
+        model = database.create(permission=1, group=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?fields=id,groups.name")
+
+        response = PermissionSerializer(request=request).get(id=model.permission.id)
+        content = json.loads(response.content)
+
+        assert sorted(content) == ["groups", "id"]
+        assert content["groups"]["results"] == [{"name": x.name} for x in model.group]
+
+    @pytest.mark.parametrize("fields", ["unknown", "id,codename.name", "content_type.unknown"])
+    def test_invalid(self, database: capy.Database, fields: str):
+        factory = APIRequestFactory()
+        request = factory.get(f"/notes/547/?fields={fields}")
+
+        with pytest.raises(ValidationException, match="Invalid value for `fields`"):
+            PermissionSerializer(request=request).filter()
+
+    def test_too_deep(self, database: capy.Database):
+        factory = APIRequestFactory()
+
+        # the depth of PermissionSerializer is 2
+        request = factory.get("/notes/547/?fields=id,groups.permissions.content_type")
+
+        with pytest.raises(ValidationException, match="Invalid value for `fields`, permissions.content_type is deeper"):
+            PermissionSerializer(request=request).filter()
+
+    def test_cache_key(self, database: capy.Database):
+        model = database.create(permission=1)
+
+        factory = APIRequestFactory()
+
+        response1 = PermissionSerializer(request=factory.get("/notes/547/?fields=id")).get(id=model.permission.id)
+        response2 = PermissionSerializer(request=factory.get("/notes/547/?fields=name")).get(id=model.permission.id)
+
+        assert json.loads(response1.content) == {"id": model.permission.id}
+        assert json.loads(response2.content) == {"name": model.permission.name}
+
+
+class TestSerializationPlan:
+    def test_plan_is_reused(self, database: capy.Database):
+        database.create(permission=2, group=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=extra,ids,lists")
+
+        serializer1 = PermissionSerializer(request=request)
+        response1 = serializer1.filter()
+        cache.clear()
+
+        serializer2 = PermissionSerializer(request=request)
+        response2 = serializer2.filter()
+
+        assert serializer1._plan is serializer2._plan
+        assert json.loads(response1.content) == json.loads(response2.content)
+        assert [x[1] for x in serializer1._plan.entries] == sorted(["id", "name", "codename", "content_type", "groups"])
+        assert serializer1._plan.pk_lists == ["group_set"]
+
+    def test_plan_per_sets(self, database: capy.Database):
+        database.create(permission=1)
+
+        factory = APIRequestFactory()
+
+        serializer1 = PermissionSerializer(request=factory.get("/notes/547/?sets=extra"))
+        serializer1.filter()
+        cache.clear()
+
+        serializer2 = PermissionSerializer(request=factory.get("/notes/547/"))
+        serializer2.filter()
+
+        assert serializer1._plan is not serializer2._plan
+        assert [x[1] for x in serializer2._plan.entries] == ["id", "name"]
+
+    def test_values_without_expansions(self, database: capy.Database, monkeypatch: pytest.MonkeyPatch):
+        model = database.create(permission=2, group=2)
+
+        def from_db(*args, **kwargs):
+            raise AssertionError("the model must not be instantiated")
+
+        monkeypatch.setattr(Permission, "from_db", classmethod(from_db))
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=extra,ids,lists")
+
+        serializer = PermissionSerializer(request=request)
+        content = json.loads(serializer.filter(id__in=[x.id for x in model.permission]).content)
+
+        assert serializer._plan.columns == ["pk", "codename", "content_type_id", "__count_group_set", "id", "name"]
+        assert [x["id"] for x in content["results"]] == [x.id for x in model.permission]
+        assert [x["content_type"] for x in content["results"]] == [x.content_type.id for x in model.permission]
+        assert [x["groups"]["results"] for x in content["results"]] == [[1, 2], [1, 2]]
+
+    def test_instances_with_expansions(self, database: capy.Database):
+        database.create(permission=1)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sets=expand_ids")
+
+        serializer = PermissionSerializer(request=request)
+        serializer.filter()
+
+        assert serializer._plan.columns is None
+
+
+class TestSortBy:
+    # countselect
+    def test_permission__default(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=2, group=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?sort=-id")
+
+        with django_assert_num_queries(2) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": 2,
+                    "first": "/permission?limit=20&offset=0",
+                    "last": "/permission?limit=20&offset=0",
+                    "next": None,
+                    "previous": None,
+                    "results": [
+                        {
+                            "id": model.permission[1].id,
+                            "name": model.permission[1].name,
+                        },
+                        {
+                            "id": model.permission[0].id,
+                            "name": model.permission[0].name,
+                        },
+                    ],
+                },
+            )
+
+
+class TestPagination:
+    # countselect
+    def test_permission__limit_offset(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=5)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2&offset=2")
+
+        with django_assert_num_queries(2) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": 5,
+                    "first": "/permission?limit=2&offset=0",
+                    "last": "/permission?limit=2&offset=4",
+                    "next": "/permission?limit=2&offset=4",
+                    "previous": "/permission?limit=2&offset=0",
+                    "results": [
+                        {
+                            "id": model.permission[2].id,
+                            "name": model.permission[2].name,
+                        },
+                        {
+                            "id": model.permission[3].id,
+                            "name": model.permission[3].name,
+                        },
+                    ],
+                },
+            )
+
+    # countselect
+    def test_permission__last_page(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=5)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2&offset=4")
+
+        with django_assert_num_queries(2) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": 5,
+                    "first": "/permission?limit=2&offset=0",
+                    "last": "/permission?limit=2&offset=4",
+                    "next": None,
+                    "previous": "/permission?limit=2&offset=2",
+                    "results": [
+                        {
+                            "id": model.permission[4].id,
+                            "name": model.permission[4].name,
+                        },
+                    ],
+                },
+            )
+
+    def test_permission__limit_is_capped(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=100000")
+
+        with django_assert_num_queries(2) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": 2,
+                    "first": "/permission?limit=200&offset=0",
+                    "last": "/permission?limit=200&offset=0",
+                    "next": None,
+                    "previous": None,
+                    "results": [
+                        {
+                            "id": model.permission[0].id,
+                            "name": model.permission[0].name,
+                        },
+                        {
+                            "id": model.permission[1].id,
+                            "name": model.permission[1].name,
+                        },
+                    ],
+                },
+            )
+
+    @pytest.mark.parametrize("query", ["limit=abc", "limit=0", "offset=-1"])
+    def test_permission__invalid_values(self, database: capy.Database, query):
+        model = database.create(permission=2)
+
+        factory = APIRequestFactory()
+        request = factory.get(f"/notes/547/?{query}")
+
+        serializer = PermissionSerializer(request=request)
+
+        with pytest.raises(ValidationException):
+            serializer.filter(id__in=[x.id for x in model.permission])
+
+
+class TestCountPolicy:
+    # select
+    def test_permission__none(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=3)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2&count=none")
+
+        with django_assert_num_queries(1) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": None,
+                    "has_more": True,
+                    "first": "/permission?limit=2&offset=0",
+                    "last": None,
+                    "next": "/permission?limit=2&offset=2",
+                    "previous": None,
+                    "results": [{"id": x.id, "name": x.name} for x in model.permission[:2]],
+                },
+            )
+
+    # select
+    def test_permission__none__last_page(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=3)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2&offset=2&count=none")
+
+        with django_assert_num_queries(1) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": None,
+                    "has_more": False,
+                    "first": "/permission?limit=2&offset=0",
+                    "last": None,
+                    "next": None,
+                    "previous": "/permission?limit=2&offset=0",
+                    "results": [{"id": x.id, "name": x.name} for x in model.permission[2:]],
+                },
+            )
+
+    # select
+    def test_permission__estimate(self, database: capy.Database, django_assert_num_queries, monkeypatch):
+        model = database.create(permission=3)
+        monkeypatch.setattr(PermissionSerializer, "_estimate_count", lambda self, qs: 100)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2&offset=2&count=estimate")
+
+        with django_assert_num_queries(1) as captured:
+            serializer = PermissionSerializer(request=request)
+
+            assert_response(
+                serializer.filter(id__in=[x.id for x in model.permission]),
+                {
+                    "count": 100,
+                    "first": "/permission?limit=2&offset=0",
+                    "last": "/permission?limit=2&offset=98",
+                    "next": None,
+                    "previous": "/permission?limit=2&offset=0",
+                    "results": [{"id": x.id, "name": x.name} for x in model.permission[2:]],
+                },
+            )
+
+    # countselect
+    def test_permission__estimate__unsupported_database(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=3)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2&count=estimate")
+
+        with django_assert_num_queries(2) as captured:
+            serializer = PermissionSerializer(request=request)
+            content = json.loads(serializer.filter(id__in=[x.id for x in model.permission]).content)
+
+        assert content["count"] == 3
+        assert content["next"] == "/permission?limit=2&offset=2"
+
+    # select
+    def test_permission__request_cannot_ask_a_more_expensive_count(
+        self, database: capy.Database, django_assert_num_queries, monkeypatch
+    ):
+        model = database.create(permission=3)
+        monkeypatch.setattr(PermissionSerializer, "count_policy", "none")
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?count=exact")
+
+        with django_assert_num_queries(1) as captured:
+            serializer = PermissionSerializer(request=request)
+            content = json.loads(serializer.filter(id__in=[x.id for x in model.permission]).content)
+
+        assert content["count"] is None
+        assert content["has_more"] is False
+
+    def test_permission__invalid_policy(self, database: capy.Database):
+        model = database.create(permission=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?count=abc")
+
+        serializer = PermissionSerializer(request=request)
+
+        with pytest.raises(ValidationException):
+            serializer.filter(id__in=[x.id for x in model.permission])
+
+
+class TestCursorPagination:
+    def get_cursor(self, link: str) -> str:
+        return parse_qs(urlparse(link).query)["cursor"][0]
+
+    # countselect
+    def test_permission__pages(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=5)
+        ids = [x.id for x in model.permission]
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2")
+
+        with django_assert_num_queries(2) as captured:
+            serializer = CursorPermissionSerializer(request=request)
+            response = serializer.filter(id__in=ids)
+
+        content = json.loads(response.content)
+        cursor = self.get_cursor(content["next"])
+
+        assert content == {
+            "count": 5,
+            "first": "/permission?limit=2",
+            "last": None,
+            "next": f"/permission?limit=2&cursor={cursor}",
+            "previous": None,
+            "results": [{"id": x.id, "name": x.name} for x in model.permission[:2]],
+        }
+
+        request = factory.get(f"/notes/547/?limit=2&cursor={cursor}")
+
+        with django_assert_num_queries(2) as captured:
+            serializer = CursorPermissionSerializer(request=request)
+            response = serializer.filter(id__in=ids)
+
+        content = json.loads(response.content)
+        cursor = self.get_cursor(content["next"])
+
+        assert content["results"] == [{"id": x.id, "name": x.name} for x in model.permission[2:4]]
+
+        request = factory.get(f"/notes/547/?limit=2&cursor={cursor}")
+        serializer = CursorPermissionSerializer(request=request)
+        content = json.loads(serializer.filter(id__in=ids).content)
+
+        assert content["next"] is None
+        assert content["results"] == [{"id": x.id, "name": x.name} for x in model.permission[4:]]
+
+    def test_permission__sort_with_ties(self, database: capy.Database):
+        model = database.create(permission=[{"name": "b"}, {"name": "a"}, {"name": "b"}, {"name": "a"}])
+        ids = [x.id for x in model.permission]
+        expected = sorted(model.permission, key=lambda x: (x.name, x.id), reverse=True)
+
+        factory = APIRequestFactory()
+        results = []
+        cursor = None
+        while True:
+            query = "/notes/547/?limit=1&sort=-name"
+            if cursor:
+                query += f"&cursor={cursor}"
+
+            serializer = CursorPermissionSerializer(request=factory.get(query))
+            content = json.loads(serializer.filter(id__in=ids).content)
+            results += content["results"]
+
+            if content["next"] is None:
+                break
+
+            cursor = self.get_cursor(content["next"])
+
+        assert results == [{"id": x.id, "name": x.name} for x in expected]
+
+    @pytest.mark.parametrize("sort", ["last_login", "-last_login"])
+    def test_user__nullable_sort(self, database: capy.Database, sort: str):
+        now = timezone.now()
+        model = database.create(
+            user=[{"last_login": x} for x in [None, now, None, now - timedelta(days=1), now]],
+        )
+        ids = [x.id for x in model.user]
+
+        # the nulls go last, and first when the order is descending
+        expected = sorted(model.user, key=lambda x: (x.last_login is None, x.last_login or now, x.id))
+        if sort.startswith("-"):
+            expected.reverse()
+
+        factory = APIRequestFactory()
+        results = []
+        cursor = None
+        while True:
+            query = f"/notes/547/?limit=1&sort={sort}"
+            if cursor:
+                query += f"&cursor={cursor}"
+
+            serializer = CursorUserSerializer(request=factory.get(query))
+            content = json.loads(serializer.filter(id__in=ids).content)
+            results += content["results"]
+
+            if content["next"] is None or len(results) > len(ids):
+                break
+
+            cursor = self.get_cursor(content["next"])
+
+        assert results == [{"id": x.id, "username": x.username} for x in expected]
+
+    def test_permission__invalid_cursor(self, database: capy.Database):
+        model = database.create(permission=2)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?cursor=abc")
+
+        serializer = CursorPermissionSerializer(request=request)
+
+        with pytest.raises(ValidationException):
+            serializer.filter(id__in=[x.id for x in model.permission])
+
+    def test_permission__cursor_in_cache_key(self, database: capy.Database, overwrite_settings):
+        model = database.create(permission=3)
+        overwrite_settings("is_cache_enabled", True)
+        ids = [x.id for x in model.permission]
+
+        factory = APIRequestFactory()
+        serializer = CursorPermissionSerializer(request=factory.get("/notes/547/?limit=1"))
+        cursor = self.get_cursor(json.loads(serializer.filter(id__in=ids).content)["next"])
+
+        serializer = CursorPermissionSerializer(request=factory.get(f"/notes/547/?limit=1&cursor={cursor}"))
+        content = json.loads(serializer.filter(id__in=ids).content)
+
+        assert content["results"] == [{"id": model.permission[1].id, "name": model.permission[1].name}]
+        assert len(cache.keys("*")) == 4
+        assert any(f"cursor={cursor}" in key for key in cache.keys("*"))
+
+
+class TestStreaming:
+    def test_permission__pages(self, database: capy.Database):
+        model = database.create(permission=3, group=2)
+        ids = [x.id for x in model.permission]
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2&sets=lists")
+
+        serializer = StreamPermissionSerializer(request=request)
+        response = serializer.filter(id__in=ids)
+
+        assert isinstance(response, StreamingHttpResponse)
+        assert json.loads(b"".join(response.streaming_content)) == {
+            "count": 3,
+            "first": "/permission?limit=2&offset=0",
+            "last": "/permission?limit=2&offset=2",
+            "next": "/permission?limit=2&offset=2",
+            "previous": None,
+            "results": [
+                {
+                    "id": x.id,
+                    "name": x.name,
+                    "groups": {
+                        "count": 2,
+                        "next": None,
+                        "previous": None,
+                        "first": f"/group?limit=20&offset=0&permissions.pk={x.id}",
+                        "last": f"/group?limit=20&offset=0&permissions.pk={x.id}",
+                        "results": [1, 2],
+                    },
+                }
+                for x in model.permission[:2]
+            ],
+        }
+
+    def test_permission__cursor(self, database: capy.Database):
+        model = database.create(permission=3)
+        ids = [x.id for x in model.permission]
+
+        factory = APIRequestFactory()
+        serializer = StreamCursorPermissionSerializer(request=factory.get("/notes/547/?limit=2"))
+        content = json.loads(b"".join(serializer.filter(id__in=ids).streaming_content))
+        cursor = parse_qs(urlparse(content["next"]).query)["cursor"][0]
+
+        assert content["results"] == [{"id": x.id, "name": x.name} for x in model.permission[:2]]
+
+        serializer = StreamCursorPermissionSerializer(request=factory.get(f"/notes/547/?limit=2&cursor={cursor}"))
+        content = json.loads(b"".join(serializer.filter(id__in=ids).streaming_content))
+
+        assert content["next"] is None
+        assert content["results"] == [{"id": x.id, "name": x.name} for x in model.permission[2:]]
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br", "deflate", "zstd"])
+    def test_permission__compressed_and_cached(self, database: capy.Database, overwrite_settings, encoding):
+        model = database.create(permission=2)
+        overwrite_settings("is_cache_enabled", True)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/", headers={"Accept-Encoding": encoding})
+
+        serializer = StreamPermissionSerializer(request=request)
+        response = serializer.filter(id__in=[x.id for x in model.permission])
+        content = b"".join(response.streaming_content)
+
+        expected = {
+            "count": 2,
+            "first": "/permission?limit=20&offset=0",
+            "last": "/permission?limit=20&offset=0",
+            "next": None,
+            "previous": None,
+            "results": [{"id": x.id, "name": x.name} for x in model.permission],
+        }
+
+        assert response["Content-Encoding"] == encoding
+
+        # a streamed zstd frame does not include its size
+        if encoding == "zstd":
+            raw = zstandard.ZstdDecompressor().decompressobj().decompress(content)
+            assert json.loads(raw) == expected
+        else:
+            raw = {"gzip": gzip.decompress, "br": brotli.decompress, "deflate": zlib.decompress}[encoding](content)
+            assert decompress({"content": content}, encoding=encoding) == {"content": expected}
+
+        key = [x for x in cache.keys("*") if not x.endswith("__meta")][0]
+        headers = {
+            "Cache-Control": "public",
+            "Content-Type": "application/json",
+            "Content-Encoding": encoding,
+            "ETag": get_etag(raw, encoding),
+            "Last-Modified": cache.get(key)["headers"]["Last-Modified"],
+        }
+
+        assert cache.get(key) == {"content": content, "headers": headers}
+        assert cache.get(f"{key}__meta") == headers
+
+    def test_permission__not_modified(self, database: capy.Database, overwrite_settings):
+        model = database.create(permission=2)
+        overwrite_settings("is_cache_enabled", True)
+
+        ids = [x.id for x in model.permission]
+        factory = APIRequestFactory()
+
+        response = StreamPermissionSerializer(request=factory.get("/notes/547/")).filter(id__in=ids)
+        b"".join(response.streaming_content)
+
+        # the validators are known at the end of the stream, the responses served from the cache include them
+        response = StreamPermissionSerializer(request=factory.get("/notes/547/")).filter(id__in=ids)
+        assert response.status_code == 200
+
+        request = factory.get("/notes/547/", headers={"If-None-Match": response["ETag"]})
+        response = StreamPermissionSerializer(request=request).filter(id__in=ids)
+        assert response.status_code == 304
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    @pytest.mark.parametrize("serializer", [StreamPermissionSerializer, StreamCursorPermissionSerializer])
+    async def test_permission__async(self, database: capy.Database, overwrite_settings, serializer: type[Serializer]):
+        model = await database.acreate(permission=3, group=2)
+        overwrite_settings("is_cache_enabled", False)
+        ids = [x.id for x in model.permission]
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/?limit=2&sets=lists")
+
+        # the chunks are read by an async iterator, so ASGI does not buffer the response
+        response = await serializer(request=request).afilter(id__in=ids)
+        assert isinstance(response, StreamingHttpResponse)
+        assert response.is_async is True
+
+        content = b"".join([x async for x in response.streaming_content])
+
+        def get_expected():
+            return b"".join(serializer(request=request).filter(id__in=ids).streaming_content)
 
-            assert_response(
-                serializer.filter(id__in=[x.id for x in model.permission]),
-                {
-                    "count": 2,
-                    "first": "/permission?limit=20&offset=0",
-                    "last": "/permission?limit=20&offset=0",
-                    "next": None,
-                    "previous": None,
-                    "results": [
-                        {
-                            "id": model.permission[0].id,
-                            "name": model.permission[0].name,
-                            "content_type": {
-                                "id": model.permission[0].content_type.id,
-                                "app_label": model.permission[0].content_type.app_label,
-                            },
-                        },
-                        {
-                            "id": model.permission[1].id,
-                            "name": model.permission[1].name,
-                            "content_type": {
-                                "id": model.permission[1].content_type.id,
-                                "app_label": model.permission[1].content_type.app_label,
-                            },
-                        },
-                    ],
-                },
-            )
+        expected = await sync_to_async(get_expected)()
 
-    # countselectm2m select * 2
-    def test_permission__two_sets__lists(self, database: capy.Database, django_assert_num_queries):
-        model = database.create(permission=2, group=2)
+        assert content == expected
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_permission__async__compressed_and_cached(self, database: capy.Database, overwrite_settings):
+        model = await database.acreate(permission=2)
+        overwrite_settings("is_cache_enabled", True)
 
         factory = APIRequestFactory()
-        request = factory.get("/notes/547/?sets=intro,expand_lists")
+        request = factory.get("/notes/547/", headers={"Accept-Encoding": "gzip"})
 
-        with django_assert_num_queries(4) as captured:
-            serializer = PermissionSerializer(request=request)
+        serializer = StreamPermissionSerializer(request=request)
+        response = await serializer.afilter(id__in=[x.id for x in model.permission])
+        content = b"".join([x async for x in response.streaming_content])
 
-            assert_response(
-                serializer.filter(id__in=[x.id for x in model.permission]),
-                {
-                    "count": 2,
-                    "first": "/permission?limit=20&offset=0",
-                    "last": "/permission?limit=20&offset=0",
-                    "next": None,
-                    "previous": None,
-                    "results": [
-                        {
-                            "id": model.permission[0].id,
-                            "name": model.permission[0].name,
-                            "groups": {
-                                "count": 2,
-                                "next": None,
-                                "previous": None,
-                                "first": f"/group?limit=20&offset=0&permissions.pk={model.permission[0].id}",
-                                "last": f"/group?limit=20&offset=0&permissions.pk={model.permission[0].id}",
-                                "results": [
-                                    {
-                                        "id": model.group[0].id,
-                                        "name": model.group[0].name,
-                                    },
-                                    {
-                                        "id": model.group[1].id,
-                                        "name": model.group[1].name,
-                                    },
-                                ],
-                            },
-                        },
-                        {
-                            "id": model.permission[1].id,
-                            "name": model.permission[1].name,
-                            "groups": {
-                                "count": 2,
-                                "next": None,
-                                "previous": None,
-                                "first": f"/group?limit=20&offset=0&permissions.pk={model.permission[1].id}",
-                                "last": f"/group?limit=20&offset=0&permissions.pk={model.permission[1].id}",
-                                "results": [
-                                    {
-                                        "id": model.group[0].id,
-                                        "name": model.group[0].name,
-                                    },
-                                    {
-                                        "id": model.group[1].id,
-                                        "name": model.group[1].name,
-                                    },
-                                ],
-                            },
-                        },
-                    ],
-                },
-            )
+        assert response["Content-Encoding"] == "gzip"
+        assert decompress({"content": content}, encoding="gzip") == {
+            "content": {
+                "count": 2,
+                "first": "/permission?limit=20&offset=0",
+                "last": "/permission?limit=20&offset=0",
+                "next": None,
+                "previous": None,
+                "results": [{"id": x.id, "name": x.name} for x in model.permission],
+            }
+        }
 
+        key = [x for x in await sync_to_async(cache.keys)("*") if not x.endswith("__meta")][0]
+        res = await cache.aget(key)
 
-class TestSortBy:
-    # countselect
-    def test_permission__default(self, database: capy.Database, django_assert_num_queries):
-        model = database.create(permission=2, group=2)
+        assert res["content"] == content
+        assert await cache.aget(f"{key}__meta") == res["headers"]
 
-        factory = APIRequestFactory()
-        request = factory.get("/notes/547/?sort=-id")
+    def test_permission__too_big_to_cache(self, database: capy.Database, overwrite_settings):
+        model = database.create(permission=2)
+        overwrite_settings("is_cache_enabled", True)
+        overwrite_settings("max_stream_cache_size", 0)
 
-        with django_assert_num_queries(2) as captured:
-            serializer = PermissionSerializer(request=request)
+        factory = APIRequestFactory()
+        serializer = StreamPermissionSerializer(request=factory.get("/notes/547/"))
+        b"".join(serializer.filter(id__in=[x.id for x in model.permission]).streaming_content)
 
-            assert_response(
-                serializer.filter(id__in=[x.id for x in model.permission]),
-                {
-                    "count": 2,
-                    "first": "/permission?limit=20&offset=0",
-                    "last": "/permission?limit=20&offset=0",
-                    "next": None,
-                    "previous": None,
-                    "results": [
-                        {
-                            "id": model.permission[1].id,
-                            "name": model.permission[1].name,
-                        },
-                        {
-                            "id": model.permission[0].id,
-                            "name": model.permission[0].name,
-                        },
-                    ],
-                },
-            )
+        assert cache.keys("*") == []
 
 
 class TestFilter:
@@ -1119,6 +2212,368 @@ class TestFilter:
             )
 
 
+class TestFilterCompiler:
+    def test_index(self):
+        index = PermissionSerializer._filter_index
+
+        assert index["content_type"] == (ContentTypeSerializer, ["content_type"])
+        assert index["groups"][0] is GroupSerializer
+        assert index["groups.permissions"][0] is PermissionSerializerDuplicate
+        assert index["groups.permissions.content_type"][0] is ContentTypeSerializer
+        assert index["groups.permissions.content_type"][1] == index["groups"][1] + ["permissions", "content_type"]
+
+    def test_compiled_once(self, database: capy.Database, overwrite_settings, fake: capy.Fake):
+        model = database.create(permission=2, group=2)
+        model.group[0].permissions.set([model.permission[0]])
+        overwrite_settings("is_cache_enabled", False)
+
+        name = fake.slug()
+        ids = [x.id for x in model.permission]
+        factory = APIRequestFactory()
+        query = f"/notes/547/?groups.name={model.group[0].name}&name!={name}&limit=5"
+
+        info = PermissionSerializer._compile_filters.cache_info()
+        for _ in range(2):
+            serializer = PermissionSerializer(request=factory.get(query))
+            content = json.loads(serializer.filter(id__in=ids).content)
+
+            assert [x["id"] for x in content["results"]] == [model.permission[0].id]
+
+        assert PermissionSerializer._compile_filters.cache_info().misses == info.misses + 1
+        assert PermissionSerializer._compile_filters.cache_info().hits == info.hits + 1
+
+    def test_compiled_once__any_order(self, database: capy.Database, overwrite_settings, fake: capy.Fake):
+        model = database.create(permission=2, group=2)
+        model.group[0].permissions.set([model.permission[0]])
+        overwrite_settings("is_cache_enabled", False)
+
+        filters = [f"groups.name={model.group[0].name}", f"name!={fake.slug()}"]
+        ids = [x.id for x in model.permission]
+        factory = APIRequestFactory()
+
+        metrics = get_plan_metrics()
+        for query in ["&".join(filters), "&".join(reversed(filters))]:
+            serializer = PermissionSerializer(request=factory.get(f"/notes/547/?{query}"))
+            content = json.loads(serializer.filter(id__in=ids).content)
+
+            assert [x["id"] for x in content["results"]] == [model.permission[0].id]
+
+        result = get_plan_metrics()
+
+        assert result["filters"]["misses"] == metrics["filters"]["misses"] + 1
+        assert result["filters"]["hits"] == metrics["filters"]["hits"] + 1
+
+    def test_unknown_path(self, database: capy.Database, overwrite_settings):
+        model = database.create(permission=2)
+        overwrite_settings("is_cache_enabled", False)
+
+        factory = APIRequestFactory()
+        serializer = PermissionSerializer(request=factory.get("/notes/547/?groups.unknown.name=x"))
+        content = json.loads(serializer.filter(id__in=[x.id for x in model.permission]).content)
+
+        assert content["count"] == 2
+
+
+class TestQueryPlan:
+    def test_compiled_once(self, database: capy.Database, overwrite_settings):
+        model = database.create(permission=2, group=2)
+        model.group[0].permissions.set([model.permission[0]])
+        overwrite_settings("is_cache_enabled", False)
+
+        ids = [x.id for x in model.permission]
+        factory = APIRequestFactory()
+        query = "/notes/547/?sets=extra,expand_ids,expand_lists"
+
+        expected = None
+        metrics = get_plan_metrics()
+        for _ in range(2):
+            serializer = PermissionSerializer(request=factory.get(query))
+            content = json.loads(serializer.filter(id__in=ids).content)
+
+            if expected is None:
+                expected = content
+
+            assert content == expected
+
+        result = get_plan_metrics()
+
+        assert result["queries"]["misses"] - metrics["queries"]["misses"] <= 3
+        assert result["queries"]["hits"] > metrics["queries"]["hits"]
+        assert result["fields"]["hits"] > metrics["fields"]["hits"]
+
+    def test_forward_expansions(self, database: capy.Database, overwrite_settings, django_assert_num_queries):
+        model = database.create(
+            user=2, content_type=1, log_entry=[{"user_id": x, "content_type_id": 1} for x in [1, 2]]
+        )
+        overwrite_settings("is_cache_enabled", False)
+
+        factory = APIRequestFactory()
+        serializer = LogEntrySerializer(request=factory.get("/notes/547/"))
+
+        # the count and a single query with both joins
+        with django_assert_num_queries(2) as captured:
+            content = json.loads(serializer.filter(id__in=[x.id for x in model.log_entry]).content)
+
+        assert captured.captured_queries[1]["sql"].count("JOIN") == 2
+        assert content["results"] == [
+            {
+                "id": x.id,
+                "object_repr": x.object_repr,
+                "user": {"id": x.user.id, "username": x.user.username},
+                "content_type": {"id": x.content_type.id, "app_label": x.content_type.app_label},
+            }
+            for x in model.log_entry
+        ]
+
+        serializer = LogEntrySerializer(request=factory.get("/notes/547/"))
+        serializer._set_fields()
+        plan = serializer._get_query_plan()
+
+        assert plan.selected == ["content_type", "user"]
+        assert plan.only == [
+            "content_type",
+            "content_type__app_label",
+            "content_type__id",
+            "id",
+            "object_repr",
+            "user",
+            "user__id",
+            "user__username",
+        ]
+
+    def test_nothing_to_join(self):
+        serializer = PermissionSerializer(request=APIRequestFactory().get("/notes/547/"))
+        serializer._set_fields()
+
+        # select_related() without fields would join every foreign key
+        assert "JOIN" not in str(serializer._prefetch(Permission.objects.order_by("id")).query)
+
+    def test_metrics(self):
+        metrics = get_plan_metrics()
+
+        assert list(metrics) == ["fields", "queries", "plans", "filters", "aggregations"]
+        for value in metrics.values():
+            assert list(value) == ["hits", "misses", "size"]
+
+
+class TestAggregations:
+    def test_group_by(self, database: capy.Database, overwrite_settings, django_assert_num_queries):
+        model = database.create(permission=3, content_type=2)
+        overwrite_settings("is_cache_enabled", False)
+
+        for permission, content_type in zip(model.permission, [0, 1, 1]):
+            permission.content_type = model.content_type[content_type]
+            permission.save()
+
+        ids = [x.id for x in model.permission]
+        factory = APIRequestFactory()
+
+        with django_assert_num_queries(1):
+            serializer = AggregatePermissionSerializer(
+                request=factory.get("/notes/547/?group_by=content_type&agg=count,max:id")
+            )
+            content = json.loads(serializer.filter(id__in=ids).content)
+
+        assert content == [
+            {"content_type": model.content_type[0].id, "count": 1, "max_id": model.permission[0].id},
+            {"content_type": model.content_type[1].id, "count": 2, "max_id": model.permission[2].id},
+        ]
+
+    def test_aggregate(self, database: capy.Database, overwrite_settings, django_assert_num_queries):
+        model = database.create(permission=3)
+        overwrite_settings("is_cache_enabled", False)
+
+        ids = [x.id for x in model.permission]
+        factory = APIRequestFactory()
+
+        with django_assert_num_queries(1):
+            serializer = AggregatePermissionSerializer(
+                request=factory.get(f"/notes/547/?agg=count,min:id&name={model.permission[1].name}")
+            )
+            content = json.loads(serializer.filter(id__in=ids).content)
+
+        assert content == {"count": 1, "min_id": model.permission[1].id}
+
+    def test_cached(self, database: capy.Database, django_assert_num_queries):
+        model = database.create(permission=2)
+
+        ids = [x.id for x in model.permission]
+        factory = APIRequestFactory()
+
+        serializer = AggregatePermissionSerializer(request=factory.get("/notes/547/?agg=count"))
+        expected = json.loads(serializer.filter(id__in=ids).content)
+
+        with django_assert_num_queries(0):
+            serializer = AggregatePermissionSerializer(request=factory.get("/notes/547/?agg=count"))
+            assert json.loads(serializer.filter(id__in=ids).content) == expected == {"count": 2}
+
+    @pytest.mark.parametrize(
+        "query, message",
+        [
+            ("agg=sum:id", "Invalid value for `agg`, sum:id is not supported"),
+            ("agg=count&group_by=name", "Invalid value for `group_by`, name is not supported"),
+            ("group_by=content_type", "`group_by` requires at least one aggregation"),
+        ],
+    )
+    def test_not_allowed(self, database: capy.Database, overwrite_settings, query: str, message: str):
+        database.create(permission=1)
+        overwrite_settings("is_cache_enabled", False)
+
+        factory = APIRequestFactory()
+        serializer = AggregatePermissionSerializer(request=factory.get(f"/notes/547/?{query}"))
+
+        with pytest.raises(ValidationException, match=re.escape(message)):
+            serializer.filter()
+
+    def test_invalid_declaration(self):
+        with pytest.raises(AssertionError, match="Aggregation 'median:id' must be one of"):
+
+            class InvalidSerializer(Serializer):
+                model = Permission
+                path = "/permission"
+                fields = {
+                    "default": ("id",),
+                }
+                aggregations = ("median:id",)
+
+    def test_alias_conflict(self):
+        class Stock(models.Model):
+            count = models.IntegerField()
+
+            class Meta:
+                app_label = "capyc"
+
+        with pytest.raises(AssertionError, match="Aggregation 'count' conflicts with the field 'count'"):
+
+            class InvalidSerializer(Serializer):
+                model = Stock
+                path = "/stock"
+                fields = {
+                    "default": ("id",),
+                }
+                aggregations = ("count",)
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_afilter(self, database: capy.Database, overwrite_settings):
+        model = await database.acreate(permission=3, content_type=1)
+        overwrite_settings("is_cache_enabled", False)
+
+        ids = [x.id for x in model.permission]
+        factory = APIRequestFactory()
+
+        serializer = AggregatePermissionSerializer(request=factory.get("/notes/547/?group_by=content_type&agg=count"))
+        content = json.loads((await serializer.afilter(id__in=ids)).content)
+
+        assert content == [{"content_type": model.content_type.id, "count": 3}]
+
+
+class TestConditionalRequests:
+    def test_cache_hit(self, database: capy.Database, overwrite_settings, django_assert_num_queries):
+        model = database.create(permission=1)
+        overwrite_settings("is_cache_enabled", True)
+
+        factory = APIRequestFactory()
+        response = PermissionSerializer(request=factory.get("/notes/547/")).get(id=model.permission.id)
+        etag = response["ETag"]
+        last_modified = response["Last-Modified"]
+
+        with django_assert_num_queries(0):
+            request = factory.get("/notes/547/", headers={"If-None-Match": etag})
+            response = PermissionSerializer(request=request).get(id=model.permission.id)
+
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response["ETag"] == etag
+
+            request = factory.get("/notes/547/", headers={"If-Modified-Since": last_modified})
+            assert PermissionSerializer(request=request).get(id=model.permission.id).status_code == 304
+
+            request = factory.get(
+                "/notes/547/", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+            )
+            response = PermissionSerializer(request=request).get(id=model.permission.id)
+
+            assert response.status_code == 200
+            assert json.loads(response.content)["id"] == model.permission.id
+
+    def test_etag_per_encoding(self, database: capy.Database, overwrite_settings):
+        model = database.create(permission=1)
+        overwrite_settings("is_cache_enabled", True)
+        overwrite_settings("min_compression_size", 0)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/", headers={"Accept-Encoding": "gzip"})
+        response = PermissionSerializer(request=request).get(id=model.permission.id)
+
+        assert response["Content-Encoding"] == "gzip"
+        assert response["ETag"].endswith('-gzip"')
+
+    def test_invalidated(self, database: capy.Database, overwrite_settings, monkeypatch: pytest.MonkeyPatch):
+        model = database.create(permission=1)
+        overwrite_settings("is_cache_enabled", True)
+
+        key = PermissionSerializer.get_serializer_path()
+        monkeypatch.setitem(SERIALIZER_DEPTHS, key, PermissionSerializer.depth)
+
+        factory = APIRequestFactory()
+        response = PermissionSerializer(request=factory.get("/notes/547/")).get(id=model.permission.id)
+        etag = response["ETag"]
+
+        async_to_sync(delete_cache)(key)
+
+        request = factory.get("/notes/547/", headers={"If-None-Match": etag})
+        assert PermissionSerializer(request=request).get(id=model.permission.id).status_code == 200
+
+    def test_probe(self, database: capy.Database, overwrite_settings, django_assert_num_queries):
+        now = timezone.now()
+        model = database.create(user={"last_login": now - timedelta(days=1)})
+        overwrite_settings("is_cache_enabled", False)
+        cache.set(get_modified_key(ModifiedUserSerializer.get_serializer_path()), time.time() - 3600, None)
+
+        factory = APIRequestFactory()
+        since = http_date(time.time() - 60)
+
+        with django_assert_num_queries(1):
+            request = factory.get("/notes/547/", headers={"If-Modified-Since": since})
+            response = ModifiedUserSerializer(request=request).filter(id=model.user.id)
+
+        assert response.status_code == 304
+        assert response["Last-Modified"] == since
+
+        model.user.last_login = now
+        model.user.save()
+
+        request = factory.get("/notes/547/", headers={"If-Modified-Since": since})
+        response = ModifiedUserSerializer(request=request).get(id=model.user.id)
+
+        assert response.status_code == 200
+        assert json.loads(response.content) == {"id": model.user.id, "username": model.user.username}
+
+    def test_probe__invalidated(self, database: capy.Database, overwrite_settings):
+        model = database.create(user={"last_login": timezone.now() - timedelta(days=1)})
+        overwrite_settings("is_cache_enabled", False)
+
+        # nothing is known about the changes made before the serializer was invalidated
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/", headers={"If-Modified-Since": http_date(time.time() - 60)})
+        response = ModifiedUserSerializer(request=request).get(id=model.user.id)
+
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_probe__async(self, database: capy.Database, overwrite_settings):
+        model = await database.acreate(user={"last_login": timezone.now() - timedelta(days=1)})
+        overwrite_settings("is_cache_enabled", False)
+        await cache.aset(get_modified_key(ModifiedUserSerializer.get_serializer_path()), time.time() - 3600, None)
+
+        factory = APIRequestFactory()
+        request = factory.get("/notes/547/", headers={"If-Modified-Since": http_date(time.time() - 60)})
+
+        assert (await ModifiedUserSerializer(request=request).afilter(id=model.user.id)).status_code == 304
+
+
 class TestFilterM2MQuery:
     # countselect
     def test_permission__exact(self, database: capy.Database, django_assert_num_queries):
@@ -2601,8 +4056,9 @@ class TestGetCacheNoHits:
 
         key = f"tests.django.test_serializer.PermissionSerializer____application/json__en____id={model.permission.id}__"
 
-        assert cache.keys("*") == [
+        assert sorted(cache.keys("*")) == [
             key,
+            f"{key}__meta",
         ]
 
         assert decompress(cache.get(key)) == {
@@ -2645,8 +4101,9 @@ class TestGetCacheNoHits:
             f"tests.django.test_serializer.PermissionSerializer____application/json__en____id={model.permission.id}__sets=extra,ids"
         )
 
-        assert cache.keys("*") == [
+        assert sorted(cache.keys("*")) == [
             key,
+            f"{key}__meta",
         ]
 
         assert decompress(cache.get(key)) == {
@@ -2697,8 +4154,9 @@ class TestGetCacheNoHits:
 
         key = f"tests.django.test_serializer.PermissionSerializer____application/json__en____id={model.permission.id}__sets=extra,lists"
 
-        assert cache.keys("*") == [
+        assert sorted(cache.keys("*")) == [
             key,
+            f"{key}__meta",
         ]
 
         assert decompress(cache.get(key)) == {
@@ -2754,8 +4212,9 @@ class TestFilterCacheNoHits:
 
         key = f"tests.django.test_serializer.PermissionSerializer____application/json__en____id__in=[{', '.join([str(x.id) for x in model.permission])}]__"
 
-        assert cache.keys("*") == [
+        assert sorted(cache.keys("*")) == [
             key,
+            f"{key}__meta",
         ]
 
         assert decompress(cache.get(key)) == {
@@ -2812,8 +4271,9 @@ class TestFilterCacheNoHits:
 
         key = f"tests.django.test_serializer.PermissionSerializer____application/json__en____id__in=[{', '.join([str(x.id) for x in model.permission])}]__sets=extra,ids"
 
-        assert cache.keys("*") == [
+        assert sorted(cache.keys("*")) == [
             key,
+            f"{key}__meta",
         ]
 
         assert decompress(cache.get(key)) == {
@@ -2824,7 +4284,7 @@ class TestFilterCacheNoHits:
             },
         }
 
-    # countselectm2m select * 2
+    # countselectm2m select
     def test_permission__two_sets__two_items__lists(
         self, database: capy.Database, django_assert_num_queries, overwrite_settings
     ):
@@ -2881,10 +4341,11 @@ class TestFilterCacheNoHits:
 
         key = f"tests.django.test_serializer.PermissionSerializer____application/json__en____id__in=[{', '.join([str(x.id) for x in model.permission])}]__sets=extra,lists"
 
-        with django_assert_num_queries(4) as captured:
+        with django_assert_num_queries(3) as captured:
             assert_response(serializer.filter(id__in=[x.id for x in model.permission]), expected)
-        assert cache.keys("*") == [
+        assert sorted(cache.keys("*")) == [
             key,
+            f"{key}__meta",
         ]
 
         assert decompress(cache.get(key)) == {
@@ -3284,7 +4745,7 @@ class TestFilterCacheHits:
 
 class TestFilterCompressingCacheNoHits:
 
-    # countselectm2m select * 2
+    # countselectm2m select
     @pytest.mark.parametrize("encoding", ["gzip", "br", "deflate", "zstd"])
     def test_permission__two_sets__two_items__lists(
         self, database: capy.Database, django_assert_num_queries, overwrite_settings, encoding
@@ -3343,10 +4804,11 @@ class TestFilterCompressingCacheNoHits:
 
         key = f"tests.django.test_serializer.PermissionSerializer____application/json__en____id__in=[{', '.join([str(x.id) for x in model.permission])}]__sets=extra,lists"
 
-        with django_assert_num_queries(4) as captured:
+        with django_assert_num_queries(3) as captured:
             assert_response(serializer.filter(id__in=[x.id for x in model.permission]), expected, encoding=encoding)
-        assert cache.keys("*") == [
+        assert sorted(cache.keys("*")) == [
             key,
+            f"{key}__meta",
         ]
 
         assert decompress(cache.get(key), encoding=encoding) == {
@@ -3492,8 +4954,9 @@ class TestGetCompressingCacheNoHits:
         with django_assert_num_queries(2) as captured:
             assert_response(serializer.get(id=model.permission.id), expected, encoding=encoding)
 
-        assert cache.keys("*") == [
+        assert sorted(cache.keys("*")) == [
             key,
+            f"{key}__meta",
         ]
 
         assert decompress(cache.get(key), encoding=encoding) == {
@@ -0,0 +1,85 @@
+import gc
+import json
+
+import pytest
+from django.contrib.auth.models import Group, Permission
+from rest_framework.test import APIRequestFactory
+
+import capyc
+from capyc.django import warmup as warmup_module
+from capyc.django.serializer import Serializer, get_plan_metrics
+
+
+class GroupSerializer(Serializer):
+    model = Group
+    path = "/group"
+    fields = {
+        "default": ("id", "name"),
+    }
+    filters = ("name",)
+    lazy = True
+
+
+class PermissionSerializer(Serializer):
+    model = Permission
+    path = "/permission"
+    fields = {
+        "default": ("id", "name"),
+        "extra": ("codename",),
+        "expand_lists": ("groups[]",),
+    }
+    rewrites = {
+        "group_set": "groups",
+    }
+    filters = ("name", "groups")
+    lazy = True
+    groups = GroupSerializer
+
+
+@pytest.fixture
+def serializers(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(warmup_module, "get_serializers", lambda: [GroupSerializer, PermissionSerializer])
+
+
+def test_warmup(serializers):
+    report = capyc.warmup(freeze=False)
+
+    assert report["serializers"] == 2
+    assert report["plans"] <= 4
+    assert report["seconds"] > 0
+    assert report["memory"] >= 0
+    assert PermissionSerializer._prepared is True
+    assert GroupSerializer._prepared is True
+
+    metrics = get_plan_metrics()
+    serializer = PermissionSerializer(sets=["expand_lists"])
+    serializer.manage()
+    serializer._prefetch(Permission.objects.none())
+
+    assert get_plan_metrics()["queries"]["misses"] == metrics["queries"]["misses"]
+
+
+def test_help(serializers):
+    capyc.warmup(freeze=False)
+    info = PermissionSerializer._get_help_content.cache_info()
+
+    factory = APIRequestFactory()
+    response = PermissionSerializer(request=factory.get("/notes/547/?help")).filter()
+
+    assert json.loads(response.content)["filters"] == ["groups", "groups.name", "name"]
+    assert PermissionSerializer._get_help_content.cache_info().hits == info.hits + 1
+
+
+def test_freeze(serializers):
+    try:
+        report = capyc.warmup()
+
+        assert report["frozen"] > 0
+        assert gc.get_freeze_count() > 0
+
+    finally:
+        gc.unfreeze()
+
+
+def test_get_rss():
+    assert warmup_module.get_rss() > 0
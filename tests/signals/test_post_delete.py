@@ -19,10 +19,11 @@ async def test_permission(database: capy.Database, signals: capy.Signals):
     signals.enable("django.db.models.signals.post_delete")
 
     model = await database.acreate(permission=1, content_type=1)
+    pk = model.permission.id
     await model.permission.adelete()
 
     assert cache.delete_cache.call_args_list == [
-        call("auth.Permission"),
+        call("auth.Permission", pk=pk, fields=None),
     ]
 
 
@@ -32,10 +33,11 @@ async def test_content_type(database: capy.Database, signals: capy.Signals):
     signals.enable("django.db.models.signals.post_delete")
 
     model = await database.acreate(content_type=1)
+    pk = model.content_type.id
     await model.content_type.adelete()
 
     assert cache.delete_cache.call_args_list == [
-        call("contenttypes.ContentType"),
+        call("contenttypes.ContentType", pk=pk, fields=None),
     ]
 
 
@@ -45,8 +47,9 @@ async def test_group(database: capy.Database, signals: capy.Signals):
     signals.enable("django.db.models.signals.post_delete")
 
     model = await database.acreate(group=1)
+    pk = model.group.id
     await model.group.adelete()
 
     assert cache.delete_cache.call_args_list == [
-        call("auth.Group"),
+        call("auth.Group", pk=pk, fields=None),
     ]
@@ -19,11 +19,11 @@ class TestCreate:
     async def test_permission(self, database: capy.Database, signals: capy.Signals):
         signals.enable("django.db.models.signals.post_save")
 
-        await database.acreate(permission=1, content_type=1)
+        model = await database.acreate(permission=1, content_type=1)
 
         assert cache.delete_cache.call_args_list == [
-            call("contenttypes.ContentType"),
-            call("auth.Permission"),
+            call("contenttypes.ContentType", pk=model.content_type.id, fields=None),
+            call("auth.Permission", pk=model.permission.id, fields=None),
         ]
 
     @pytest.mark.asyncio
@@ -31,10 +31,10 @@ class TestCreate:
     async def test_content_type(self, database: capy.Database, signals: capy.Signals):
         signals.enable("django.db.models.signals.post_save")
 
-        await database.acreate(content_type=1)
+        model = await database.acreate(content_type=1)
 
         assert cache.delete_cache.call_args_list == [
-            call("contenttypes.ContentType"),
+            call("contenttypes.ContentType", pk=model.content_type.id, fields=None),
         ]
 
     @pytest.mark.asyncio
@@ -42,10 +42,10 @@ class TestCreate:
     async def test_group(self, database: capy.Database, signals: capy.Signals):
         signals.enable("django.db.models.signals.post_save")
 
-        await database.acreate(group=1)
+        model = await database.acreate(group=1)
 
         assert cache.delete_cache.call_args_list == [
-            call("auth.Group"),
+            call("auth.Group", pk=model.group.id, fields=None),
         ]
 
 
@@ -63,7 +63,7 @@ class TestUpdate:
         await model.permission.asave()
 
         assert cache.delete_cache.call_args_list == [
-            call("auth.Permission"),
+            call("auth.Permission", pk=model.permission.id, fields=None),
         ]
 
     @pytest.mark.asyncio
@@ -78,7 +78,7 @@ class TestUpdate:
         await model.content_type.asave()
 
         assert cache.delete_cache.call_args_list == [
-            call("contenttypes.ContentType"),
+            call("contenttypes.ContentType", pk=model.content_type.id, fields=None),
         ]
 
     @pytest.mark.asyncio
@@ -93,5 +93,22 @@ class TestUpdate:
         await model.group.asave()
 
         assert cache.delete_cache.call_args_list == [
-            call("auth.Group"),
+            call("auth.Group", pk=model.group.id, fields=None),
+        ]
+
+
+class TestUpdateFields:
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(reset_sequences=True)
+    async def test_permission(self, database: capy.Database, signals: capy.Signals):
+        signals.enable("django.db.models.signals.post_save")
+
+        model = await database.acreate(permission=1, content_type=1)
+        cache.delete_cache.call_args_list = []
+
+        model.permission.name = "test"
+        await model.permission.asave(update_fields=["name", "content_type_id"])
+
+        assert cache.delete_cache.call_args_list == [
+            call("auth.Permission", pk=model.permission.id, fields={"name", "content_type"}),
         ]